@@ -0,0 +1,383 @@
+import argparse
+import asyncio
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from urllib.parse import parse_qs, urlsplit
+
+from inv_db import Database, DatabaseBusyError, DuplicateProductError, InventoryError, NotFoundError, ProductRow, StockError
+
+logger = logging.getLogger("inv_app.api")
+
+MAX_BODY_BYTES = 1 << 20
+MAX_PAGE_SIZE = 1000
+
+STATUS_TEXT = {
+    200: "OK",
+    201: "Created",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    409: "Conflict",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+ERROR_STATUS = (
+    (NotFoundError, 404),
+    (StockError, 409),
+    (DuplicateProductError, 409),
+    (DatabaseBusyError, 503),
+    (InventoryError, 500),
+)
+
+SALE_FIELDS = ("id", "product_name", "quantity", "total_price", "sale_date")
+PURCHASE_FIELDS = ("id", "product_name", "quantity", "cost_price", "purchase_date", "supplier_name")
+REPORT_FIELDS = ("product_name", "total_sales", "quantity_sold")
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+def rows_to_dicts(fields, rows):
+    return [dict(zip(fields, row)) for row in rows]
+
+def require_number(body, key, positive=True, default=None):
+    value = body.get(key, default)
+    if value is None:
+        raise ApiError(400, f"'{key}' is required.")
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ApiError(400, f"'{key}' must be a number.")
+    if positive and value <= 0:
+        raise ApiError(400, f"'{key}' must be a positive number.")
+    return value
+
+def require_date(value, key):
+    if value is None:
+        return date.today().isoformat()
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date().isoformat()
+    except (TypeError, ValueError):
+        raise ApiError(400, f"'{key}' must be a date in YYYY-MM-DD format.") from None
+
+def page_args(query):
+    try:
+        offset = int(query.get("offset", 0))
+        limit = min(int(query.get("limit", 100)), MAX_PAGE_SIZE)
+    except ValueError:
+        raise ApiError(400, "'offset' and 'limit' must be whole numbers.") from None
+    if offset < 0 or limit < 0:
+        raise ApiError(400, "'offset' and 'limit' cannot be negative.")
+    return offset, limit, query.get("q", "")
+
+class ReadPool:
+    def __init__(self, db_name, size=4):
+        self.db_name = db_name
+        self.executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix="api-reader")
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.connections = []
+
+    def _call(self, method, args):
+        db = getattr(self.local, "db", None)
+        if db is None:
+            db = self.local.db = Database(self.db_name, read_only=True)
+            with self.lock:
+                self.connections.append(db)
+        return getattr(db, method)(*args)
+
+    async def run(self, method, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, self._call, method, args)
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        for db in self.connections:
+            db.close()
+
+class WriteQueue:
+    def __init__(self, db_name, max_batch=256):
+        self.db_name = db_name
+        self.max_batch = max_batch
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="api-writer")
+        self.queue = None
+        self.db = None
+        self.task = None
+        self.writes = 0
+        self.batches = 0
+        self.largest_batch = 0
+        self.commit_ms = 0.0
+
+    async def start(self):
+        self.queue = asyncio.Queue()
+        self.db = await asyncio.get_running_loop().run_in_executor(self.executor, Database, self.db_name)
+        self.task = asyncio.create_task(self._run())
+
+    async def submit(self, method, *args):
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((method, args, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            while len(batch) < self.max_batch and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            try:
+                results = await loop.run_in_executor(self.executor, self._commit, batch)
+            except Exception as e:
+                logger.error("write batch of %d failed: %s", len(batch), e)
+                results = [(None, e)] * len(batch)
+            for (method, args, future), (result, error) in zip(batch, results):
+                if future.done():
+                    continue
+                if error is None:
+                    future.set_result(result)
+                else:
+                    future.set_exception(error)
+
+    def _commit(self, batch):
+        started = time.perf_counter()
+        results = []
+        with self.db.transaction():
+            for method, args, future in batch:
+                try:
+                    results.append((getattr(self.db, method)(*args), None))
+                except (InventoryError, sqlite3.Error) as e:
+                    results.append((None, e))
+        self.commit_ms += (time.perf_counter() - started) * 1000
+        self.writes += len(batch)
+        self.batches += 1
+        self.largest_batch = max(self.largest_batch, len(batch))
+        return results
+
+    def stats(self):
+        return {
+            "writes": self.writes,
+            "batches": self.batches,
+            "mean_batch": round(self.writes / self.batches, 1) if self.batches else 0,
+            "largest_batch": self.largest_batch,
+            "mean_commit_ms": round(self.commit_ms / self.batches, 3) if self.batches else 0,
+        }
+
+    async def close(self):
+        if self.task:
+            self.task.cancel()
+        await asyncio.get_running_loop().run_in_executor(self.executor, self.db.close)
+        self.executor.shutdown(wait=True)
+
+class ApiServer:
+    def __init__(self, db_name="inventory.db", readers=4, max_batch=256):
+        self.reads = ReadPool(db_name, readers)
+        self.writes = WriteQueue(db_name, max_batch)
+        self.requests = 0
+        self.started_at = time.perf_counter()
+        self.routes = [
+            ("GET", re.compile(r"/products"), self.list_products),
+            ("POST", re.compile(r"/products"), self.add_product),
+            ("GET", re.compile(r"/products/(\d+)"), self.get_product),
+            ("GET", re.compile(r"/sales"), self.list_sales),
+            ("POST", re.compile(r"/sales"), self.record_sale),
+            ("DELETE", re.compile(r"/sales/(\d+)"), self.delete_sale),
+            ("GET", re.compile(r"/purchases"), self.list_purchases),
+            ("POST", re.compile(r"/purchases"), self.record_purchase),
+            ("POST", re.compile(r"/transfers"), self.transfer_stock),
+            ("GET", re.compile(r"/reports/sales"), self.sales_report),
+            ("GET", re.compile(r"/stats"), self.stats),
+        ]
+
+    async def start(self):
+        await self.writes.start()
+
+    async def close(self):
+        await self.writes.close()
+        self.reads.close()
+
+    async def list_products(self, query, body):
+        offset, limit, term = page_args(query)
+        rows = await self.reads.run("get_products_page", offset, limit, term)
+        return 200, rows_to_dicts(ProductRow._fields, rows)
+
+    async def get_product(self, query, body, product_id):
+        row = await self.reads.run("get_product_by_id", int(product_id))
+        if row is None:
+            raise NotFoundError(f"Product ID {product_id} does not exist.")
+        return 200, dict(zip(ProductRow._fields, row))
+
+    async def add_product(self, query, body):
+        name = str(body.get("name") or "").strip()
+        if not name:
+            raise ApiError(400, "'name' is required.")
+        expiry_date = body.get("expiry_date")
+        product_id = await self.writes.submit(
+            "add_product", name, body.get("category") or "",
+            require_number(body, "purchase_price", positive=False), require_number(body, "selling_price", positive=False),
+            require_number(body, "stock_quantity", positive=False, default=0), require_number(body, "go_down_quantity", positive=False, default=0),
+            require_date(expiry_date, "expiry_date") if expiry_date else None
+        )
+        return 201, {"id": product_id}
+
+    async def list_sales(self, query, body):
+        offset, limit, term = page_args(query)
+        rows = await self.reads.run("get_sales_page", offset, limit, term)
+        return 200, rows_to_dicts(SALE_FIELDS, rows)
+
+    async def record_sale(self, query, body):
+        product_id = int(require_number(body, "product_id"))
+        quantity = require_number(body, "quantity")
+        sale_date = require_date(body.get("sale_date"), "sale_date")
+        total_price = body.get("total_price")
+        if total_price is None:
+            product = await self.reads.run("get_product_by_id", product_id)
+            if product is None:
+                raise NotFoundError(f"Product ID {product_id} does not exist.")
+            total_price = round(quantity * product[4], 2)
+        else:
+            total_price = require_number(body, "total_price", positive=False)
+        sale_id = await self.writes.submit("record_sale", product_id, quantity, total_price, sale_date)
+        return 201, {"id": sale_id, "total_price": total_price}
+
+    async def delete_sale(self, query, body, sale_id):
+        await self.writes.submit("delete_sale", int(sale_id))
+        return 200, {"id": int(sale_id)}
+
+    async def list_purchases(self, query, body):
+        offset, limit, term = page_args(query)
+        rows = await self.reads.run("get_purchases_page", offset, limit, term)
+        return 200, rows_to_dicts(PURCHASE_FIELDS, rows)
+
+    async def record_purchase(self, query, body):
+        purchase_id = await self.writes.submit(
+            "record_purchase", int(require_number(body, "product_id")), require_number(body, "quantity"),
+            require_number(body, "cost_price", positive=False), require_date(body.get("purchase_date"), "purchase_date"),
+            str(body.get("supplier_name") or "")
+        )
+        return 201, {"id": purchase_id}
+
+    async def transfer_stock(self, query, body):
+        stock, go_down = await self.writes.submit("transfer_stock", int(require_number(body, "product_id")), require_number(body, "amount"))
+        return 200, {"stock_quantity": stock, "go_down_quantity": go_down}
+
+    async def sales_report(self, query, body):
+        start_date = require_date(query.get("start"), "start")
+        end_date = require_date(query.get("end"), "end")
+        if start_date > end_date:
+            raise ApiError(400, "'start' cannot be after 'end'.")
+        rows = await self.reads.run("get_sales_report_by_date_range", start_date, end_date)
+        return 200, rows_to_dicts(REPORT_FIELDS, rows)
+
+    async def stats(self, query, body):
+        return 200, {
+            "requests": self.requests,
+            "uptime_s": round(time.perf_counter() - self.started_at, 1),
+            "writer": self.writes.stats(),
+        }
+
+    async def dispatch(self, method, target, raw_body):
+        url = urlsplit(target)
+        path = url.path.rstrip("/") or "/"
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        allowed = False
+        for route_method, pattern, handler in self.routes:
+            match = pattern.fullmatch(path)
+            if not match:
+                continue
+            allowed = True
+            if route_method != method:
+                continue
+            try:
+                body = json.loads(raw_body) if raw_body else {}
+                if not isinstance(body, dict):
+                    raise ApiError(400, "The request body must be a JSON object.")
+                return await handler(query, body, *match.groups())
+            except json.JSONDecodeError as e:
+                return 400, {"error": f"Invalid JSON: {e}"}
+            except ApiError as e:
+                return e.status, {"error": str(e)}
+            except InventoryError as e:
+                status = next(status for error_type, status in ERROR_STATUS if isinstance(e, error_type))
+                return status, {"error": str(e)}
+            except sqlite3.Error as e:
+                logger.error("%s %s failed: %s", method, path, e)
+                return 500, {"error": str(e)}
+        if allowed:
+            return 405, {"error": f"{method} is not supported for {path}."}
+        return 404, {"error": f"No such endpoint: {path}"}
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                parts = request_line.decode("latin-1").split()
+                keep_alive = len(parts) == 3 and parts[2] == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                length = int(headers.get("content-length") or 0)
+                if len(parts) != 3:
+                    status, payload = 400, {"error": "Malformed request line."}
+                elif length > MAX_BODY_BYTES:
+                    status, payload = 413, {"error": "Request body is too large."}
+                    keep_alive = False
+                else:
+                    raw_body = await reader.readexactly(length) if length else b""
+                    status, payload = await self.dispatch(parts[0], parts[1], raw_body)
+                self.requests += 1
+
+                data = json.dumps(payload).encode("utf-8")
+                writer.write(
+                    f"HTTP/1.1 {status} {STATUS_TEXT[status]}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + data
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+async def serve(db_name, host, port, readers, max_batch):
+    api = ApiServer(db_name, readers, max_batch)
+    await api.start()
+    server = await asyncio.start_server(api.handle_connection, host, port)
+    logger.info("serving %s on http://%s:%d", db_name, host, port)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await api.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the inventory database as a local JSON API")
+    parser.add_argument("--db", default="inventory.db", help="database file to serve")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on; keep the default unless other machines need access")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--readers", type=int, default=4, help="how many read-only connections serve GET requests")
+    parser.add_argument("--max-batch", type=int, default=256, help="most writes committed together in one transaction")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    try:
+        asyncio.run(serve(args.db, args.host, args.port, args.readers, args.max_batch))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
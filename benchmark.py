@@ -0,0 +1,467 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from datetime import date, datetime, timedelta
+from urllib.parse import urlsplit
+
+from inv_db import Database, DatabaseBusyError
+
+ADJECTIVES = ("Fresh", "Organic", "Classic", "Premium", "Spicy", "Sweet", "Roasted", "Crispy", "Golden", "Wild",
+              "Smoked", "Mild", "Extra", "Family", "Mini", "Royal", "Green", "Red", "Dark", "Light")
+NOUNS = ("Rice", "Flour", "Sugar", "Tea", "Coffee", "Biscuits", "Oil", "Soap", "Shampoo", "Lentils",
+         "Beans", "Noodles", "Juice", "Milk", "Butter", "Cheese", "Salt", "Pepper", "Honey", "Jam",
+         "Chips", "Chocolate", "Water", "Detergent", "Toothpaste")
+CATEGORIES = ("Grocery", "Beverages", "Dairy", "Snacks", "Household", "Personal Care", "Spices", "Bakery",
+              "Frozen", "Canned Goods", "Baby Care", "Stationery")
+SUPPLIER_PREFIXES = ("Al", "Best", "City", "Crown", "Delta", "Eastern", "Global", "Metro", "National", "Prime",
+                     "Royal", "Star", "Sun", "United", "Valley")
+SUPPLIER_SUFFIXES = ("Traders", "Wholesale", "Distributors", "Suppliers", "Enterprises", "Imports", "Foods", "Brothers")
+
+GENERATED_TRIGGERS = (
+    "sales_summary_ai", "sales_summary_ad", "sales_summary_au",
+    "purchases_summary_ai", "purchases_summary_ad", "purchases_summary_au",
+    "products_fts_ai", "products_fts_ad", "products_fts_au",
+    "purchases_fts_ai", "purchases_fts_ad", "purchases_fts_au",
+)
+
+def log(message):
+    print(message, file=sys.stderr, flush=True)
+
+def skewed_dates(rng, start, end, count):
+    span = (end - start).days
+    days = []
+    for _ in range(count):
+        offset = int(rng.triangular(0, span, span))
+        day = start + timedelta(days=offset)
+        if day.weekday() == 6 and rng.random() < 0.5:
+            day -= timedelta(days=1)
+        if day.month in (11, 12) and rng.random() < 0.25:
+            day = min(end, day + timedelta(days=rng.randint(0, 14)))
+        days.append(day.isoformat())
+    return days
+
+def popularity_weights(count, exponent=1.1):
+    cumulative = []
+    total = 0.0
+    for rank in range(1, count + 1):
+        total += 1.0 / rank ** exponent
+        cumulative.append(total)
+    return cumulative
+
+def generate_database(path, products, sales, purchases, seed=1, start=None, end=None, batch_size=50000):
+    rng = random.Random(seed)
+    end = end or date.today()
+    start = start or end - timedelta(days=3 * 365)
+
+    if os.path.exists(path):
+        os.remove(path)
+    Database(path).close()
+
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute("PRAGMA journal_mode = MEMORY")
+    for trigger in GENERATED_TRIGGERS:
+        conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    for table in ("monthly_product_summary", "products_fts", "purchases_fts", "stock_movements", "stock_snapshots", "stock_snapshot_runs"):
+        conn.execute(f"DROP TABLE IF EXISTS {table}")
+
+    started = time.perf_counter()
+    prices = []
+    for first in range(0, products, batch_size):
+        rows = []
+        for product_id in range(first + 1, min(first + batch_size, products) + 1):
+            purchase_price = round(rng.uniform(0.5, 500.0), 2)
+            selling_price = round(purchase_price * rng.uniform(1.05, 1.6), 2)
+            prices.append((purchase_price, selling_price))
+            expiry = (end + timedelta(days=rng.randint(-30, 720))).isoformat() if rng.random() < 0.6 else None
+            rows.append((product_id, f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {product_id:07d}", rng.choice(CATEGORIES),
+                         purchase_price, selling_price, float(rng.randint(0, 500)), float(rng.randint(0, 2000)), expiry))
+        conn.executemany("INSERT INTO products (id, name, category, purchase_price, selling_price, stock_quantity, go_down_quantity, expiry_date) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+    conn.commit()
+    log(f"products: {products:,} in {time.perf_counter() - started:.1f} s")
+
+    product_ids = range(1, products + 1)
+    weights = popularity_weights(products)
+    suppliers = [f"{prefix} {suffix}" for prefix in SUPPLIER_PREFIXES for suffix in SUPPLIER_SUFFIXES]
+
+    started = time.perf_counter()
+    for first in range(0, sales, batch_size):
+        count = min(batch_size, sales - first)
+        chosen = rng.choices(product_ids, cum_weights=weights, k=count)
+        days = skewed_dates(rng, start, end, count)
+        rows = []
+        for product_id, sale_date in zip(chosen, days):
+            quantity = float(rng.randint(1, 10))
+            rows.append((product_id, quantity, round(quantity * prices[product_id - 1][1], 2), sale_date))
+        conn.executemany("INSERT INTO sales (product_id, quantity, total_price, sale_date) VALUES (?, ?, ?, ?)", rows)
+        conn.commit()
+    log(f"sales: {sales:,} in {time.perf_counter() - started:.1f} s")
+
+    started = time.perf_counter()
+    for first in range(0, purchases, batch_size):
+        count = min(batch_size, purchases - first)
+        chosen = rng.choices(product_ids, cum_weights=weights, k=count)
+        days = skewed_dates(rng, start, end, count)
+        rows = [(product_id, float(rng.randint(10, 200)), prices[product_id - 1][0], purchase_date, rng.choice(suppliers))
+                for product_id, purchase_date in zip(chosen, days)]
+        conn.executemany("INSERT INTO purchases (product_id, quantity, cost_price, purchase_date, supplier_name) VALUES (?, ?, ?, ?, ?)", rows)
+        conn.commit()
+    log(f"purchases: {purchases:,} in {time.perf_counter() - started:.1f} s")
+    conn.close()
+
+    started = time.perf_counter()
+    Database(path).close()
+    log(f"summary table, search indexes and stock ledger built in {time.perf_counter() - started:.1f} s")
+
+def timed(runs, func, *args):
+    timings = []
+    result = None
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = func(*args)
+        timings.append((time.perf_counter() - started) * 1000)
+    rows = len(result) if isinstance(result, (list, tuple)) else None
+    return {
+        "runs": runs,
+        "min_ms": round(min(timings), 3),
+        "median_ms": round(statistics.median(timings), 3),
+        "mean_ms": round(statistics.fmean(timings), 3),
+        "max_ms": round(max(timings), 3),
+        "rows": rows,
+    }
+
+def date_span(db):
+    db.cursor.execute("SELECT MIN(sale_date), MAX(sale_date) FROM sales")
+    first, last = db.cursor.fetchone()
+    if not first:
+        today = date.today()
+        return today, today
+    return datetime.strptime(first, "%Y-%m-%d").date(), datetime.strptime(last, "%Y-%m-%d").date()
+
+def run_benchmarks(path, runs=5, sale_runs=500, skip=(), concurrent_seconds=3.0, readers=2):
+    db = Database(path)
+    first, last = date_span(db)
+    last_month = last.strftime("%Y-%m")
+    month_start = last.replace(day=1)
+    year_start = month_start.replace(year=month_start.year - 1)
+    deep_sale = db.get_sales_page(99999, 1)
+    deep_key = (deep_sale[0][4], deep_sale[0][0]) if deep_sale else None
+
+    cases = {
+        "get_products": (db.get_products,),
+        "get_sales_report": (db.get_sales_report,),
+        "get_purchases_report": (db.get_purchases_report,),
+        "date_range/partial_month": (db.get_sales_report_by_date_range, (last - timedelta(days=10)).isoformat(), last.isoformat()),
+        "date_range/full_month": (db.get_sales_report_by_date_range, month_start.isoformat(), last.isoformat()),
+        "date_range/quarter_ragged": (db.get_sales_report_by_date_range, (month_start - timedelta(days=75)).isoformat(), (last - timedelta(days=3)).isoformat()),
+        "date_range/year": (db.get_sales_report_by_date_range, year_start.isoformat(), last.isoformat()),
+        "date_range/all": (db.get_sales_report_by_date_range, first.isoformat(), last.isoformat()),
+        "profitability/quarter_ragged": (db.get_product_profitability_report, (month_start - timedelta(days=75)).isoformat(), (last - timedelta(days=3)).isoformat()),
+        "profitability/year": (db.get_product_profitability_report, year_start.isoformat(), last.isoformat()),
+        "monthly_trend/year": (db.get_monthly_trend_report, year_start.isoformat(), last.isoformat()),
+        "calculate_monthly_revenue": (db.calculate_monthly_revenue, last_month),
+        "calculate_monthly_expenses": (db.calculate_monthly_expenses, last_month),
+        "get_monthly_sales_by_product": (db.get_monthly_sales_by_product, last_month),
+        "get_stored_reports": (db.get_stored_reports,),
+        "search_products/short": (db.search_products, "ri"),
+        "search_products/word": (db.search_products, "coffee"),
+        "search_products/number": (db.search_products, "00012"),
+        "search_sales/word": (db.search_sales, "honey"),
+        "search_purchases/supplier": (db.search_purchases, "metro"),
+        "count_sales/word": (db.count_sales, "honey"),
+        "get_sales_page/first": (db.get_sales_page, 0, 200),
+        "get_sales_page/deep": (db.get_sales_page, 100000, 200),
+        "get_sales_page/keyset": (db.get_sales_page, 0, 200, "", deep_key),
+        "count_sales/all": (db.count_sales,),
+        "catalog/complete/short": (db.catalog.complete, "ri"),
+        "catalog/complete/word": (db.catalog.complete, "coffee 00"),
+        "fuzzy_search_products/typo": (db.fuzzy_search_products, "cofee"),
+        "fuzzy_search_products/two_words": (db.fuzzy_search_products, "smokd toothpste"),
+        "catalog/load": (lambda: (db.catalog.mark_changed(), db.catalog.page(0, 200))[1],),
+    }
+
+    results = {}
+    for name, (func, *args) in cases.items():
+        if any(name.startswith(prefix) for prefix in skip):
+            continue
+        results[name] = timed(runs, func, *args)
+        log(f"{name}: median {results[name]['median_ms']:.2f} ms")
+
+    if "record_sale" not in skip and sale_runs:
+        results["record_sale"] = record_sale_throughput(db, sale_runs)
+        log(f"record_sale: {results['record_sale']['per_second']:.0f}/s")
+
+    db.close()
+
+    if "concurrent" not in skip and concurrent_seconds:
+        results.update(concurrent_reports(path, concurrent_seconds, readers, year_start.isoformat(), last.isoformat()))
+        log(f"concurrent/report: median {results['concurrent/report']['median_ms']:.2f} ms with "
+            f"{results['concurrent/record_sale']['per_second']:.0f} sales/s being recorded")
+    return results
+
+def concurrent_reports(path, seconds, readers, start_date, end_date):
+    stop = threading.Event()
+    writes = {"count": 0, "busy": 0, "elapsed": 0.0}
+    timings = []
+    timings_lock = threading.Lock()
+
+    def write_sales():
+        db = Database(path)
+        db.cursor.execute("SELECT id, selling_price FROM products ORDER BY stock_quantity DESC LIMIT 50")
+        candidates = db.cursor.fetchall()
+        today = date.today().isoformat()
+        sale_ids = []
+        started = time.perf_counter()
+        while not stop.is_set():
+            product_id, price = candidates[len(sale_ids) % len(candidates)]
+            try:
+                sale_ids.append(db.record_sale(product_id, 0.01, round(0.01 * price, 2), today))
+            except DatabaseBusyError:
+                writes["busy"] += 1
+        writes["elapsed"] = time.perf_counter() - started
+        writes["count"] = len(sale_ids)
+        for sale_id in sale_ids:
+            db.delete_sale(sale_id)
+        db.close()
+
+    def read_reports():
+        db = Database(path, read_only=True)
+        reports = (
+            (db.get_sales_report_by_date_range, start_date, end_date),
+            (db.get_product_profitability_report, start_date, end_date),
+            (db.search_sales, "honey"),
+        )
+        index = 0
+        while not stop.is_set():
+            report, *args = reports[index % len(reports)]
+            started = time.perf_counter()
+            report(*args)
+            with timings_lock:
+                timings.append((time.perf_counter() - started) * 1000)
+            index += 1
+        db.close()
+
+    threads = [threading.Thread(target=write_sales)] + [threading.Thread(target=read_reports) for _ in range(readers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    return {
+        "concurrent/report": {
+            "runs": len(timings),
+            "readers": readers,
+            "min_ms": round(min(timings), 3),
+            "median_ms": round(statistics.median(timings), 3),
+            "mean_ms": round(statistics.fmean(timings), 3),
+            "max_ms": round(max(timings), 3),
+        },
+        "concurrent/record_sale": {
+            "runs": writes["count"],
+            "busy": writes["busy"],
+            "mean_ms": round(writes["elapsed"] * 1000 / max(writes["count"], 1), 3),
+            "per_second": round(writes["count"] / writes["elapsed"], 1),
+        },
+    }
+
+def record_sale_throughput(db, count):
+    db.cursor.execute("SELECT id, selling_price FROM products ORDER BY stock_quantity DESC LIMIT 50")
+    candidates = db.cursor.fetchall()
+    today = date.today().isoformat()
+    sale_ids = []
+    started = time.perf_counter()
+    for index in range(count):
+        product_id, price = candidates[index % len(candidates)]
+        sale_ids.append(db.record_sale(product_id, 0.01, round(0.01 * price, 2), today))
+    elapsed = time.perf_counter() - started
+
+    for sale_id in sale_ids:
+        db.delete_sale(sale_id)
+    return {
+        "runs": count,
+        "total_ms": round(elapsed * 1000, 3),
+        "mean_ms": round(elapsed * 1000 / count, 3),
+        "per_second": round(count / elapsed, 1),
+    }
+
+async def http_request(reader, writer, method, path, payload=None):
+    body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n".encode("latin-1") + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length)) if length else None
+
+async def load_test(url, seconds, clients, product_count, keep):
+    address = urlsplit(url)
+    host, port = address.hostname, address.port or 80
+
+    reader, writer = await asyncio.open_connection(host, port)
+    status, products = await http_request(reader, writer, "GET", f"/products?limit={product_count * 20}")
+    if status != 200 or not products:
+        raise SystemExit(f"could not load products from {url} (status {status})")
+    products = sorted(products, key=lambda product: product["stock_quantity"], reverse=True)[:product_count]
+
+    latencies = []
+    statuses = {}
+    sale_ids = []
+    deadline = time.perf_counter() + seconds
+
+    async def client(index):
+        client_reader, client_writer = await asyncio.open_connection(host, port)
+        sent = 0
+        while time.perf_counter() < deadline:
+            product = products[(index + sent) % len(products)]
+            started = time.perf_counter()
+            status, body = await http_request(client_reader, client_writer, "POST", "/sales",
+                                              {"product_id": product["id"], "quantity": 0.01})
+            latencies.append((time.perf_counter() - started) * 1000)
+            statuses[status] = statuses.get(status, 0) + 1
+            if status == 201:
+                sale_ids.append(body["id"])
+            sent += 1
+        client_writer.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client(index) for index in range(clients)))
+    elapsed = time.perf_counter() - started
+    _, server_stats = await http_request(reader, writer, "GET", "/stats")
+
+    if not keep:
+        for sale_id in sale_ids:
+            await http_request(reader, writer, "DELETE", f"/sales/{sale_id}")
+    writer.close()
+
+    percentiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    return {
+        "clients": clients,
+        "seconds": round(elapsed, 2),
+        "posts": len(latencies),
+        "per_second": round(len(latencies) / elapsed, 1),
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+        "p50_ms": round(percentiles[49], 3),
+        "p95_ms": round(percentiles[94], 3),
+        "p99_ms": round(percentiles[98], 3),
+        "max_ms": round(max(latencies), 3),
+        "writer": server_stats["writer"],
+    }
+
+def database_stats(path):
+    conn = sqlite3.connect(path)
+    stats = {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] for table in ("products", "sales", "purchases")}
+    conn.close()
+    stats["size_bytes"] = os.path.getsize(path)
+    return stats
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(baseline_path, current_path, threshold):
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)["results"]
+    with open(current_path, encoding="utf-8") as f:
+        current = json.load(f)["results"]
+
+    regressions = []
+    print(f"{'benchmark':32} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name in sorted(set(baseline) & set(current)):
+        key = "median_ms" if "median_ms" in current[name] else "mean_ms"
+        before, after = baseline[name][key], current[name][key]
+        change = (after - before) / before if before else 0.0
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(f"{name:32} {before:10.2f}ms {after:10.2f}ms {change:+7.1%}{flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic inventory databases and benchmark the Database layer")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    generate = commands.add_parser("generate", help="build a synthetic inventory.db-compatible database")
+    generate.add_argument("path")
+    generate.add_argument("--products", type=int, default=10000)
+    generate.add_argument("--sales", type=int, default=200000)
+    generate.add_argument("--purchases", type=int, default=50000)
+    generate.add_argument("--seed", type=int, default=1)
+    generate.add_argument("--years", type=float, default=3, help="how many years of history to spread the rows over")
+
+    run = commands.add_parser("run", help="time the Database methods against a database")
+    run.add_argument("path")
+    run.add_argument("--runs", type=int, default=5)
+    run.add_argument("--sale-runs", type=int, default=500, help="how many sales to record for the record_sale throughput test")
+    run.add_argument("--concurrent-seconds", type=float, default=3.0, help="how long to run reports while sales are being recorded")
+    run.add_argument("--readers", type=int, default=2, help="how many read-only connections run reports in the concurrent test")
+    run.add_argument("--skip", action="append", default=[], metavar="PREFIX", help="skip benchmarks whose name starts with PREFIX")
+    run.add_argument("--output", help="write JSON results to this file instead of stdout")
+
+    loadtest = commands.add_parser("loadtest", help="post sales to a running api_server.py and measure throughput")
+    loadtest.add_argument("url", nargs="?", default="http://127.0.0.1:8765")
+    loadtest.add_argument("--seconds", type=float, default=10)
+    loadtest.add_argument("--clients", type=int, default=32, help="how many connections post sales at the same time")
+    loadtest.add_argument("--products", type=int, default=50, help="how many high-stock products to spread the sales over")
+    loadtest.add_argument("--keep", action="store_true", help="keep the posted sales instead of deleting them afterwards")
+
+    diff = commands.add_parser("compare", help="compare two JSON result files")
+    diff.add_argument("baseline")
+    diff.add_argument("current")
+    diff.add_argument("--threshold", type=float, default=0.10, help="slowdown ratio reported as a regression")
+
+    args = parser.parse_args()
+
+    if args.command == "generate":
+        end = date.today()
+        generate_database(args.path, args.products, args.sales, args.purchases, seed=args.seed,
+                          start=end - timedelta(days=int(args.years * 365)), end=end)
+    elif args.command == "run":
+        report = {
+            "meta": {
+                "commit": git_commit(),
+                "timestamp": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "sqlite": sqlite3.sqlite_version,
+                "platform": platform.platform(),
+                "database": database_stats(args.path),
+            },
+            "results": run_benchmarks(args.path, args.runs, args.sale_runs, tuple(args.skip), args.concurrent_seconds, args.readers),
+        }
+        output = json.dumps(report, indent=2)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                f.write(output)
+        else:
+            print(output)
+    elif args.command == "loadtest":
+        result = asyncio.run(load_test(args.url, args.seconds, args.clients, args.products, args.keep))
+        log(f"{result['posts']:,} sales in {result['seconds']:.1f} s: {result['per_second']:.0f}/s, "
+            f"p50 {result['p50_ms']:.1f} ms, p99 {result['p99_ms']:.1f} ms, mean batch {result['writer']['mean_batch']}")
+        print(json.dumps(result, indent=2))
+    else:
+        if compare(args.baseline, args.current, args.threshold):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,391 +1,979 @@
-from ttkwidgets.autocomplete import AutocompleteCombobox
+import time
+STARTUP_STARTED_AT = time.perf_counter()
+
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-import sqlite3, os
+import sqlite3, os, logging, csv, json, queue, threading, codecs
+from collections import OrderedDict, namedtuple
+from contextlib import nullcontext
 from datetime import datetime, date
-from tkcalendar import Calendar, DateEntry
-import pandas as pd
-
-class Database:
-    def __init__(self, db_name="inventory.db"):
-        self.conn = sqlite3.connect(db_name)
-        self.cursor = self.conn.cursor()
-        self.create_tables()
-        self._check_and_migrate_schema()
-
-    def create_tables(self):
-        self.cursor.execute("""
-            CREATE TABLE IF NOT EXISTS products (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL UNIQUE,
-                category TEXT,
-                purchase_price REAL NOT NULL,
-                selling_price REAL NOT NULL,
-                stock_quantity REAL NOT NULL,
-                expiry_date TEXT
-            )
-        """)
-        self.cursor.execute("""
-            CREATE TABLE IF NOT EXISTS sales (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                product_id INTEGER NOT NULL,
-                quantity REAL NOT NULL,
-                sale_date TEXT NOT NULL,
-                total_price REAL NOT NULL,
-                FOREIGN KEY (product_id) REFERENCES products(id)
-            )
-        """)
-        self.cursor.execute("""
-            CREATE TABLE IF NOT EXISTS purchases (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                product_id INTEGER NOT NULL,
-                quantity REAL NOT NULL,
-                purchase_date TEXT NOT NULL,
-                cost_price REAL NOT NULL,
-                supplier_name TEXT,
-                FOREIGN KEY (product_id) REFERENCES products(id)
-            )
-        """)
-        self.cursor.execute("""
-            CREATE TABLE IF NOT EXISTS reports (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                month TEXT NOT NULL UNIQUE,
-                total_revenue REAL NOT NULL,
-                total_expenses REAL NOT NULL,
-                profit REAL NOT NULL
-            )
-        """)
-        self.conn.commit()
-
-    def _check_and_migrate_schema(self):
-        self.cursor.execute("PRAGMA table_info(products)")
-        columns = [column[1] for column in self.cursor.fetchall()]
-        if 'go_down_quantity' not in columns:
-            self.cursor.execute("ALTER TABLE products ADD COLUMN go_down_quantity REAL NOT NULL DEFAULT 0")
-            self.conn.commit()
-        
-    def _perform_migration(self, table_name, new_table_schema_sql):
-        old_table_name = f"{table_name}_old"
-        self.conn.execute("BEGIN TRANSACTION;")
-        try:
-            self.cursor.execute(f"ALTER TABLE {table_name} RENAME TO {old_table_name};")
-            new_table_create_sql = new_table_schema_sql.replace(f"{table_name}_new", table_name)
-            self.cursor.execute(new_table_create_sql)
-
-            self.cursor.execute(f"PRAGMA table_info({old_table_name});")
-            old_columns = [col[1] for col in self.cursor.fetchall()]
-            columns_str = ", ".join(old_columns)
-            placeholders = ", ".join(["?" for _ in old_columns])
-
-            self.cursor.execute(f"SELECT {columns_str} FROM {old_table_name};")
-            data_to_copy = self.cursor.fetchall()
-
-            self.cursor.executemany(f"INSERT INTO {table_name} ({columns_str}) VALUES ({placeholders});", data_to_copy)
-
-            self.cursor.execute(f"DROP TABLE {old_table_name};")
-
-            self.conn.commit()
-        except Exception as e:
-            self.conn.rollback()
-            raise Exception(f"Migration failed for table {table_name}: {e}")
-
-    def add_product(self, name, category, purchase_price, selling_price, stock_quantity, go_down_quantity, expiry_date):
-        try:
-            self.cursor.execute("INSERT INTO products (name, category, purchase_price, selling_price, stock_quantity, go_down_quantity, expiry_date) VALUES (?, ?, ?, ?, ?, ?, ?)",
-                                 (name, category, purchase_price, selling_price, stock_quantity, go_down_quantity, expiry_date))
-            self.conn.commit()
-            return True
-        except sqlite3.IntegrityError:
-            messagebox.showerror("Error", f"Product '{name}' already exists.")
-            return False
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to add product: {e}")
-            return False
-
-    def get_products(self):
-        self.cursor.execute("SELECT id, name, category, purchase_price, selling_price, stock_quantity, go_down_quantity, expiry_date FROM products ORDER BY name ASC")
-        return self.cursor.fetchall()
 
-    def get_product_by_id(self, product_id):
-        self.cursor.execute("SELECT id, name, category, purchase_price, selling_price, stock_quantity, go_down_quantity, expiry_date FROM products WHERE id = ?", (product_id,))
-        return self.cursor.fetchone()
-
-    def get_product_by_name(self, name):
-        self.cursor.execute("SELECT id, name, category, purchase_price, selling_price, stock_quantity, expiry_date FROM products WHERE name = ?", (name,))
-        return self.cursor.fetchone()
-
-    def update_product(self, product_id, name, category, purchase_price, selling_price, stock_quantity, go_down_quantity, expiry_date):
-        try:
-            self.cursor.execute("UPDATE products SET name=?, category=?, purchase_price=?, selling_price=?, stock_quantity=?, go_down_quantity=?, expiry_date=? WHERE id=?",
-                                 (name, category, purchase_price, selling_price, stock_quantity, go_down_quantity, expiry_date, product_id))
-            self.conn.commit()
-            return True
-        except sqlite3.IntegrityError:
-            messagebox.showerror("Error", f"Product name '{name}' already exists for another product.")
-            return False
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to update product: {e}")
-            return False
-
-    def delete_product(self, product_id):
-        try:
-            self.cursor.execute("DELETE FROM products WHERE id = ?", (product_id,))
-            self.conn.commit()
-            return True
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to delete product: {e}")
-            return 
-            
-    def transfer_stock(self, product_id, amount):
-        self.cursor.execute("SELECT stock_quantity, go_down_quantity FROM products WHERE id = ?", (product_id,))
-
-        row = self.cursor.fetchone()
+from inv_db import Database, InventoryError, QueryStats
+
+logger = logging.getLogger("inv_app")
+
+class StartupTimer:
+    def __init__(self, started_at):
+        self.started_at = started_at
+        self.phases = []
+        self.last_mark = started_at
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.phases.append((phase, (now - self.last_mark) * 1000))
+        self.last_mark = now
+
+    def total_ms(self):
+        return (self.last_mark - self.started_at) * 1000
+
+    def report(self):
+        return {
+            "total_ms": round(self.total_ms(), 1),
+            "phases": [{"phase": phase, "ms": round(ms, 1)} for phase, ms in self.phases],
+        }
+
+startup_timer = StartupTimer(STARTUP_STARTED_AT)
+
+class ProductAutocomplete(ttk.Entry):
+    IGNORED_KEYS = {"Up", "Down", "Return", "KP_Enter", "Escape", "Tab", "Left", "Right", "Home", "End",
+                    "Shift_L", "Shift_R", "Control_L", "Control_R", "Alt_L", "Alt_R"}
+
+    def __init__(self, parent, catalog, max_results=50, visible_rows=10, **kwargs):
+        self.text = tk.StringVar()
+        super().__init__(parent, textvariable=self.text, **kwargs)
+        self.catalog = catalog
+        self.max_results = max_results
+        self.visible_rows = visible_rows
+        self.matches = []
+        self.popup = None
+        self.listbox = None
+
+        self.bind("<KeyRelease>", self._on_key_release)
+        self.bind("<Down>", lambda e: self._move(1))
+        self.bind("<Up>", lambda e: self._move(-1))
+        self.bind("<Return>", self._on_return)
+        self.bind("<KP_Enter>", self._on_return)
+        self.bind("<Escape>", lambda e: self.hide())
+        self.bind("<FocusOut>", lambda e: self.after(150, self._hide_unless_focused))
+
+    def set(self, value):
+        self.text.set(value)
+        self.icursor(tk.END)
+        self.hide()
+
+    def _on_key_release(self, event):
+        if event.keysym in self.IGNORED_KEYS:
+            return
+        if self.text.get().strip():
+            self.show_matches()
+        else:
+            self.hide()
+
+    def show_matches(self):
+        started = time.perf_counter()
+        self.matches = self.catalog.complete(self.text.get(), self.max_results)
+        logger.debug("autocomplete %r: %d matches in %.2f ms", self.text.get(), len(self.matches), (time.perf_counter() - started) * 1000)
+        if not self.matches:
+            self.hide()
+            return
 
-        if not row:
-            return False
-        
-        stock, go_down = row
+        if self.popup is None:
+            self.popup = tk.Toplevel(self)
+            self.popup.overrideredirect(True)
+            self.listbox = tk.Listbox(self.popup, exportselection=False, activestyle="none")
+            scrollbar = ttk.Scrollbar(self.popup, orient="vertical", command=self.listbox.yview)
+            self.listbox.configure(yscrollcommand=scrollbar.set)
+            scrollbar.pack(side="right", fill="y")
+            self.listbox.pack(side="left", fill="both", expand=True)
+            self.listbox.bind("<ButtonRelease-1>", self._on_click)
+
+        self.listbox.delete(0, tk.END)
+        self.listbox.insert(tk.END, *self.matches)
+        self.listbox.configure(height=min(len(self.matches), self.visible_rows))
+        self.popup.geometry(f"{self.winfo_width()}x{self.listbox.winfo_reqheight()}+{self.winfo_rootx()}+{self.winfo_rooty() + self.winfo_height()}")
+        self.popup.deiconify()
+        self.popup.lift()
+
+    def hide(self):
+        if self.popup is not None:
+            self.popup.withdraw()
+
+    def is_shown(self):
+        return self.popup is not None and self.popup.winfo_viewable()
+
+    def _hide_unless_focused(self):
+        if self.focus_get() not in (self, self.listbox):
+            self.hide()
+
+    def _move(self, step):
+        if not self.is_shown():
+            self.show_matches()
+            return "break"
+        selection = self.listbox.curselection()
+        index = min(max((selection[0] + step) if selection else 0, 0), len(self.matches) - 1)
+        self.listbox.selection_clear(0, tk.END)
+        self.listbox.selection_set(index)
+        self.listbox.see(index)
+        return "break"
+
+    def _on_return(self, event):
+        if not self.is_shown():
+            return None
+        selection = self.listbox.curselection()
+        self._pick(self.matches[selection[0] if selection else 0])
+        return "break"
+
+    def _on_click(self, event):
+        index = self.listbox.nearest(event.y)
+        if 0 <= index < len(self.matches):
+            self._pick(self.matches[index])
+        self.focus_set()
+
+    def _pick(self, name):
+        self.set(name)
+        self.event_generate("<<ProductSelected>>")
+
+class VirtualTreeview(ttk.Treeview):
+    def __init__(self, parent, page_size=200, max_cached_pages=16, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.page_size = page_size
+        self.max_cached_pages = max_cached_pages
+        self.count_rows = lambda: 0
+        self.fetch_rows = lambda offset, limit: []
+        self.format_row = list
+        self.row_key = None
+        self.descending = False
+        self.pages = OrderedDict()
+        self.anchors = {}
+        self.total_rows = 0
+        self.first_row = 0
+        self.visible_rows = 20
+        self.row_height = 20
+        self.header_height = 25
+        self.scrollbar = None
+
+        self.bind("<Configure>", self._on_configure)
+        self.bind("<MouseWheel>", self._on_mousewheel)
+        self.bind("<Button-4>", lambda e: self._scroll_by(-3))
+        self.bind("<Button-5>", lambda e: self._scroll_by(3))
+        self.bind("<Up>", self._on_key_up)
+        self.bind("<Down>", self._on_key_down)
+        self.bind("<Prior>", lambda e: self._scroll_by(-self.visible_rows))
+        self.bind("<Next>", lambda e: self._scroll_by(self.visible_rows))
+
+    def set_source(self, count_rows, fetch_rows, format_row=list, keep_position=False, row_key=None, descending=False):
+        self.count_rows = count_rows
+        self.fetch_rows = fetch_rows
+        self.format_row = format_row
+        self.row_key = row_key
+        self.descending = descending
+        if not keep_position:
+            self.first_row = 0
+        self.reload()
+
+    def set_scrollbar(self, scrollbar):
+        self.scrollbar = scrollbar
+        scrollbar.configure(command=self.yview)
+
+    def reload(self):
+        self.pages.clear()
+        self.anchors.clear()
+        self.total_rows = self.count_rows()
+        self._render()
+
+    def patch_rows(self, rows, sort_key=None):
+        locations = {}
+        for page in self.pages.values():
+            for index, row in enumerate(page):
+                locations[row[0]] = (page, index)
+
+        for row in rows:
+            location = locations.get(row[0])
+            if location is None:
+                return False
+            page, index = location
+            if sort_key and sort_key(page[index]) != sort_key(row):
+                return False
+
+        for row in rows:
+            page, index = locations[row[0]]
+            page[index] = row
+            iid = str(row[0])
+            if self.exists(iid):
+                self.item(iid, values=self.format_row(row))
+        return True
 
-        if go_down < amount:
+    def merge_rows(self, rows, removed_ids=(), inserted_ids=()):
+        if not self.row_key:
             return False
-        
-        new_stock = stock + amount
-        new_go_down = go_down - amount
-
-        self.cursor.execute("UPDATE products SET stock_quantity = ?, go_down_quantity = ? WHERE id = ?", (new_stock, new_go_down, product_id))
-        self.conn.commit()
-
+        cached = {row[0]: row for page in self.pages.values() for row in page}
+        removed, added = [], []
+        for row_id in removed_ids:
+            if row_id not in cached:
+                return False
+            removed.append(self.row_key(cached[row_id]))
+        for row in rows:
+            key = self.row_key(row)
+            if row[0] in inserted_ids:
+                added.append(key)
+            elif row[0] not in cached:
+                return False
+            elif self.row_key(cached[row[0]]) != key:
+                removed.append(self.row_key(cached[row[0]]))
+                added.append(key)
+
+        if not removed and not added:
+            return self.patch_rows(rows)
+
+        anchors = {}
+        for count, key in self.anchors.items():
+            count += sum(1 for other in added if self._at_or_before(other, key))
+            count -= sum(1 for other in removed if self._at_or_before(other, key))
+            anchors[count] = key
+        self.anchors = anchors
+        self.total_rows += len(added) - len(removed)
+        self.pages.clear()
+        self._render()
         return True
 
-    def update_product_stock(self, product_id, quantity_change, go_down):
+    def _at_or_before(self, key, other):
+        return key >= other if self.descending else key <= other
+
+    def yview(self, *args):
+        if not args:
+            return self._fractions()
+        if args[0] == "moveto":
+            self.scroll_to(int(float(args[1]) * self.total_rows))
+        elif args[0] == "scroll":
+            amount = int(args[1])
+            if args[2] == "pages":
+                amount *= self.visible_rows
+            self._scroll_by(amount)
+
+    def scroll_to(self, row_index):
+        row_index = max(0, min(row_index, self.total_rows - self.visible_rows))
+        if row_index != self.first_row:
+            self.first_row = row_index
+            self._render()
+
+    def _scroll_by(self, amount):
+        self.scroll_to(self.first_row + amount)
+        return "break"
+
+    def _fractions(self):
+        if not self.total_rows:
+            return 0.0, 1.0
+        first = self.first_row / self.total_rows
+        last = min(self.first_row + self.visible_rows, self.total_rows) / self.total_rows
+        return first, last
+
+    def _get_rows(self, start, count):
+        rows = []
+        end = min(start + count, self.total_rows)
+        index = start
+        while index < end:
+            page_number = index // self.page_size
+            page = self._get_page(page_number)
+            if not page:
+                break
+            page_start = page_number * self.page_size
+            rows.extend(page[index - page_start:end - page_start])
+            index = page_start + self.page_size
+        return rows
+
+    def _get_page(self, page_number):
+        if page_number in self.pages:
+            self.pages.move_to_end(page_number)
+            return self.pages[page_number]
+        start = page_number * self.page_size
+        if self.row_key:
+            count = max((count for count in self.anchors if count <= start), default=0)
+            page = self.fetch_rows(start - count, self.page_size, self.anchors.get(count))
+            if page:
+                self.anchors[start + len(page)] = self.row_key(page[-1])
+        else:
+            page = self.fetch_rows(start, self.page_size)
+        self.pages[page_number] = page
+        if len(self.pages) > self.max_cached_pages:
+            self.pages.popitem(last=False)
+        return page
+
+    def _render(self):
+        self.first_row = max(0, min(self.first_row, self.total_rows - self.visible_rows))
+        focused = self.focus()
+        selected = self.selection()
+
+        self.delete(*self.get_children())
+        for row in self._get_rows(self.first_row, self.visible_rows):
+            self.insert("", "end", iid=str(row[0]), values=self.format_row(row))
+
+        visible = set(self.get_children())
+        self.selection_set([iid for iid in selected if iid in visible])
+        if focused in visible:
+            self.focus(focused)
+        if self.scrollbar:
+            self.scrollbar.set(*self._fractions())
+
+    def _on_configure(self, event):
+        children = self.get_children()
+        if children:
+            bbox = self.bbox(children[0])
+            if bbox:
+                self.header_height, self.row_height = bbox[1], bbox[3]
+        visible_rows = max(1, (event.height - self.header_height) // self.row_height)
+        if visible_rows != self.visible_rows:
+            self.visible_rows = visible_rows
+            self._render()
+
+    def _on_mousewheel(self, event):
+        return self._scroll_by(-3 if event.delta > 0 else 3)
+
+    def _on_key_up(self, event):
+        children = self.get_children()
+        if children and self.focus() == children[0] and self.first_row > 0:
+            self._scroll_by(-1)
+            self._move_focus(self.get_children()[0])
+            return "break"
+
+    def _on_key_down(self, event):
+        children = self.get_children()
+        if children and self.focus() == children[-1] and self.first_row + self.visible_rows < self.total_rows:
+            self._scroll_by(1)
+            self._move_focus(self.get_children()[-1])
+            return "break"
+
+    def _move_focus(self, item_id):
+        self.focus(item_id)
+        self.selection_set(item_id)
+
+class QueryTask:
+    def __init__(self, method, args, on_done, on_error):
+        self.method = method
+        self.args = args
+        self.on_done = on_done
+        self.on_error = on_error
+        self.cancelled = threading.Event()
+        self.result = None
+        self.error = None
+
+class QueryWorker:
+    def __init__(self, widget, db_name, poll_ms=50, query_stats=None, readers=2):
+        self.widget = widget
+        self.db_name = db_name
+        self.query_stats = query_stats
+        self.poll_ms = poll_ms
+        self.tasks = queue.Queue()
+        self.finished = queue.Queue()
+        self.lock = threading.Lock()
+        self.running = {}
+        self.threads = [threading.Thread(target=self._run, daemon=True) for _ in range(readers)]
+        for thread in self.threads:
+            thread.start()
+        self.widget.after(self.poll_ms, self._poll)
+
+    def submit(self, method, *args, on_done, on_error=None):
+        task = QueryTask(method, args, on_done, on_error)
+        self.tasks.put(task)
+        return task
+
+    def cancel(self, task):
+        task.cancelled.set()
+        with self.lock:
+            reader = self.running.get(task)
+            if reader:
+                reader.conn.interrupt()
+
+    def stop(self):
+        for _ in self.threads:
+            self.tasks.put(None)
+
+    def _run(self):
+        reader = Database(self.db_name, read_only=True, query_stats=self.query_stats)
         try:
-            self.cursor.execute(f"UPDATE products SET {"go_down_quantity" if go_down else "stock_quantity"} = {"go_down_quantity" if go_down else "stock_quantity"} + ? WHERE id = ?",
-                                 (quantity_change, product_id))
-            self.conn.commit()
-            return True
-        except Exception as e:
-            messagebox.showerror("Stock Update Error", f"Failed to update stock: {e}")
-            return False
-
-    def record_sale(self, product_id, quantity, total_price, sale_date):
+            while True:
+                task = self.tasks.get()
+                if task is None:
+                    break
+                if task.cancelled.is_set():
+                    continue
+
+                with self.lock:
+                    self.running[task] = reader
+                started = time.perf_counter()
+                try:
+                    task.result = getattr(reader, task.method)(*task.args)
+                except Exception as e:
+                    task.error = e
+                finally:
+                    with self.lock:
+                        del self.running[task]
+                logger.debug("worker ran %s in %.1f ms%s", task.method, (time.perf_counter() - started) * 1000,
+                             " (cancelled)" if task.cancelled.is_set() else "")
+                self.finished.put(task)
+        finally:
+            reader.close()
+
+    def _poll(self):
+        while True:
+            try:
+                task = self.finished.get_nowait()
+            except queue.Empty:
+                break
+            if task.cancelled.is_set():
+                continue
+            if task.error is None:
+                task.on_done(task.result)
+            elif task.on_error:
+                task.on_error(task.error)
+            else:
+                logger.error("background %s failed: %s", task.method, task.error)
+        self.widget.after(self.poll_ms, self._poll)
+
+class IncrementalSearch:
+    PENDING = object()
+
+    def __init__(self, widget, name, search_rows, on_search, delay_ms=250, max_terms=32, max_rows=200000, max_results=5000, worker=None):
+        self.widget = widget
+        self.name = name
+        self.search_rows = search_rows
+        self.on_search = on_search
+        self.worker = worker
+        self.running_task = None
+        self.running_term = None
+        self.fetched_term = None
+        self.delay_ms = delay_ms
+        self.max_terms = max_terms
+        self.max_rows = max_rows
+        self.max_results = max_results
+        self.results = OrderedDict()
+        self.cached_rows = 0
+        self.pending_job = None
+        self.stats = {"hits": 0, "narrowed": 0, "misses": 0}
+
+    def schedule(self, event=None):
+        if self.pending_job:
+            self.widget.after_cancel(self.pending_job)
+        self.pending_job = self.widget.after(self.delay_ms, self._fire)
+
+    def _fire(self):
+        self.pending_job = None
+        self.on_search()
+
+    def lookup(self, term):
+        if not term:
+            return None
+        started = time.perf_counter()
+
+        if term in self.results:
+            self.results.move_to_end(term)
+            rows = self.results[term]
+            outcome = "misses" if term == self.fetched_term else "hits"
+            self.fetched_term = None
+        else:
+            prefix = self._longest_cached_prefix(term)
+            if prefix:
+                rows = [row for row in self.results[prefix] if any(term in field for field in row[1])]
+                outcome = "narrowed"
+            elif self.worker:
+                self._search_in_background(term)
+                return self.PENDING
+            else:
+                rows = self._complete(self.search_rows(term, self.max_results + 1))
+                outcome = "misses"
+            self._store(term, rows)
+
+        self.stats[outcome] += 1
+        if rows is None:
+            logger.debug("%s search %r: %s, more than %d rows, paging from the database in %.1f ms",
+                         self.name, term, outcome, self.max_results, (time.perf_counter() - started) * 1000)
+            return None
+        logger.debug("%s search %r: %s, %d rows in %.1f ms (cache hit rate %.0f%%)",
+                     self.name, term, outcome, len(rows), (time.perf_counter() - started) * 1000, self.hit_rate() * 100)
+        return [row[0] for row in rows]
+
+    def _complete(self, rows):
+        return rows if len(rows) <= self.max_results else None
+
+    def _search_in_background(self, term):
+        if self.running_term == term:
+            return
+        self.cancel()
+        self.running_term = term
+        self.running_task = self.worker.submit(f"search_{self.name}", term, True, self.max_results + 1,
+                                               on_done=lambda rows: self._finish_search(term, rows),
+                                               on_error=self._fail_search)
+        self.widget.config(cursor="watch")
+
+    def _finish_search(self, term, rows):
+        self.running_task = self.running_term = None
+        self.widget.config(cursor="")
+        self._store(term, self._complete(rows))
+        self.fetched_term = term
+        logger.debug("%s search %r: %d rows from the background worker", self.name, term, len(rows))
+        self.on_search()
+
+    def _fail_search(self, error):
+        self.running_task = self.running_term = None
+        self.widget.config(cursor="")
+        messagebox.showerror("Search Error", f"Search failed: {error}")
+
+    def cancel(self):
+        if self.running_task:
+            self.worker.cancel(self.running_task)
+            self.running_task = self.running_term = None
+            self.widget.config(cursor="")
+
+    def hit_rate(self):
+        lookups = sum(self.stats.values())
+        if not lookups:
+            return 0.0
+        return (self.stats["hits"] + self.stats["narrowed"]) / lookups
+
+    def invalidate(self):
+        self.cancel()
+        self.results.clear()
+        self.cached_rows = 0
+
+    def _longest_cached_prefix(self, term):
+        for length in range(len(term) - 1, 0, -1):
+            if self.results.get(term[:length]) is not None:
+                return term[:length]
+        return None
+
+    def _store(self, term, rows):
+        self.results[term] = rows
+        self.cached_rows += len(rows or ())
+        while len(self.results) > 1 and (len(self.results) > self.max_terms or self.cached_rows > self.max_rows):
+            _, evicted = self.results.popitem(last=False)
+            self.cached_rows -= len(evicted or ())
+
+class ImportJob:
+    COLUMN_ALIASES = {
+        "products": {"product": "name", "product_name": "name"},
+        "sales": {"product": "product_name", "name": "product_name"},
+        "purchases": {"product": "product_name", "name": "product_name", "supplier": "supplier_name"},
+    }
+
+    def __init__(self, kind, path, chunk_size=1000, max_pending_chunks=4):
+        self.kind = kind
+        self.path = path
+        self.chunk_size = chunk_size
+        self.chunks = queue.Queue(maxsize=max_pending_chunks)
+        self.cancelled = threading.Event()
+        self.total_rows = None
+        self.rows_read = 0
+        self.imported = 0
+        self.rejected = 0
+        self.reject_path = os.path.splitext(path)[0] + "_rejects.csv"
+        self.reject_file = None
+        self.reject_writer = None
+        self.header = []
+        self.thread = threading.Thread(target=self._read_and_validate, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def _read_and_validate(self):
         try:
-            self.cursor.execute("INSERT INTO sales (product_id, quantity, total_price, sale_date) VALUES (?, ?, ?, ?)",
-                                 (product_id, quantity, total_price, sale_date))
-            self.conn.commit()
-            self.update_product_stock(product_id, -quantity, go_down=False)
-            return True
+            chunk = []
+            for line_number, row in self._iter_rows():
+                if self.cancelled.is_set():
+                    break
+                try:
+                    chunk.append((line_number, row, self._validate(row), None))
+                except ValueError as e:
+                    chunk.append((line_number, row, None, str(e)))
+                self.rows_read += 1
+                if len(chunk) >= self.chunk_size:
+                    self._put(("chunk", chunk))
+                    chunk = []
+            if chunk:
+                self._put(("chunk", chunk))
+            self._put(("done", None))
         except Exception as e:
-            messagebox.showerror("Error", f"Failed to record sale: {e}")
-            return False
-
-    def get_sales_report(self):
-        self.cursor.execute("""
-            SELECT s.id, p.name, s.quantity, s.total_price, s.sale_date
-            FROM sales s
-            JOIN products p ON s.product_id = p.id
-            ORDER BY s.sale_date DESC
-        """)
-        return self.cursor.fetchall()
+            self._put(("error", e))
 
-    def get_sale_by_id(self, sale_id):
-        self.cursor.execute("SELECT id, product_id, quantity, total_price, sale_date FROM sales WHERE id = ?", (sale_id,))
-        return self.cursor.fetchone()
+    def _put(self, item):
+        while not self.cancelled.is_set():
+            try:
+                self.chunks.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
 
-    def update_sale(self, sale_id, product_id, new_quantity, new_total_price, new_sale_date, previous_quantity):
+    def _iter_rows(self):
+        if self.path.lower().endswith((".xlsx", ".xlsm")):
+            yield from self._iter_xlsx_rows()
+        else:
+            yield from self._iter_csv_rows()
+
+    def _iter_csv_rows(self):
+        encoding = "utf-8-sig"
+        decoder = codecs.getincrementaldecoder(encoding)()
+        lines = 0
+        with open(self.path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                lines += block.count(b"\n")
+                if decoder:
+                    try:
+                        decoder.decode(block)
+                    except UnicodeDecodeError:
+                        decoder = None
+            if decoder:
+                try:
+                    decoder.decode(b"", final=True)
+                except UnicodeDecodeError:
+                    decoder = None
+        self.total_rows = max(0, lines - 1)
+        if decoder is None:
+            encoding = "cp1252"
+            logger.info("%s is not UTF-8, reading it as cp1252", self.path)
+        with open(self.path, newline="", encoding=encoding, errors="replace") as f:
+            reader = csv.reader(f)
+            self.header = next(reader, [])
+            keys = [self._normalize_column(column) for column in self.header]
+            for line_number, values in enumerate(reader, start=2):
+                if any(values):
+                    yield line_number, dict(zip(keys, values))
+
+    def _iter_xlsx_rows(self):
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(self.path, read_only=True, data_only=True)
         try:
-            stock_adjustment = new_quantity - previous_quantity
-
-            self.cursor.execute("UPDATE sales SET product_id=?, quantity=?, total_price=?, sale_date=? WHERE id=?",
-                                 (product_id, new_quantity, new_total_price, new_sale_date, sale_id))
-            self.conn.commit()
-
-            if stock_adjustment != 0:
-                self.update_product_stock(product_id, -stock_adjustment, go_down=False)
-            return True
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to update sale: {e}")
-            return False
-
-    def delete_sale(self, sale_id):
+            sheet = workbook.active
+            self.total_rows = max(0, (sheet.max_row or 1) - 1) or None
+            rows = sheet.iter_rows(values_only=True)
+            self.header = [str(value) if value is not None else "" for value in next(rows, ())]
+            keys = [self._normalize_column(column) for column in self.header]
+            for line_number, values in enumerate(rows, start=2):
+                if any(value not in (None, "") for value in values):
+                    yield line_number, dict(zip(keys, values))
+        finally:
+            workbook.close()
+
+    def _normalize_column(self, column):
+        key = str(column).strip().lower().replace(" ", "_")
+        return self.COLUMN_ALIASES[self.kind].get(key, key)
+
+    def _validate(self, row):
+        if self.kind == "products":
+            return {
+                "name": self._text(row, "name", required=True),
+                "category": self._text(row, "category", required=True),
+                "purchase_price": self._number(row, "purchase_price", required=True),
+                "selling_price": self._number(row, "selling_price", required=True),
+                "stock_quantity": self._number(row, "stock_quantity", default=0.0),
+                "go_down_quantity": self._number(row, "go_down_quantity", default=0.0),
+                "expiry_date": self._date(row, "expiry_date"),
+            }
+        if self.kind == "purchases":
+            validated = {
+                "product_name": self._text(row, "product_name", required=True),
+                "quantity": self._number(row, "quantity", required=True),
+                "cost_price": self._number(row, "cost_price", required=True),
+                "purchase_date": self._date(row, "purchase_date", fallback="date", required=True),
+                "supplier_name": self._text(row, "supplier_name"),
+            }
+        else:
+            validated = {
+                "product_name": self._text(row, "product_name", required=True),
+                "quantity": self._number(row, "quantity", required=True),
+                "total_price": self._number(row, "total_price"),
+                "sale_date": self._date(row, "sale_date", fallback="date", required=True),
+            }
+        if validated["quantity"] <= 0:
+            raise ValueError("Quantity must be a positive number.")
+        return validated
+
+    def _text(self, row, key, required=False):
+        value = row.get(key)
+        value = str(value).strip() if value is not None else ""
+        if required and not value:
+            raise ValueError(f"{key} is required.")
+        return value or None
+
+    def _number(self, row, key, required=False, default=None):
+        value = row.get(key)
+        if value is None or str(value).strip() == "":
+            if required:
+                raise ValueError(f"{key} is required.")
+            return default
         try:
-            self.cursor.execute("SELECT product_id, quantity FROM sales WHERE id = ?", (sale_id,))
-            deleted_sale_data = self.cursor.fetchone()
-
-            if deleted_sale_data:
-                product_id, quantity = deleted_sale_data
-                self.cursor.execute("DELETE FROM sales WHERE id = ?", (sale_id,))
-                self.conn.commit()
-                self.update_product_stock(product_id, quantity, go_down=False)
-                return True
-            return False
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to delete sale: {e}")
-            return False
-
-    def record_purchase(self, product_id, quantity, cost_price, purchase_date, supplier_name):
+            number = float(str(value).replace(",", "")) if not isinstance(value, (int, float)) else float(value)
+        except ValueError:
+            raise ValueError(f"{key} must be a number.")
+        if number < 0:
+            raise ValueError(f"{key} must be non-negative.")
+        return number
+
+    def _date(self, row, key, fallback=None, required=False):
+        value = row.get(key)
+        if (value is None or value == "") and fallback:
+            value = row.get(fallback)
+        if value is None or str(value).strip() == "":
+            if required:
+                raise ValueError(f"{key} is required.")
+            return None
+        if isinstance(value, (datetime, date)):
+            return value.strftime("%Y-%m-%d")
         try:
-            self.cursor.execute("INSERT INTO purchases (product_id, quantity, cost_price, purchase_date, supplier_name) VALUES (?, ?, ?, ?, ?)",
-                                 (product_id, quantity, cost_price, purchase_date, supplier_name))
-            self.conn.commit()
-            self.update_product_stock(product_id, quantity, go_down=True)
-            return True
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to record purchase: {e}")
-            return False
+            return datetime.strptime(str(value).strip()[:10], "%Y-%m-%d").strftime("%Y-%m-%d")
+        except ValueError:
+            raise ValueError(f"{key} must be a date in YYYY-MM-DD format.")
+
+    def write_chunk(self, db, chunk):
+        valid = []
+        sources = {}
+        for line_number, row, validated, error in chunk:
+            if error:
+                self._reject(line_number, row, error)
+            else:
+                valid.append(validated)
+                sources[id(validated)] = (line_number, row)
+
+        if valid:
+            import_batch = getattr(db, f"import_{self.kind}_batch")
+            imported, rejects = import_batch(valid)
+            self.imported += imported
+            for validated, error in rejects:
+                self._reject(*sources[id(validated)], error)
+
+    def _reject(self, line_number, source, error):
+        if self.reject_writer is None:
+            self.reject_file = open(self.reject_path, "w", newline="", encoding="utf-8")
+            self.reject_writer = csv.writer(self.reject_file)
+            self.reject_writer.writerow(["line", "error"] + self.header)
+        keys = [self._normalize_column(column) for column in self.header]
+        self.reject_writer.writerow([line_number, error] + [source.get(key, "") for key in keys])
+        self.rejected += 1
 
-    def get_purchases_report(self):
-        self.cursor.execute("""
-            SELECT pu.id, p.name, pu.quantity, pu.cost_price, pu.purchase_date, pu.supplier_name
-            FROM purchases pu
-            JOIN products p ON pu.product_id = p.id
-            ORDER BY pu.purchase_date DESC
-        """)
-        return self.cursor.fetchall()
+    def close(self):
+        self.cancel()
+        if self.reject_file:
+            self.reject_file.close()
+            self.reject_file = None
+
+class ImportDialog(tk.Toplevel):
+    def __init__(self, controller, kind, path):
+        super().__init__(controller)
+        self.controller = controller
+        self.title(f"Importing {kind.capitalize()}")
+        self.resizable(False, False)
+        self.transient(controller)
+        self.grab_set()
+        self.protocol("WM_DELETE_WINDOW", self.cancel)
 
-    def get_purchase_by_id(self, purchase_id):
-        self.cursor.execute("SELECT id, product_id, quantity, cost_price, purchase_date, supplier_name FROM purchases WHERE id = ?", (purchase_id,))
-        return self.cursor.fetchone()
+        self.job = ImportJob(kind, path)
 
-    def update_purchase(self, purchase_id, product_id, new_quantity, new_cost_price, new_purchase_date, new_supplier_name, previous_quantity):
-        try:
-            stock_adjustment = new_quantity - previous_quantity
-
-            if stock_adjustment < 0:
-                current_product_data = self.get_product_by_id(product_id)
-                if current_product_data:
-                    current_stock = current_product_data[6]
-                    if current_stock < abs(stock_adjustment):
-                        messagebox.showerror("Stock Error", f"Cannot reduce purchase quantity. Not enough stock to deduct {abs(stock_adjustment):.2f} units. Current go down stock: {current_stock:.2f}")
-                        return False
-                else:
-                    messagebox.showerror("Error", "Product not found for stock check.")
-                    return False
-
-            self.cursor.execute("UPDATE purchases SET product_id=?, quantity=?, cost_price=?, purchase_date=?, supplier_name=? WHERE id=?",
-                                 (product_id, new_quantity, new_cost_price, new_purchase_date, new_supplier_name, purchase_id))
-            self.conn.commit()
-
-            if stock_adjustment != 0:
-                self.update_product_stock(product_id, stock_adjustment, go_down=True)
-            return True
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to update purchase: {e}")
-            return False
+        self.status_label = tk.Label(self, text=f"Reading {os.path.basename(path)}...", anchor="w", width=50)
+        self.status_label.pack(padx=10, pady=(10, 5), fill="x")
 
-    def delete_purchase(self, purchase_id):
-        try:
-            self.cursor.execute("SELECT product_id, quantity FROM purchases WHERE id = ?", (purchase_id,))
-            deleted_purchase_data = self.cursor.fetchone()
-
-            if deleted_purchase_data:
-                product_id, quantity = deleted_purchase_data
-                current_product_data = self.get_product_by_id(product_id)
-                if current_product_data:
-                    current_stock = current_product_data[6]
-                    if current_stock < quantity:
-                        messagebox.showerror("Stock Error", f"Cannot delete this purchase. Deleting would make stock negative. Current go down stock: {current_stock:.2f}, Purchase quantity: {quantity:.2f}")
-                        return False
-                else:
-                    messagebox.showerror("Error", "Product not found for stock check.")
-                    return False
-
-                self.cursor.execute("DELETE FROM purchases WHERE id = ?", (purchase_id,))
-                self.conn.commit()
-                self.update_product_stock(product_id, -quantity, go_down=True)
-                return True
-            return False
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to delete purchase: {e}")
-            return False
+        self.progress = ttk.Progressbar(self, orient="horizontal", length=400, mode="determinate")
+        self.progress.pack(padx=10, pady=5)
 
-    def calculate_monthly_revenue(self, month_str):
-        self.cursor.execute("SELECT SUM(total_price) FROM sales WHERE SUBSTR(sale_date, 1, 7) = ?", (month_str,))
-        return self.cursor.fetchone()[0] or 0.0
+        self.cancel_button = ttk.Button(self, text="Cancel", command=self.cancel)
+        self.cancel_button.pack(pady=(5, 10))
 
-    def calculate_monthly_expenses(self, month_str):
-        self.cursor.execute("SELECT SUM(quantity * cost_price) FROM purchases WHERE SUBSTR(purchase_date, 1, 7) = ?", (month_str,))
-        return self.cursor.fetchone()[0] or 0.0
+        self.job.start()
+        self.after(50, self.poll)
 
-    def calculate_product_profit(self, product_id):
-        self.cursor.execute("SELECT SUM(total_price) FROM sales WHERE product_id = ?", (product_id,))
-        total_revenue = self.cursor.fetchone()[0] or 0.0
+    def poll(self):
+        try:
+            kind, payload = self.job.chunks.get_nowait()
+        except queue.Empty:
+            self.after(50, self.poll)
+            return
 
-        self.cursor.execute("SELECT SUM(cost_price * quantity) FROM purchases WHERE product_id = ?", (product_id,))
-        total_expenses = self.cursor.fetchone()[0] or 0.0
-        
-        profit = total_revenue - total_expenses
-        return total_revenue, total_expenses, profit
-        
-    def get_monthly_sales_by_product(self, month_str):
-        self.cursor.execute("""
-            SELECT p.name, SUM(s.quantity)
-            FROM sales s
-            JOIN products p ON s.product_id = p.id
-            WHERE SUBSTR(s.sale_date, 1, 7) = ?
-            GROUP BY p.name
-            ORDER BY p.name ASC
-        """, (month_str,))
-        return self.cursor.fetchall()
-        
-    def get_available_report_months(self):
-        self.cursor.execute("SELECT DISTINCT SUBSTR(sale_date, 1, 7) FROM sales ORDER BY SUBSTR(sale_date, 1, 7) DESC")
-        return [row[0] for row in self.cursor.fetchall()]
+        if kind == "chunk":
+            try:
+                self.job.write_chunk(self.controller.db, payload)
+            except Exception as e:
+                self.finish(f"Import stopped after an error: {e}")
+                return
+            self.update_progress()
+            self.after(1, self.poll)
+        elif kind == "error":
+            self.finish(f"Import stopped after an error: {payload}")
+        else:
+            self.finish("Import complete.")
 
-    def save_or_update_report(self, month, total_revenue, total_expenses, profit):
+    def update_progress(self):
+        job = self.job
+        if job.total_rows:
+            self.progress.config(mode="determinate", maximum=job.total_rows, value=job.rows_read)
+        else:
+            self.progress.config(mode="indeterminate")
+            self.progress.step(5)
+        self.status_label.config(text=f"Read {job.rows_read:,} rows: {job.imported:,} imported, {job.rejected:,} rejected")
+
+    def cancel(self):
+        self.finish("Import cancelled.")
+
+    def finish(self, status):
+        job = self.job
+        job.close()
+        self.grab_release()
+        self.destroy()
+
+        message = f"{status}\n\nImported: {job.imported:,}\nRejected: {job.rejected:,}"
+        if job.rejected:
+            message += f"\n\nRejected rows were written to:\n{job.reject_path}"
+        messagebox.showinfo("Import", message)
+
+class ExportJob:
+    EXCEL_MAX_ROWS = 1048576
+
+    def __init__(self, path, header, rows=None, db_name=None, query=None, params=(), batch_size=1000):
+        self.path = path
+        self.header = header
+        self.rows = rows
+        self.db_name = db_name
+        self.query = query
+        self.params = params
+        self.batch_size = batch_size
+        self.cancelled = threading.Event()
+        self.total_rows = len(rows) if rows is not None else None
+        self.rows_written = 0
+        self.done = False
+        self.error = None
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def _run(self):
         try:
-            self.cursor.execute("""
-                INSERT INTO reports (month, total_revenue, total_expenses, profit)
-                VALUES (?, ?, ?, ?)
-                ON CONFLICT(month) DO UPDATE SET
-                    total_revenue = EXCLUDED.total_revenue,
-                    total_expenses = EXCLUDED.total_expenses,
-                    profit = EXCLUDED.profit
-            """, (month, total_revenue, total_expenses, profit))
-            self.conn.commit()
-            return True
+            if self.rows is not None:
+                self._write(self._batches(self.rows))
+            else:
+                conn = sqlite3.connect(self.db_name, timeout=Database.BUSY_TIMEOUT_MS / 1000)
+                try:
+                    cursor = conn.cursor()
+                    cursor.execute(f"SELECT COUNT(*) FROM ({self.query})", self.params)
+                    self.total_rows = cursor.fetchone()[0]
+                    cursor.execute(self.query, self.params)
+                    self._write(iter(lambda: cursor.fetchmany(self.batch_size), []))
+                finally:
+                    conn.close()
+            if self.cancelled.is_set() and os.path.exists(self.path):
+                os.remove(self.path)
         except Exception as e:
-            messagebox.showerror("Report Error", f"Failed to save/update report: {e}")
-            return False
+            self.error = e
+        finally:
+            self.done = True
 
-    def get_stored_reports(self):
-        self.cursor.execute("SELECT id, month, total_revenue, total_expenses, profit FROM reports ORDER BY month DESC")
-        return self.cursor.fetchall()
+    def _batches(self, rows):
+        for start in range(0, len(rows), self.batch_size):
+            yield rows[start:start + self.batch_size]
 
-    def delete_stored_report(self, report_id):
-        try:
-            self.cursor.execute("DELETE FROM reports WHERE id = ?", (report_id,))
-            self.conn.commit()
-            return True
-        except Exception as e:
-            messagebox.showerror("Report Error", f"Failed to delete report: {e}")
-            return False
-        
-    def get_sales_report_by_date_range(self, start_date, end_date):
-        self.cursor.execute("""
-            SELECT 
-                p.name, 
-                SUM(s.total_price) AS total_revenue, 
-                SUM(s.quantity) AS total_quantity_sold
-            FROM sales s
-            JOIN products p ON s.product_id = p.id
-            WHERE s.sale_date BETWEEN ? AND ?
-            GROUP BY p.name
-            ORDER BY total_revenue DESC
-        """, (start_date, end_date))
-        return self.cursor.fetchall()
+    def _write(self, batches):
+        if self.path.lower().endswith(".csv"):
+            self._write_csv(batches)
+        else:
+            self._write_xlsx(batches)
+
+    def _write_csv(self, batches):
+        with open(self.path, "w", newline="", encoding="utf-8-sig") as f:
+            writer = csv.writer(f)
+            writer.writerow(self.header)
+            for batch in batches:
+                if self.cancelled.is_set():
+                    return
+                writer.writerows(batch)
+                self.rows_written += len(batch)
+
+    def _write_xlsx(self, batches):
+        from openpyxl import Workbook
+
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet()
+        sheet.append(self.header)
+        sheet_rows = 1
+        for batch in batches:
+            if self.cancelled.is_set():
+                break
+            for row in batch:
+                if sheet_rows >= self.EXCEL_MAX_ROWS:
+                    sheet = workbook.create_sheet()
+                    sheet.append(self.header)
+                    sheet_rows = 1
+                sheet.append(row)
+                sheet_rows += 1
+            self.rows_written += len(batch)
+        workbook.save(self.path)
+
+class ExportDialog(tk.Toplevel):
+    def __init__(self, controller, title, job):
+        super().__init__(controller)
+        self.title(title)
+        self.resizable(False, False)
+        self.transient(controller)
+        self.protocol("WM_DELETE_WINDOW", self.cancel)
+
+        self.job = job
+
+        self.status_label = tk.Label(self, text=f"Exporting to {os.path.basename(job.path)}...", anchor="w", width=50)
+        self.status_label.pack(padx=10, pady=(10, 5), fill="x")
+
+        self.progress = ttk.Progressbar(self, orient="horizontal", length=400, mode="determinate")
+        self.progress.pack(padx=10, pady=5)
+
+        self.cancel_button = ttk.Button(self, text="Cancel", command=self.cancel)
+        self.cancel_button.pack(pady=(5, 10))
+
+        self.job.start()
+        self.after(100, self.poll)
+
+    def poll(self):
+        job = self.job
+        if job.total_rows:
+            self.progress.config(maximum=job.total_rows, value=job.rows_written)
+        self.status_label.config(text=f"Exported {job.rows_written:,} of {job.total_rows or 0:,} rows")
+
+        if not job.done:
+            self.after(100, self.poll)
+            return
 
-    def close(self):
-        self.conn.close()
+        self.destroy()
+        if job.error:
+            messagebox.showerror("Export Error", f"An error occurred during export: {job.error}")
+        elif job.cancelled.is_set():
+            messagebox.showinfo("Export Cancelled", "The export was cancelled.")
+        else:
+            messagebox.showinfo("Export Successful", f"{job.rows_written:,} rows successfully exported to:\n{os.path.basename(job.path)}")
+
+    def cancel(self):
+        self.job.cancel()
+        self.cancel_button.config(state=tk.DISABLED)
 
 class InventoryApp(tk.Tk):
-    def __init__(self):
+    EXTERNAL_CHANGE_POLL_MS = 1000
+
+    def __init__(self, query_stats=None):
         super().__init__()
         self.title("Inventory Management System")
         self.geometry("1000x700")
-        self.db = Database()
+        self.startup_exit_code = 0
+        startup_timer.mark("window")
+        self.db = Database(query_stats=query_stats)
+        self.db.subscribe(self.on_db_change)
+        self.worker = QueryWorker(self, db_name=self.db.db_name, query_stats=query_stats)
+        self.current_page = None
+        self.pending_changes = {}
+        self.flush_scheduled = False
+        startup_timer.mark("database")
 
         self.create_widgets()
         self.show_frame("products")
+        startup_timer.mark("products frame")
+        self.after(self.EXTERNAL_CHANGE_POLL_MS, self.poll_external_changes)
 
     def create_widgets(self):
         nav_frame = tk.Frame(self, bg="#333", height=50)
@@ -407,31 +995,130 @@ class InventoryApp(tk.Tk):
         btn_reports = ttk.Button(nav_frame, text="Reports", command=lambda: self.show_frame("reports"))
         btn_reports.pack(side="left", padx=10, pady=5)
 
+        menubar = tk.Menu(self)
+        file_menu = tk.Menu(menubar, tearoff=0)
+        file_menu.add_command(label="Import Products...", command=lambda: self.import_file("products"))
+        file_menu.add_command(label="Import Purchases...", command=lambda: self.import_file("purchases"))
+        file_menu.add_command(label="Import Sales...", command=lambda: self.import_file("sales"))
+        file_menu.add_separator()
+        file_menu.add_command(label="Export Products...", command=lambda: self.export_table("products"))
+        file_menu.add_command(label="Export Purchases...", command=lambda: self.export_table("purchases"))
+        file_menu.add_command(label="Export Sales...", command=lambda: self.export_table("sales"))
+        menubar.add_cascade(label="File", menu=file_menu)
+        self.config(menu=menubar)
+
         self.container = tk.Frame(self)
         self.container.pack(fill="both", expand=True, padx=10, pady=10)
 
-        self.frames = {}
+        self.frame_classes = {}
         for F in (ProductsFrame, SalesFrame, PurchasesFrame, ReportsFrame):
             page_name = F.__name__.replace("Frame", "").lower()
-            frame = F(parent=self.container, controller=self)
-            self.frames[page_name] = frame
-            frame.grid(row=0, column=0, sticky="nsew")
+            self.frame_classes[page_name] = F
+        self.frames = {}
 
         self.container.grid_rowconfigure(0, weight=1)
         self.container.grid_columnconfigure(0, weight=1)
 
+    def import_file(self, kind):
+        filepath = filedialog.askopenfilename(
+            filetypes=[("Spreadsheets", "*.csv *.xlsx"), ("CSV files", "*.csv"), ("Excel files", "*.xlsx"), ("All files", "*.*")],
+            title=f"Import {kind.capitalize()}"
+        )
+        if filepath:
+            ImportDialog(self, kind, filepath)
+
+    def export_table(self, kind):
+        filepath = filedialog.asksaveasfilename(
+            defaultextension=".xlsx",
+            filetypes=[("Excel files", "*.xlsx"), ("CSV files", "*.csv"), ("All files", "*.*")],
+            title=f"Export {kind.capitalize()}"
+        )
+        if filepath:
+            header, query = Database.EXPORT_QUERIES[kind]
+            ExportDialog(self, f"Exporting {kind.capitalize()}", ExportJob(filepath, header, db_name=self.db.db_name, query=query))
+
+    def get_frame(self, page_name):
+        frame = self.frames.get(page_name)
+        if frame is None:
+            started = time.perf_counter()
+            frame = self.frame_classes[page_name](parent=self.container, controller=self)
+            frame.grid(row=0, column=0, sticky="nsew")
+            self.frames[page_name] = frame
+            logger.debug("built %s frame in %.1f ms", page_name, (time.perf_counter() - started) * 1000)
+        return frame
+
+    def track(self, action):
+        if self.db.query_stats is None:
+            return nullcontext()
+        return self.db.query_stats.action(action)
+
     def show_frame(self, page_name):
-        frame = self.frames[page_name]
-        frame.tkraise()
-        if hasattr(frame, 'refresh_data'):
-            frame.refresh_data()
+        with self.track(f"switch to {page_name.capitalize()} tab"):
+            is_new = page_name not in self.frames
+            frame = self.get_frame(page_name)
+            self.current_page = page_name
+            frame.tkraise()
+            if is_new:
+                frame.refresh_data()
+            else:
+                self.apply_pending_changes(page_name)
+
+    def on_db_change(self, changes):
+        for page_name, frame in self.frames.items():
+            for table, row_ids in changes.items():
+                if table in frame.watched_tables:
+                    Database.merge_change(self.pending_changes.setdefault(page_name, {}), table, row_ids)
+
+        if self.current_page in self.pending_changes and not self.flush_scheduled:
+            self.flush_scheduled = True
+            self.after_idle(self.flush_changes)
+
+    def poll_external_changes(self):
+        try:
+            self.db.check_external_changes()
+        except sqlite3.Error as e:
+            logger.error("could not check for changes from other terminals: %s", e)
+        self.after(self.EXTERNAL_CHANGE_POLL_MS, self.poll_external_changes)
+
+    def flush_changes(self):
+        self.flush_scheduled = False
+        self.apply_pending_changes(self.current_page)
+
+    def apply_pending_changes(self, page_name):
+        changes = self.pending_changes.pop(page_name, None)
+        if changes:
+            logger.debug("applying changes to %s frame: %s", page_name,
+                         ", ".join(f"{table} ({'all' if row_ids is None else len(row_ids)})" for table, row_ids in changes.items()))
+            with self.track(f"refresh {page_name.capitalize()} tab"):
+                self.frames[page_name].apply_changes(changes)
+
+    def report_startup(self, output=None, budget_ms=None):
+        self.update_idletasks()
+        startup_timer.mark("first paint")
+        report = startup_timer.report()
+        if budget_ms is not None:
+            report["budget_ms"] = budget_ms
+            report["within_budget"] = report["total_ms"] <= budget_ms
+        logger.info("startup took %.1f ms: %s", report["total_ms"],
+                    ", ".join(f"{p['phase']} {p['ms']:.1f} ms" for p in report["phases"]))
+
+        if output is None:
+            return
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        self.startup_exit_code = 0 if report.get("within_budget", True) else 1
+        self.destroy()
 
 class ProductsFrame(tk.Frame):
+    watched_tables = ("products",)
+    FUZZY_RESULTS = 200
+
     def __init__(self, parent, controller):
         super().__init__(parent)
         self.controller = controller
         self.edit_mode = False
         self.current_product_id = None
+        self.loaded_stock = (0.0, 0.0)
 
         self.canvas = tk.Canvas(self)
         self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self.canvas.yview)
@@ -521,9 +1208,11 @@ class ProductsFrame(tk.Frame):
         self.cancel_transfer_button = ttk.Button(transfer_button_frame, text="Cancel", command=self.cancel_transfer)
         self.cancel_transfer_button.pack(side="left", padx=5)
 
+        self.search = IncrementalSearch(self, "products", lambda term, limit: self.controller.db.search_products(term, with_text=True, limit=limit), self.filter_products,
+                                        worker=controller.worker)
         self.search_entry = tk.Entry(products_display_frame, width=50)
         self.search_entry.pack(pady=5, padx=5, fill="x")
-        self.search_entry.bind("<KeyRelease>", self.filter_products)
+        self.search_entry.bind("<KeyRelease>", self.search.schedule)
         self.search_entry.insert(0, "Search products...")
         self.search_entry.bind("<FocusIn>", self.clear_search_placeholder)
         self.search_entry.bind("<FocusOut>", self.restore_search_placeholder)
@@ -531,7 +1220,7 @@ class ProductsFrame(tk.Frame):
         tree_frame = tk.Frame(products_display_frame)
         tree_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
 
-        self.products_tree = ttk.Treeview(tree_frame, columns=("ID", "Name", "Category", "Purchase Price", "Selling Price", "Stock", "Go Down Quantity", "Expiry Date"), show="headings")
+        self.products_tree = VirtualTreeview(tree_frame, columns=("ID", "Name", "Category", "Purchase Price", "Selling Price", "Stock", "Go Down Quantity", "Expiry Date"), show="headings")
         self.products_tree.heading("ID", text="ID")
         self.products_tree.heading("Name", text="Name")
         self.products_tree.heading("Category", text="Category")
@@ -550,9 +1239,9 @@ class ProductsFrame(tk.Frame):
         self.products_tree.column("Go Down Quantity", width=60, anchor="e")
         self.products_tree.column("Expiry Date", width=100, anchor="center")
 
-        vsb = ttk.Scrollbar(tree_frame, orient="vertical", command=self.products_tree.yview)
+        vsb = ttk.Scrollbar(tree_frame, orient="vertical")
         vsb.pack(side='right', fill='y')
-        self.products_tree.configure(yscrollcommand=vsb.set)
+        self.products_tree.set_scrollbar(vsb)
 
         self.products_tree.pack(side='left', fill="both", expand=True)
 
@@ -562,8 +1251,6 @@ class ProductsFrame(tk.Frame):
         self.context_menu.add_command(label="Transfer Stock", command=self.set_transfer_fields)
         self.products_tree.bind("<Button-3>", self.show_context_menu)
 
-        self.refresh_data()
-
     def open_date_picker(self):
         def grab_date():
             selected_date = cal.selection_get()
@@ -582,6 +1269,7 @@ class ProductsFrame(tk.Frame):
             except ValueError:
                 pass
 
+        from tkcalendar import Calendar
         cal = Calendar(top, selectmode='day',
                         year=initial_date.year,
                         month=initial_date.month,
@@ -604,10 +1292,11 @@ class ProductsFrame(tk.Frame):
         self.amount_entry.focus()
     
     def handle_product_action(self):
-        if self.edit_mode:
-            self.update_product()
-        else:
-            self.add_product()
+        with self.controller.track(f"{'update' if self.edit_mode else 'add'} product"):
+            if self.edit_mode:
+                self.update_product()
+            else:
+                self.add_product()
 
     def add_product(self):
         name = self.name_entry.get().strip()
@@ -638,13 +1327,13 @@ class ProductsFrame(tk.Frame):
         if expiry_date == "":
             expiry_date = None
 
-        if self.controller.db.add_product(name, category, purchase_price, selling_price, stock_quantity, go_down_quantity, expiry_date):
-            messagebox.showinfo("Success", f"Product '{name}' added successfully.")
-            self.reset_form()
-            self.refresh_data()
-            self.controller.frames["sales"].refresh_data()
-            self.controller.frames["purchases"].refresh_data()
-            self.controller.frames["reports"].refresh_data()
+        try:
+            self.controller.db.add_product(name, category, purchase_price, selling_price, stock_quantity, go_down_quantity, expiry_date)
+        except InventoryError as e:
+            messagebox.showerror(e.title, str(e))
+            return
+        messagebox.showinfo("Success", f"Product '{name}' added successfully.")
+        self.reset_form()
 
     def load_product_for_edit(self):
         selected_item = self.products_tree.focus()
@@ -653,10 +1342,11 @@ class ProductsFrame(tk.Frame):
             return
 
         product_id = self.products_tree.item(selected_item)['values'][0]
-        product_data = self.controller.db.get_product_by_id(product_id)
+        product_data = self.controller.db.catalog.get(product_id)
         if product_data:
             self.edit_mode = True
             self.current_product_id = product_data[0]
+            self.loaded_stock = (product_data[5] or 0.0, product_data[6] or 0.0)
             self.name_entry.delete(0, tk.END)
             self.name_entry.insert(0, product_data[1])
             self.category_entry.delete(0, tk.END)
@@ -708,13 +1398,14 @@ class ProductsFrame(tk.Frame):
         if expiry_date == "":
             expiry_date = None
 
-        if self.controller.db.update_product(self.current_product_id, name, category, purchase_price, selling_price, stock_quantity, go_down_quantity, expiry_date):
-            messagebox.showinfo("Success", f"Product '{name}' updated successfully.")
-            self.reset_form()
-            self.refresh_data()
-            self.controller.frames["sales"].refresh_data()
-            self.controller.frames["purchases"].refresh_data()
-            self.controller.frames["reports"].refresh_data()
+        try:
+            self.controller.db.update_product(self.current_product_id, name, category, purchase_price, selling_price,
+                                              stock_quantity - self.loaded_stock[0], go_down_quantity - self.loaded_stock[1], expiry_date)
+        except InventoryError as e:
+            messagebox.showerror(e.title, str(e))
+            return
+        messagebox.showinfo("Success", f"Product '{name}' updated successfully.")
+        self.reset_form()
 
     def delete_product(self):
         selected_item = self.products_tree.focus()
@@ -726,17 +1417,18 @@ class ProductsFrame(tk.Frame):
         product_name = self.products_tree.item(selected_item)['values'][1]
 
         if messagebox.askyesno("Confirm Delete", f"Are you sure you want to delete product '{product_name}' (ID: {product_id})?"):
-            if self.controller.db.delete_product(product_id):
-                messagebox.showinfo("Success", f"Product '{product_name}' deleted successfully.")
-                self.refresh_data()
-                self.reset_form()
-                self.controller.frames["sales"].refresh_data()
-                self.controller.frames["purchases"].refresh_data()
-                self.controller.frames["reports"].refresh_data()
+            try:
+                self.controller.db.delete_product(product_id)
+            except InventoryError as e:
+                messagebox.showerror(e.title, str(e))
+                return
+            messagebox.showinfo("Success", f"Product '{product_name}' deleted successfully.")
+            self.reset_form()
 
     def reset_form(self):
         self.edit_mode = False
         self.current_product_id = None
+        self.loaded_stock = (0.0, 0.0)
         self.clear_entries()
         self.action_button.config(text="Add Product")
         self.cancel_button.grid_remove()
@@ -756,41 +1448,57 @@ class ProductsFrame(tk.Frame):
         self.amount_entry.delete(0, tk.END)
 
     def refresh_data(self):
-        for item in self.products_tree.get_children():
-            self.products_tree.delete(item)
-
-        products = self.controller.db.get_products()
-
-        for product in products:
-            formatted_product = list(product)
-
-            formatted_product[5] = f"{product[5]:.2f}" if product[5] is not None else "0.00"
-            formatted_product[6] = f"{product[6]:.2f}" if product[6] is not None else "0.00"
-
-            self.products_tree.insert("", "end", values=formatted_product)
-
+        self.search.invalidate()
         self.filter_products()
 
-    def filter_products(self, event=None):
-        search_term = self.search_entry.get().lower()
+    def apply_changes(self, changes):
+        product_ids = changes["products"]
+        if product_ids is not None:
+            rows = self.controller.db.catalog.get_many(product_ids)
+            if len(rows) == len(product_ids) and self.products_tree.patch_rows(rows, lambda row: (row[1], row[2])):
+                return
+        self.search.invalidate()
+        self.filter_products(keep_position=True)
+
+    def filter_products(self, event=None, keep_position=False):
+        search_term = self.search_entry.get().casefold()
         if search_term == "search products...":
             search_term = ""
 
-        all_products = self.controller.db.get_products()
-
-        for item in self.products_tree.get_children():
-            self.products_tree.delete(item)
-
-        filtered_products = [
-            p for p in all_products
-            if search_term in str(p[1]).lower() or
-               search_term in str(p[2]).lower()
-        ]
+        db = self.controller.db
+        catalog = db.catalog
+        product_ids = self.search.lookup(search_term)
+        if product_ids is IncrementalSearch.PENDING:
+            return
+        if product_ids == [] and len(search_term.strip()) >= 3:
+            product_ids = [product_id for product_id, similarity in db.fuzzy_search_products(search_term, self.FUZZY_RESULTS)]
+        if product_ids is None and search_term:
+            self.products_tree.set_source(
+                lambda: db.count_products(search_term),
+                lambda offset, limit: db.get_products_page(offset, limit, search_term),
+                self.format_product_row,
+                keep_position
+            )
+        elif product_ids is None:
+            self.products_tree.set_source(
+                catalog.__len__,
+                catalog.page,
+                self.format_product_row,
+                keep_position
+            )
+        else:
+            self.products_tree.set_source(
+                lambda: len(product_ids),
+                lambda offset, limit: catalog.get_many(product_ids[offset:offset + limit]),
+                self.format_product_row,
+                keep_position
+            )
 
-        for product in filtered_products:
-            formatted_product = list(product)
-            formatted_product[5] = f"{product[5]:.2f}"
-            self.products_tree.insert("", "end", values=formatted_product)
+    def format_product_row(self, product):
+        formatted_product = list(product)
+        formatted_product[5] = f"{product[5]:.2f}" if product[5] is not None else "0.00"
+        formatted_product[6] = f"{product[6]:.2f}" if product[6] is not None else "0.00"
+        return formatted_product
 
     def clear_search_placeholder(self, event):
         if self.search_entry.get() == "Search products...":
@@ -813,18 +1521,20 @@ class ProductsFrame(tk.Frame):
         try:
             product_id = int(self.product_id_entry.get())
             amount = float(self.amount_entry.get())
-            success = self.controller.db.transfer_stock(product_id, amount)
-
-            if success:
-                messagebox.showinfo("Success", f"Transferred {amount} items from go-down to stock for Product ID {product_id}.")
-                self.refresh_data()
-                self.controller.frames["reports"].refresh_data()
-            else:
-                messagebox.showerror("Error", "Not enough items in go-down or invalid product ID.")
         except ValueError:
             messagebox.showerror("Input Error", "Please enter valid numeric values.")
+            return
+
+        try:
+            self.controller.db.transfer_stock(product_id, amount)
+        except InventoryError as e:
+            messagebox.showerror(e.title, str(e))
+            return
+        messagebox.showinfo("Success", f"Transferred {amount} items from go-down to stock for Product ID {product_id}.")
 
 class SalesFrame(tk.Frame):
+    watched_tables = ("products", "sales")
+
     def __init__(self, parent, controller):
         super().__init__(parent)
         self.controller : InventoryApp = controller
@@ -832,14 +1542,18 @@ class SalesFrame(tk.Frame):
         self.current_sale_id = None
         self.previous_sale_quantity = 0.0
         self.original_price_per_unit = 0.0
+        self.basket = []
 
-        self.input_frame = tk.LabelFrame(self, text="Record New Sale", padx=10, pady=10)
-        self.input_frame.pack(pady=10, fill="x")
+        form_row = tk.Frame(self)
+        form_row.pack(fill="x")
+
+        self.input_frame = tk.LabelFrame(form_row, text="Record New Sale", padx=10, pady=10)
+        self.input_frame.pack(side=tk.LEFT, pady=10, fill="y")
 
         tk.Label(self.input_frame, text="Product Name:").grid(row=0, column=0, padx=5, pady=5, sticky="w")
-        self.product_combobox = AutocompleteCombobox(self.input_frame, width=37, completevalues=[])
+        self.product_combobox = ProductAutocomplete(self.input_frame, controller.db.catalog, width=40)
         self.product_combobox.grid(row=0, column=1, padx=5, pady=5)
-        self.product_combobox.bind("<<ComboboxSelected>>", self.on_product_select)
+        self.product_combobox.bind("<<ProductSelected>>", self.on_product_select)
 
         tk.Label(self.input_frame, text="Available Stock:").grid(row=1, column=0, padx=5, pady=5, sticky="w")
         self.available_stock_label = tk.Label(self.input_frame, text="N/A", width=37, anchor="w", relief="sunken", bd=1)
@@ -867,18 +1581,53 @@ class SalesFrame(tk.Frame):
         self.date_picker_button.grid(row=5, column=2, padx=5, pady=5)
 
         self.action_button = ttk.Button(self.input_frame, text="Record Sale", command=self.handle_sale_action)
-        self.action_button.grid(row=6, column=0, columnspan=3, pady=10)
+        self.action_button.grid(row=6, column=0, columnspan=2, pady=10)
+
+        self.add_to_basket_button = ttk.Button(self.input_frame, text="Add to Basket", command=self.add_to_basket)
+        self.add_to_basket_button.grid(row=6, column=2, padx=5, pady=10)
 
         self.cancel_button = ttk.Button(self.input_frame, text="Cancel Edit", command=self.reset_form)
         self.cancel_button.grid(row=7, column=0, columnspan=3, pady=5)
         self.cancel_button.grid_remove()
 
+        basket_frame = tk.LabelFrame(form_row, text="Basket", padx=10, pady=10)
+        basket_frame.pack(side=tk.LEFT, fill="both", expand=True, padx=10, pady=10)
+
+        self.basket_tree = ttk.Treeview(basket_frame, columns=("Product", "Quantity", "Price", "Total"), show="headings", height=6)
+        self.basket_tree.heading("Product", text="Product Name")
+        self.basket_tree.heading("Quantity", text="Quantity")
+        self.basket_tree.heading("Price", text="Price per unit")
+        self.basket_tree.heading("Total", text="Total Price")
+
+        self.basket_tree.column("Product", width=150)
+        self.basket_tree.column("Quantity", width=80, anchor="e")
+        self.basket_tree.column("Price", width=90, anchor="e")
+        self.basket_tree.column("Total", width=100, anchor="e")
+        self.basket_tree.pack(fill="both", expand=True)
+
+        basket_footer = tk.Frame(basket_frame)
+        basket_footer.pack(fill="x", pady=(10, 0))
+
+        self.basket_total_label = tk.Label(basket_footer, text="Basket Total: 0.00", anchor="w")
+        self.basket_total_label.pack(side="left")
+
+        self.checkout_button = ttk.Button(basket_footer, text="Checkout Basket", command=self.checkout_basket)
+        self.checkout_button.pack(side="right", padx=5)
+
+        self.clear_basket_button = ttk.Button(basket_footer, text="Clear Basket", command=self.clear_basket)
+        self.clear_basket_button.pack(side="right", padx=5)
+
+        self.remove_line_button = ttk.Button(basket_footer, text="Remove Line", command=self.remove_basket_line)
+        self.remove_line_button.pack(side="right", padx=5)
+
         sales_display_frame = tk.LabelFrame(self, text="Sales Records", padx=10, pady=10)
         sales_display_frame.pack(pady=10, fill="both", expand=True)
 
+        self.search = IncrementalSearch(self, "sales", lambda term, limit: self.controller.db.search_sales(term, with_text=True, limit=limit), self.filter_sales,
+                                        worker=controller.worker)
         self.search_entry = tk.Entry(sales_display_frame, width=50)
         self.search_entry.pack(pady=5, padx=5, fill="x")
-        self.search_entry.bind("<KeyRelease>", self.filter_sales)
+        self.search_entry.bind("<KeyRelease>", self.search.schedule)
         self.search_entry.insert(0, "Search sales...")
         self.search_entry.bind("<FocusIn>", self.clear_search_placeholder)
         self.search_entry.bind("<FocusOut>", self.restore_search_placeholder)
@@ -886,7 +1635,7 @@ class SalesFrame(tk.Frame):
         tree_frame = tk.Frame(sales_display_frame)
         tree_frame.pack(fill="both", expand=True)
 
-        self.sales_tree = ttk.Treeview(tree_frame, columns=("ID", "Product", "Quantity", "Total Price", "Date"), show="headings")
+        self.sales_tree = VirtualTreeview(tree_frame, columns=("ID", "Product", "Quantity", "Total Price", "Date"), show="headings")
         self.sales_tree.heading("ID", text="ID")
         self.sales_tree.heading("Product", text="Product Name")
         self.sales_tree.heading("Quantity", text="Quantity")
@@ -899,9 +1648,9 @@ class SalesFrame(tk.Frame):
         self.sales_tree.column("Total Price", width=100, anchor="e")
         self.sales_tree.column("Date", width=120, anchor="center")
 
-        vsb = ttk.Scrollbar(tree_frame, orient="vertical", command=self.sales_tree.yview)
+        vsb = ttk.Scrollbar(tree_frame, orient="vertical")
         vsb.pack(side='right', fill='y')
-        self.sales_tree.configure(yscrollcommand=vsb.set)
+        self.sales_tree.set_scrollbar(vsb)
 
         self.sales_tree.pack(side='left', fill="both", expand=True)
 
@@ -910,8 +1659,10 @@ class SalesFrame(tk.Frame):
         self.context_menu.add_command(label="Delete Sale", command=self.delete_sale)
         self.sales_tree.bind("<Button-3>", self.show_context_menu)
 
-        self.product_data = {}
-        self.refresh_data()
+        self.catalog = controller.db.catalog
+        self.product_names_version = None
+        self.shown_term = ""
+        self.last_row_id = 0
 
     def open_date_picker(self):
         def grab_date():
@@ -931,6 +1682,7 @@ class SalesFrame(tk.Frame):
             except ValueError:
                 pass
 
+        from tkcalendar import Calendar
         cal = Calendar(top, selectmode='day',
                         year=initial_date.year,
                         month=initial_date.month,
@@ -941,13 +1693,7 @@ class SalesFrame(tk.Frame):
         confirm_button.pack(pady=10)
 
     def refresh_data(self):
-        products = self.controller.db.get_products()
-        product_names = []
-        self.product_data = {}
-        for prod_id, name, category, purchase_price, selling_price, stock, go_down_quantity, expiry_date in products:
-            product_names.append(name)
-            self.product_data[name] = {"id": prod_id, "price": selling_price, "stock": stock}
-        self.product_combobox.set_completion_list(product_names)
+        self.sync_product_names()
         self.product_combobox.set("")
 
         self.available_stock_label.config(text="N/A")
@@ -957,22 +1703,50 @@ class SalesFrame(tk.Frame):
         self.sale_date_display.set(datetime.now().strftime("%Y-%m-%d"))
         self.original_price_per_unit = 0.0
 
-        for item in self.sales_tree.get_children():
-            self.sales_tree.delete(item)
-        sales = self.controller.db.get_sales_report()
-        for sale in sales:
-            formatted_sale = list(sale)
-            formatted_sale[2] = f"{sale[2]:.2f}"
-            self.sales_tree.insert("", "end", values=formatted_sale)
+        self.search.invalidate()
         self.filter_sales()
 
+    def sync_product_names(self):
+        self.catalog.sync()
+        if self.product_names_version == self.catalog.names_version:
+            return False
+        self.product_names_version = self.catalog.names_version
+        return True
+
+    def apply_changes(self, changes):
+        names_changed = "products" in changes and self.sync_product_names()
+        if "sales" not in changes and not names_changed:
+            return
+
+        sale_ids = changes.get("sales")
+        if sale_ids is not None and not names_changed:
+            rows = self.controller.db.get_sales_by_ids(list(sale_ids))
+            if self.sales_tree.row_key and not self.shown_term:
+                if self.merge_rows(rows, sale_ids):
+                    return
+            elif len(rows) == len(sale_ids) and self.sales_tree.patch_rows(rows, lambda row: (row[1], row[4])):
+                return
+        self.search.invalidate()
+        self.filter_sales(keep_position=True)
+
+    def merge_rows(self, rows, sale_ids):
+        found = {row[0] for row in rows}
+        inserted = {sale_id for sale_id in found if sale_id > self.last_row_id}
+        removed = [sale_id for sale_id in sale_ids if sale_id not in found and sale_id <= self.last_row_id]
+        if not self.sales_tree.merge_rows(rows, removed, inserted):
+            return False
+        if inserted or removed:
+            self.search.invalidate()
+        self.last_row_id = max([self.last_row_id, *inserted])
+        return True
+
     def on_product_select(self, event=None):
         selected_product_name = self.product_combobox.get()
-        if selected_product_name in self.product_data:
-            product_info = self.product_data[selected_product_name]
-            self.available_stock_label.config(text=f"{product_info['stock']:.2f}")
-            self.price_per_unit_label.config(text=f"{product_info['price']:.2f}")
-            self.original_price_per_unit = product_info['price']
+        if selected_product_name in self.catalog:
+            product_info = self.catalog[selected_product_name]
+            self.available_stock_label.config(text=f"{product_info.stock_quantity:.2f}")
+            self.price_per_unit_label.config(text=f"{product_info.selling_price:.2f}")
+            self.original_price_per_unit = product_info.selling_price
             self.calculate_total_price()
         else:
             self.available_stock_label.config(text="N/A")
@@ -987,8 +1761,8 @@ class SalesFrame(tk.Frame):
             price_per_unit = self.original_price_per_unit
             if not self.edit_mode:
                 selected_product_name = self.product_combobox.get()
-                if selected_product_name in self.product_data:
-                    price_per_unit = self.product_data[selected_product_name]["price"]
+                if selected_product_name in self.catalog:
+                    price_per_unit = self.catalog[selected_product_name].selling_price
 
             if price_per_unit != 0:
                 total_price = quantity * price_per_unit
@@ -999,10 +1773,11 @@ class SalesFrame(tk.Frame):
             self.total_price_label.config(text="0.00")
 
     def handle_sale_action(self):
-        if self.edit_mode:
-            self.update_sale()
-        else:
-            self.record_sale()
+        with self.controller.track(f"{'update' if self.edit_mode else 'add'} sale"):
+            if self.edit_mode:
+                self.update_sale()
+            else:
+                self.record_sale()
 
     def record_sale(self):
         selected_product_name = self.product_combobox.get()
@@ -1013,7 +1788,7 @@ class SalesFrame(tk.Frame):
             messagebox.showerror("Input Error", "Product, Quantity, and Sale Date are required.")
             return
 
-        if selected_product_name not in self.product_data:
+        if selected_product_name not in self.catalog:
             messagebox.showerror("Error", "Selected product is not valid.")
             return
 
@@ -1026,23 +1801,106 @@ class SalesFrame(tk.Frame):
             messagebox.showerror("Input Error", "Quantity must be a number.")
             return
 
-        product_info = self.product_data[selected_product_name]
-        product_id = product_info["id"]
-        current_stock = product_info["stock"]
-        price_per_unit = product_info["price"]
+        product_info = self.catalog[selected_product_name]
+        product_id = product_info.id
+        price_per_unit = product_info.selling_price
+
+        total_price = quantity * price_per_unit
 
-        if quantity > current_stock:
-            messagebox.showerror("Stock Error", f"Not enough stock available. Current stock: {current_stock:.2f}")
+        try:
+            self.controller.db.record_sale(product_id, quantity, total_price, sale_date)
+        except InventoryError as e:
+            messagebox.showerror(e.title, str(e))
             return
+        messagebox.showinfo("Success", f"Sale of {quantity:.2f} x {selected_product_name} recorded.")
+        self.reset_form()
 
-        total_price = quantity * price_per_unit
+    def add_to_basket(self):
+        selected_product_name = self.product_combobox.get()
+        quantity_str = self.quantity_entry.get().strip()
 
-        if self.controller.db.record_sale(product_id, quantity, total_price, sale_date):
-            messagebox.showinfo("Success", f"Sale of {quantity:.2f} x {selected_product_name} recorded.")
-            self.reset_form()
-            self.refresh_data()
-            self.controller.frames["products"].refresh_data()
-            self.controller.frames["reports"].refresh_data()
+        if not selected_product_name or not quantity_str:
+            messagebox.showerror("Input Error", "Product and Quantity are required.")
+            return
+
+        if selected_product_name not in self.catalog:
+            messagebox.showerror("Error", "Selected product is not valid.")
+            return
+
+        try:
+            quantity = float(quantity_str)
+            if quantity <= 0:
+                messagebox.showerror("Input Error", "Quantity must be a positive number.")
+                return
+        except ValueError:
+            messagebox.showerror("Input Error", "Quantity must be a number.")
+            return
+
+        product_info = self.catalog[selected_product_name]
+        in_basket = sum(line["quantity"] for line in self.basket if line["product_id"] == product_info.id)
+
+        if quantity + in_basket > product_info.stock_quantity:
+            messagebox.showerror("Stock Error", f"Not enough stock available. Current stock: {product_info.stock_quantity:.2f}, already in basket: {in_basket:.2f}")
+            return
+
+        self.basket.append({
+            "product_id": product_info.id,
+            "name": selected_product_name,
+            "quantity": quantity,
+            "price": product_info.selling_price,
+            "total": quantity * product_info.selling_price,
+        })
+        self.refresh_basket()
+
+        self.product_combobox.set("")
+        self.quantity_entry.delete(0, tk.END)
+        self.available_stock_label.config(text="N/A")
+        self.price_per_unit_label.config(text="N/A")
+        self.total_price_label.config(text="0.00")
+        self.original_price_per_unit = 0.0
+        self.product_combobox.focus()
+
+    def refresh_basket(self):
+        self.basket_tree.delete(*self.basket_tree.get_children())
+        for index, line in enumerate(self.basket):
+            self.basket_tree.insert("", "end", iid=str(index), values=(line["name"], f"{line['quantity']:.2f}", f"{line['price']:.2f}", f"{line['total']:.2f}"))
+        self.basket_total_label.config(text=f"Basket Total: {sum(line['total'] for line in self.basket):.2f}")
+
+    def remove_basket_line(self):
+        selected_item = self.basket_tree.focus()
+        if not selected_item:
+            messagebox.showwarning("Selection Error", "Please select a basket line to remove.")
+            return
+
+        del self.basket[int(selected_item)]
+        self.refresh_basket()
+
+    def clear_basket(self):
+        self.basket = []
+        self.refresh_basket()
+
+    def checkout_basket(self):
+        if not self.basket:
+            messagebox.showerror("Input Error", "The basket is empty.")
+            return
+
+        sale_date = self.sale_date_display.get().strip()
+        if not sale_date:
+            messagebox.showerror("Input Error", "Sale Date is required.")
+            return
+
+        lines = [(line["product_id"], line["quantity"], line["total"]) for line in self.basket]
+        basket_total = sum(line["total"] for line in self.basket)
+
+        try:
+            with self.controller.track("checkout basket"):
+                self.controller.db.record_sales_bulk(lines, sale_date)
+        except InventoryError as e:
+            messagebox.showerror(e.title, str(e))
+            return
+        messagebox.showinfo("Success", f"Basket of {len(lines)} line(s) recorded. Total: {basket_total:.2f}")
+        self.clear_basket()
+        self.reset_form()
 
     def load_sale_for_edit(self):
         selected_item = self.sales_tree.focus()
@@ -1059,7 +1917,7 @@ class SalesFrame(tk.Frame):
             product_id_from_sale = sale_data[1]
             self.previous_sale_quantity = sale_data[2]
 
-            product_info = self.controller.db.get_product_by_id(product_id_from_sale)
+            product_info = self.catalog.get(product_id_from_sale)
             if product_info:
                 product_name = product_info[1]
                 self.product_combobox.set(product_name)
@@ -1076,6 +1934,7 @@ class SalesFrame(tk.Frame):
             self.total_price_label.config(text=f"{sale_data[3]:.2f}")
             self.sale_date_display.set(sale_data[4])
             self.action_button.config(text="Update Sale")
+            self.add_to_basket_button.grid_remove()
             self.cancel_button.grid()
             self.input_frame.config(text=f"Edit Sale (ID: {self.current_sale_id})")
 
@@ -1092,7 +1951,7 @@ class SalesFrame(tk.Frame):
             messagebox.showerror("Input Error", "Product, Quantity, and Sale Date are required.")
             return
 
-        if selected_product_name not in self.product_data:
+        if selected_product_name not in self.catalog:
             messagebox.showerror("Error", "Selected product is not valid.")
             return
 
@@ -1105,9 +1964,9 @@ class SalesFrame(tk.Frame):
             messagebox.showerror("Input Error", "Quantity must be a number.")
             return
 
-        product_info = self.product_data[selected_product_name]
-        product_id = product_info["id"]
-        current_stock = product_info["stock"]
+        product_info = self.catalog[selected_product_name]
+        product_id = product_info.id
+        current_stock = product_info.stock_quantity
         price_per_unit = self.original_price_per_unit
 
         stock_needed = new_quantity - self.previous_sale_quantity
@@ -1118,12 +1977,13 @@ class SalesFrame(tk.Frame):
 
         new_total_price = new_quantity * price_per_unit
 
-        if self.controller.db.update_sale(self.current_sale_id, product_id, new_quantity, new_total_price, new_sale_date, self.previous_sale_quantity):
-            messagebox.showinfo("Success", f"Sale (ID: {self.current_sale_id}) updated successfully.")
-            self.reset_form()
-            self.refresh_data()
-            self.controller.frames["products"].refresh_data()
-            self.controller.frames["reports"].refresh_data()
+        try:
+            self.controller.db.update_sale(self.current_sale_id, product_id, new_quantity, new_total_price, new_sale_date)
+        except InventoryError as e:
+            messagebox.showerror(e.title, str(e))
+            return
+        messagebox.showinfo("Success", f"Sale (ID: {self.current_sale_id}) updated successfully.")
+        self.reset_form()
 
     def delete_sale(self):
         selected_item = self.sales_tree.focus()
@@ -1135,12 +1995,13 @@ class SalesFrame(tk.Frame):
         product_name = self.sales_tree.item(selected_item)['values'][1]
 
         if messagebox.askyesno("Confirm Delete", f"Are you sure you want to delete sale for '{product_name}' (ID: {sale_id})?"):
-            if self.controller.db.delete_sale(sale_id):
-                messagebox.showinfo("Success", f"Sale (ID: {sale_id}) for '{product_name}' deleted successfully.")
-                self.refresh_data()
-                self.reset_form()
-                self.controller.frames["products"].refresh_data()
-                self.controller.frames["reports"].refresh_data()
+            try:
+                self.controller.db.delete_sale(sale_id)
+            except InventoryError as e:
+                messagebox.showerror(e.title, str(e))
+                return
+            messagebox.showinfo("Success", f"Sale (ID: {sale_id}) for '{product_name}' deleted successfully.")
+            self.reset_form()
 
     def reset_form(self):
         self.edit_mode = False
@@ -1155,28 +2016,46 @@ class SalesFrame(tk.Frame):
         self.sale_date_display.set(datetime.now().strftime("%Y-%m-%d"))
 
         self.action_button.config(text="Record Sale")
+        self.add_to_basket_button.grid()
         self.cancel_button.grid_remove()
         self.input_frame.config(text="Record New Sale")
 
-    def filter_sales(self, event=None):
-        search_term = self.search_entry.get().lower()
+    def filter_sales(self, event=None, keep_position=False):
+        search_term = self.search_entry.get().casefold()
         if search_term == "search sales...":
             search_term = ""
 
-        all_sales = self.controller.db.get_sales_report()
-
-        for item in self.sales_tree.get_children():
-            self.sales_tree.delete(item)
+        db = self.controller.db
+        sale_ids = self.search.lookup(search_term)
+        if sale_ids is IncrementalSearch.PENDING:
+            return
+        self.shown_term = search_term
+        if sale_ids is None:
+            self.sales_tree.set_source(
+                lambda: self.count_sales(search_term),
+                lambda offset, limit, after: db.get_sales_page(offset, limit, search_term, after),
+                self.format_sale_row,
+                keep_position,
+                row_key=lambda row: (row[4], row[0]),
+                descending=True
+            )
+        else:
+            self.sales_tree.set_source(
+                lambda: len(sale_ids),
+                lambda offset, limit: db.get_sales_by_ids(sale_ids[offset:offset + limit]),
+                self.format_sale_row,
+                keep_position
+            )
 
-        filtered_sales = [
-            s for s in all_sales
-            if search_term in str(s[1]).lower()
-        ]
+    def count_sales(self, search_term):
+        db = self.controller.db
+        self.last_row_id = db.get_last_sale_id()
+        return db.count_sales(search_term)
 
-        for sale in filtered_sales:
-            formatted_sale = list(sale)
-            formatted_sale[2] = f"{sale[2]:.2f}"
-            self.sales_tree.insert("", "end", values=formatted_sale)
+    def format_sale_row(self, sale):
+        formatted_sale = list(sale)
+        formatted_sale[2] = f"{sale[2]:.2f}"
+        return formatted_sale
 
     def clear_search_placeholder(self, event):
         if self.search_entry.get() == "Search sales...":
@@ -1196,6 +2075,8 @@ class SalesFrame(tk.Frame):
             self.context_menu.post(event.x_root, event.y_root)
 
 class PurchasesFrame(tk.Frame):
+    watched_tables = ("products", "purchases")
+
     def __init__(self, parent, controller):
         super().__init__(parent)
         self.controller : InventoryApp = controller
@@ -1207,9 +2088,9 @@ class PurchasesFrame(tk.Frame):
         self.input_frame.pack(pady=10, fill="x")
 
         tk.Label(self.input_frame, text="Product Name:").grid(row=0, column=0, padx=5, pady=5, sticky="w")
-        self.product_combobox = AutocompleteCombobox(self.input_frame, width=37, completevalues=[])
+        self.product_combobox = ProductAutocomplete(self.input_frame, controller.db.catalog, width=40)
         self.product_combobox.grid(row=0, column=1, padx=5, pady=5)
-        self.product_combobox.bind("<<ComboboxSelected>>", self.on_product_select)
+        self.product_combobox.bind("<<ProductSelected>>", self.on_product_select)
 
         tk.Label(self.input_frame, text="Quantity:").grid(row=1, column=0, padx=5, pady=5, sticky="w")
         self.quantity_entry = tk.Entry(self.input_frame, width=40)
@@ -1242,9 +2123,11 @@ class PurchasesFrame(tk.Frame):
         purchases_display_frame = tk.LabelFrame(self, text="Purchase Records", padx=10, pady=10)
         purchases_display_frame.pack(pady=10, fill="both", expand=True)
 
+        self.search = IncrementalSearch(self, "purchases", lambda term, limit: self.controller.db.search_purchases(term, with_text=True, limit=limit), self.filter_purchases,
+                                        worker=controller.worker)
         self.search_entry = tk.Entry(purchases_display_frame, width=50)
         self.search_entry.pack(pady=5, padx=5, fill="x")
-        self.search_entry.bind("<KeyRelease>", self.filter_purchases)
+        self.search_entry.bind("<KeyRelease>", self.search.schedule)
         self.search_entry.insert(0, "Search purchases...")
         self.search_entry.bind("<FocusIn>", self.clear_search_placeholder)
         self.search_entry.bind("<FocusOut>", self.restore_search_placeholder)
@@ -1252,7 +2135,7 @@ class PurchasesFrame(tk.Frame):
         tree_frame = tk.Frame(purchases_display_frame)
         tree_frame.pack(fill="both", expand=True)
 
-        self.purchases_tree = ttk.Treeview(tree_frame, columns=("ID", "Product", "Quantity", "Cost Price", "Date", "Supplier"), show="headings")
+        self.purchases_tree = VirtualTreeview(tree_frame, columns=("ID", "Product", "Quantity", "Cost Price", "Date", "Supplier"), show="headings")
         self.purchases_tree.heading("ID", text="ID")
         self.purchases_tree.heading("Product", text="Product Name")
         self.purchases_tree.heading("Quantity", text="Quantity")
@@ -1267,9 +2150,9 @@ class PurchasesFrame(tk.Frame):
         self.purchases_tree.column("Date", width=100, anchor="center")
         self.purchases_tree.column("Supplier", width=120)
 
-        vsb = ttk.Scrollbar(tree_frame, orient="vertical", command=self.purchases_tree.yview)
+        vsb = ttk.Scrollbar(tree_frame, orient="vertical")
         vsb.pack(side='right', fill='y')
-        self.purchases_tree.configure(yscrollcommand=vsb.set)
+        self.purchases_tree.set_scrollbar(vsb)
 
         self.purchases_tree.pack(side='left', fill="both", expand=True)
 
@@ -1278,8 +2161,10 @@ class PurchasesFrame(tk.Frame):
         self.context_menu.add_command(label="Delete Purchase", command=self.delete_purchase)
         self.purchases_tree.bind("<Button-3>", self.show_context_menu)
 
-        self.product_data = {}
-        self.refresh_data()
+        self.catalog = controller.db.catalog
+        self.product_names_version = None
+        self.shown_term = ""
+        self.last_row_id = 0
 
     def open_date_picker(self):
         def grab_date():
@@ -1299,6 +2184,7 @@ class PurchasesFrame(tk.Frame):
             except ValueError:
                 pass
 
+        from tkcalendar import Calendar
         cal = Calendar(top, selectmode='day',
                        year=initial_date.year,
                        month=initial_date.month,
@@ -1309,13 +2195,7 @@ class PurchasesFrame(tk.Frame):
         confirm_button.pack(pady=10)
 
     def refresh_data(self):
-        products = self.controller.db.get_products()
-        product_names = []
-        self.product_data = {}
-        for prod_id, name, category, purchase_price, selling_price, stock, go_down_quantity, expiry_date in products:
-            product_names.append(name)
-            self.product_data[name] = {"id": prod_id, "purchase_price": purchase_price, "stock": stock}
-        self.product_combobox.set_completion_list(product_names)
+        self.sync_product_names()
         self.product_combobox.set("")
 
         self.quantity_entry.delete(0, tk.END)
@@ -1323,29 +2203,58 @@ class PurchasesFrame(tk.Frame):
         self.supplier_name_entry.delete(0, tk.END)
         self.purchase_date_display.set(datetime.now().strftime("%Y-%m-%d"))
 
-        for item in self.purchases_tree.get_children():
-            self.purchases_tree.delete(item)
-        purchases = self.controller.db.get_purchases_report()
-        for purchase in purchases:
-            formatted_purchase = list(purchase)
-            formatted_purchase[2] = f"{purchase[2]:.2f}"
-            self.purchases_tree.insert("", "end", values=formatted_purchase)
+        self.search.invalidate()
         self.filter_purchases()
 
+    def sync_product_names(self):
+        self.catalog.sync()
+        if self.product_names_version == self.catalog.names_version:
+            return False
+        self.product_names_version = self.catalog.names_version
+        return True
+
+    def apply_changes(self, changes):
+        names_changed = "products" in changes and self.sync_product_names()
+        if "purchases" not in changes and not names_changed:
+            return
+
+        purchase_ids = changes.get("purchases")
+        if purchase_ids is not None and not names_changed:
+            rows = self.controller.db.get_purchases_by_ids(list(purchase_ids))
+            if self.purchases_tree.row_key and not self.shown_term:
+                if self.merge_rows(rows, purchase_ids):
+                    return
+            elif len(rows) == len(purchase_ids) and self.purchases_tree.patch_rows(rows, lambda row: (row[1], row[4], row[5])):
+                return
+        self.search.invalidate()
+        self.filter_purchases(keep_position=True)
+
+    def merge_rows(self, rows, purchase_ids):
+        found = {row[0] for row in rows}
+        inserted = {purchase_id for purchase_id in found if purchase_id > self.last_row_id}
+        removed = [purchase_id for purchase_id in purchase_ids if purchase_id not in found and purchase_id <= self.last_row_id]
+        if not self.purchases_tree.merge_rows(rows, removed, inserted):
+            return False
+        if inserted or removed:
+            self.search.invalidate()
+        self.last_row_id = max([self.last_row_id, *inserted])
+        return True
+
     def on_product_select(self, event=None):
         selected_product_name = self.product_combobox.get()
-        if selected_product_name in self.product_data:
-            product_info = self.product_data[selected_product_name]
+        if selected_product_name in self.catalog:
+            product_info = self.catalog[selected_product_name]
             self.cost_price_entry.delete(0, tk.END)
-            self.cost_price_entry.insert(0, f"{product_info['purchase_price']:.2f}")
+            self.cost_price_entry.insert(0, f"{product_info.purchase_price:.2f}")
         else:
             self.cost_price_entry.delete(0, tk.END)
 
     def handle_purchase_action(self):
-        if self.edit_mode:
-            self.update_purchase()
-        else:
-            self.record_purchase()
+        with self.controller.track(f"{'update' if self.edit_mode else 'add'} purchase"):
+            if self.edit_mode:
+                self.update_purchase()
+            else:
+                self.record_purchase()
 
     def record_purchase(self):
         selected_product_name = self.product_combobox.get()
@@ -1358,7 +2267,7 @@ class PurchasesFrame(tk.Frame):
             messagebox.showerror("Input Error", "Product, Quantity, Cost Price, and Purchase Date are required.")
             return
 
-        if selected_product_name not in self.product_data:
+        if selected_product_name not in self.catalog:
             messagebox.showerror("Error", "Selected product is not valid.")
             return
 
@@ -1372,15 +2281,16 @@ class PurchasesFrame(tk.Frame):
             messagebox.showerror("Input Error", "Quantity must be a number and Cost Price a number.")
             return
 
-        product_info = self.product_data[selected_product_name]
-        product_id = product_info["id"]
+        product_info = self.catalog[selected_product_name]
+        product_id = product_info.id
 
-        if self.controller.db.record_purchase(product_id, quantity, cost_price, purchase_date, supplier_name):
-            messagebox.showinfo("Success", f"Purchase of {quantity:.2f} x {selected_product_name} recorded.")
-            self.reset_form()
-            self.refresh_data()
-            self.controller.frames["products"].refresh_data()
-            self.controller.frames["reports"].refresh_data()
+        try:
+            self.controller.db.record_purchase(product_id, quantity, cost_price, purchase_date, supplier_name)
+        except InventoryError as e:
+            messagebox.showerror(e.title, str(e))
+            return
+        messagebox.showinfo("Success", f"Purchase of {quantity:.2f} x {selected_product_name} recorded.")
+        self.reset_form()
 
     def load_purchase_for_edit(self):
         selected_item = self.purchases_tree.focus()
@@ -1397,7 +2307,7 @@ class PurchasesFrame(tk.Frame):
             product_id_from_purchase = purchase_data[1]
             self.previous_purchase_quantity = purchase_data[2]
 
-            product_info = self.controller.db.get_product_by_id(product_id_from_purchase)
+            product_info = self.catalog.get(product_id_from_purchase)
             if product_info:
                 product_name = product_info[1]
                 self.product_combobox.set(product_name)
@@ -1432,7 +2342,7 @@ class PurchasesFrame(tk.Frame):
             messagebox.showerror("Input Error", "Product, Quantity, Cost Price, and Purchase Date are required.")
             return
 
-        if selected_product_name not in self.product_data:
+        if selected_product_name not in self.catalog:
             messagebox.showerror("Error", "Selected product is not valid.")
             return
 
@@ -1446,15 +2356,16 @@ class PurchasesFrame(tk.Frame):
             messagebox.showerror("Input Error", "Quantity must be a number and Cost Price a number.")
             return
 
-        product_info = self.product_data[selected_product_name]
-        product_id = product_info["id"]
+        product_info = self.catalog[selected_product_name]
+        product_id = product_info.id
 
-        if self.controller.db.update_purchase(self.current_purchase_id, product_id, new_quantity, new_cost_price, new_purchase_date, new_supplier_name, self.previous_purchase_quantity):
-            messagebox.showinfo("Success", f"Purchase (ID: {self.current_purchase_id}) updated successfully.")
-            self.reset_form()
-            self.refresh_data()
-            self.controller.frames["products"].refresh_data()
-            self.controller.frames["reports"].refresh_data()
+        try:
+            self.controller.db.update_purchase(self.current_purchase_id, product_id, new_quantity, new_cost_price, new_purchase_date, new_supplier_name)
+        except InventoryError as e:
+            messagebox.showerror(e.title, str(e))
+            return
+        messagebox.showinfo("Success", f"Purchase (ID: {self.current_purchase_id}) updated successfully.")
+        self.reset_form()
 
     def delete_purchase(self):
         selected_item = self.purchases_tree.focus()
@@ -1466,12 +2377,13 @@ class PurchasesFrame(tk.Frame):
         product_name = self.purchases_tree.item(selected_item)['values'][1]
 
         if messagebox.askyesno("Confirm Delete", f"Are you sure you want to delete purchase for '{product_name}' (ID: {purchase_id})?"):
-            if self.controller.db.delete_purchase(purchase_id):
-                messagebox.showinfo("Success", f"Purchase (ID: {purchase_id}) for '{product_name}' deleted successfully.")
-                self.refresh_data()
-                self.reset_form()
-                self.controller.frames["products"].refresh_data()
-                self.controller.frames["reports"].refresh_data()
+            try:
+                self.controller.db.delete_purchase(purchase_id)
+            except InventoryError as e:
+                messagebox.showerror(e.title, str(e))
+                return
+            messagebox.showinfo("Success", f"Purchase (ID: {purchase_id}) for '{product_name}' deleted successfully.")
+            self.reset_form()
 
     def reset_form(self):
         self.edit_mode = False
@@ -1487,26 +2399,42 @@ class PurchasesFrame(tk.Frame):
         self.cancel_button.grid_remove()
         self.input_frame.config(text="Add New Purchase")
 
-    def filter_purchases(self, event=None):
-        search_term = self.search_entry.get().lower()
+    def filter_purchases(self, event=None, keep_position=False):
+        search_term = self.search_entry.get().casefold()
         if search_term == "search purchases...":
             search_term = ""
 
-        all_purchases = self.controller.db.get_purchases_report()
-
-        for item in self.purchases_tree.get_children():
-            self.purchases_tree.delete(item)
+        db = self.controller.db
+        purchase_ids = self.search.lookup(search_term)
+        if purchase_ids is IncrementalSearch.PENDING:
+            return
+        self.shown_term = search_term
+        if purchase_ids is None:
+            self.purchases_tree.set_source(
+                lambda: self.count_purchases(search_term),
+                lambda offset, limit, after: db.get_purchases_page(offset, limit, search_term, after),
+                self.format_purchase_row,
+                keep_position,
+                row_key=lambda row: (row[4], row[0]),
+                descending=True
+            )
+        else:
+            self.purchases_tree.set_source(
+                lambda: len(purchase_ids),
+                lambda offset, limit: db.get_purchases_by_ids(purchase_ids[offset:offset + limit]),
+                self.format_purchase_row,
+                keep_position
+            )
 
-        filtered_purchases = [
-            p for p in all_purchases
-            if search_term in str(p[1]).lower() or
-               search_term in str(p[5]).lower()
-        ]
+    def count_purchases(self, search_term):
+        db = self.controller.db
+        self.last_row_id = db.get_last_purchase_id()
+        return db.count_purchases(search_term)
 
-        for purchase in filtered_purchases:
-            formatted_purchase = list(purchase)
-            formatted_purchase[2] = f"{purchase[2]:.2f}"
-            self.purchases_tree.insert("", "end", values=formatted_purchase)
+    def format_purchase_row(self, purchase):
+        formatted_purchase = list(purchase)
+        formatted_purchase[2] = f"{purchase[2]:.2f}"
+        return formatted_purchase
 
     def clear_search_placeholder(self, event):
         if self.search_entry.get() == "Search purchases...":
@@ -1525,17 +2453,71 @@ class PurchasesFrame(tk.Frame):
             self.purchases_tree.focus(item_id)
             self.context_menu.post(event.x_root, event.y_root)
 
+ReportSpec = namedtuple("ReportSpec", ("method", "header", "formats", "uses_start_date", "empty_message", "saves_months"), defaults=(False,))
+
 class ReportsFrame(tk.Frame):
+    watched_tables = ("products", "sales", "purchases")
+
+    REPORTS = OrderedDict((
+        ("Date Range Sales Report", ReportSpec(
+            "get_sales_report_by_date_range",
+            ("Product name", "Total Sales", "Quantity Sold"),
+            ("money", "quantity"),
+            True,
+            "No sales were recorded in the selected date range."
+        )),
+        ("Product Profitability Report", ReportSpec(
+            "get_product_profitability_report",
+            ("Product name", "Revenue", "Expenses", "Profit", "Margin"),
+            ("money", "money", "money", "percent"),
+            True,
+            "No sales or purchases were recorded in the selected date range."
+        )),
+        ("Monthly Trend Report", ReportSpec(
+            "get_monthly_trend_report",
+            ("Month", "Revenue", "Expenses", "Profit", "Revenue Change", "Profit Change"),
+            ("money",) * 5,
+            True,
+            "No sales or purchases were recorded in the selected months.",
+            True
+        )),
+        ("Stock on Date Report", ReportSpec(
+            "get_stock_as_of",
+            ("Product name", "Stock", "Go Down Quantity", "Total"),
+            ("quantity", "quantity", "quantity"),
+            False,
+            "No stock was held on the selected end date."
+        )),
+        ("Stock Movement Report", ReportSpec(
+            "get_stock_movement_report",
+            ("Product name", "Opening", "Purchased", "Sold", "Adjusted", "Closing Stock", "Closing Go Down"),
+            ("quantity",) * 6,
+            True,
+            "No stock was held or moved in the selected date range."
+        )),
+    ))
+
     def __init__(self, parent, controller):
         super().__init__(parent)
         self.controller: InventoryApp = controller
         self.current_report_data = []
         self.current_report_type = "Date Range Sales Report"
+        self.report_task = None
+        self.sort_column = None
+        self.sort_descending = False
+        from tkcalendar import DateEntry
         
         self.input_frame = tk.Frame(self, padx=10, pady=10)
         self.input_frame.pack(pady=(10, 20), fill="x")
 
-        tk.Label(self.input_frame, text="Start Date:").grid(row=0, column=0, padx=5, pady=5, sticky="e")
+        tk.Label(self.input_frame, text="Report:").grid(row=0, column=0, padx=5, pady=5, sticky="e")
+        self.report_type_combobox = ttk.Combobox(self.input_frame, values=list(self.REPORTS), state="readonly", width=26)
+        self.report_type_combobox.set(self.current_report_type)
+        self.report_type_combobox.grid(row=0, column=1, columnspan=3, padx=(0, 15), pady=5, sticky="w")
+        self.report_type_combobox.bind("<<ComboboxSelected>>", self.on_report_type_select)
+
+        self.start_date_label = tk.Label(self.input_frame, text="Start Date:")
+        self.start_date_label.grid(row=1, column=0, padx=5, pady=5, sticky="e")
         self.start_date_entry = DateEntry(
             self.input_frame, 
             selectmode='day', 
@@ -1545,9 +2527,9 @@ class ReportsFrame(tk.Frame):
             foreground='white', 
             borderwidth=2
         )
-        self.start_date_entry.grid(row=0, column=1, padx=(0, 15), pady=5, sticky="w")
+        self.start_date_entry.grid(row=1, column=1, padx=(0, 15), pady=5, sticky="w")
         
-        tk.Label(self.input_frame, text="End Date:").grid(row=0, column=2, padx=5, pady=5, sticky="e")
+        tk.Label(self.input_frame, text="End Date:").grid(row=1, column=2, padx=5, pady=5, sticky="e")
         self.end_date_entry = DateEntry(
             self.input_frame, 
             selectmode='day', 
@@ -1557,10 +2539,17 @@ class ReportsFrame(tk.Frame):
             foreground='white', 
             borderwidth=2
         )
-        self.end_date_entry.grid(row=0, column=3, padx=(0, 15), pady=5, sticky="w")
+        self.end_date_entry.grid(row=1, column=3, padx=(0, 15), pady=5, sticky="w")
         
-        generate_btn = ttk.Button(self.input_frame, text="Generate", command=self.generate_date_range_report)
-        generate_btn.grid(row=0, column=4, padx=20, pady=5, sticky="w")
+        self.generate_btn = ttk.Button(self.input_frame, text="Generate", command=self.generate_report)
+        self.generate_btn.grid(row=1, column=4, padx=20, pady=5, sticky="w")
+
+        self.cancel_report_btn = ttk.Button(self.input_frame, text="Cancel", command=self.cancel_report)
+        self.cancel_report_btn.grid(row=1, column=5, padx=5, pady=5, sticky="w")
+        self.cancel_report_btn.grid_remove()
+
+        self.report_status_label = tk.Label(self.input_frame, text="", fg="gray")
+        self.report_status_label.grid(row=1, column=6, padx=5, pady=5, sticky="w")
         
         tk.Frame(self, height=2, bg="gray").pack(fill="x", pady=10)
 
@@ -1585,61 +2574,155 @@ class ReportsFrame(tk.Frame):
             state=tk.DISABLED
         )
         self.export_btn.pack(pady=10)
-        
-        self.refresh_data()
 
     def configure_tree_columns(self):
-        self.reports_tree['columns'] = ("Product name", "Total Sales", "Quantity Sold")
+        header = self.REPORTS[self.current_report_type].header
+        self.reports_tree['columns'] = header
         self.reports_tree.column("#0", width=0, stretch=tk.NO)
-        self.reports_tree.column("Product name", anchor=tk.W, width=180)
-        self.reports_tree.column("Total Sales", anchor=tk.E, width=120)
-        self.reports_tree.column("Quantity Sold", anchor=tk.E, width=100)
-        self.reports_tree.heading("Product name", text="Product name", anchor=tk.W)
-        self.reports_tree.heading("Total Sales", text="Total Sales", anchor=tk.E)
-        self.reports_tree.heading("Quantity Sold", text="Quantity Sold", anchor=tk.E)
-
-    def generate_date_range_report(self):
+        self.reports_tree.column(header[0], anchor=tk.W, width=180)
+        self.reports_tree.heading(header[0], text=header[0], anchor=tk.W)
+        for column in header[1:]:
+            self.reports_tree.column(column, anchor=tk.E, width=110)
+            self.reports_tree.heading(column, text=column, anchor=tk.E)
+        for index, column in enumerate(header):
+            self.reports_tree.heading(column, command=lambda index=index: self.sort_report(index))
+
+    def on_report_type_select(self, event=None):
+        self.cancel_report()
+        self.current_report_type = self.report_type_combobox.get()
+        self.current_report_data = []
+        self.clear_tree()
+        self.configure_tree_columns()
+        self.export_btn.config(state=tk.DISABLED)
+        if self.REPORTS[self.current_report_type].uses_start_date:
+            self.start_date_label.grid()
+            self.start_date_entry.grid()
+        else:
+            self.start_date_label.grid_remove()
+            self.start_date_entry.grid_remove()
+
+    def generate_report(self):
+        report_type = self.current_report_type
+        spec = self.REPORTS[report_type]
         start_date_obj = self.start_date_entry.get_date()
         end_date_obj = self.end_date_entry.get_date()
         
         start_date = start_date_obj.strftime("%Y-%m-%d")
         end_date = end_date_obj.strftime("%Y-%m-%d")
 
-        if start_date > end_date:
+        if spec.uses_start_date and start_date > end_date:
             messagebox.showerror("Input Error", "Start Date cannot be after End Date.")
             return
 
+        self.cancel_report()
         self.clear_tree()
         self.configure_tree_columns()
+        self.export_btn.config(state=tk.DISABLED)
 
-        raw_report_data = self.controller.db.get_sales_report_by_date_range(start_date, end_date)
-        
-        header = ("Product name", "Total Sales", "Quantity Sold")
-        self.current_report_data = [header]
+        args = (start_date, end_date) if spec.uses_start_date else (end_date,)
+        self.report_task = self.controller.worker.submit(
+            spec.method, *args,
+            on_done=lambda rows: self.show_report(report_type, start_date, end_date, rows),
+            on_error=self.report_failed
+        )
+        self.set_report_loading(True)
+
+    def set_report_loading(self, loading):
+        if loading:
+            self.generate_btn.config(state=tk.DISABLED)
+            self.report_type_combobox.config(state=tk.DISABLED)
+            self.cancel_report_btn.grid()
+            self.report_status_label.config(text="Loading report...")
+            self.config(cursor="watch")
+        else:
+            self.generate_btn.config(state=tk.NORMAL)
+            self.report_type_combobox.config(state="readonly")
+            self.cancel_report_btn.grid_remove()
+            self.report_status_label.config(text="")
+            self.config(cursor="")
+
+    def cancel_report(self):
+        if self.report_task:
+            self.controller.worker.cancel(self.report_task)
+            self.report_task = None
+            self.set_report_loading(False)
+
+    def report_failed(self, error):
+        self.report_task = None
+        self.set_report_loading(False)
+        messagebox.showerror("Report Error", f"Failed to generate report: {error}")
+
+    @staticmethod
+    def format_value(value, kind):
+        if value is None:
+            return ""
+        if kind == "money":
+            return f"{value:,.2f}"
+        if kind == "percent":
+            return f"{value:.1f}%"
+        return f"{value:,.0f}" if value == int(value) else f"{value:,.2f}"
+
+    def show_report(self, report_type, start_date, end_date, raw_report_data):
+        self.report_task = None
+        self.set_report_loading(False)
+
+        spec = self.REPORTS[report_type]
+        self.current_report_data = [spec.header]
+        self.sort_column = None
         
         if not raw_report_data:
-            self.reports_tree.insert("", "end", values=("No sales data found for this date range.", "", ""))
+            self.reports_tree.insert("", "end", values=("No data found for this report.",) + ("",) * (len(spec.header) - 1))
             self.export_btn.config(state=tk.DISABLED)
-            messagebox.showinfo("Report Empty", "No sales were recorded in the selected date range.")
+            messagebox.showinfo("Report Empty", spec.empty_message)
             return
 
-        for name, revenue, quantity in raw_report_data:
-            formatted_revenue = f"{revenue:,.2f}"
-            formatted_quantity = f"{quantity:,.0f}" if quantity == int(quantity) else f"{quantity:,.2f}"
-            
-            formatted_row = (name, formatted_revenue, formatted_quantity)
+        self.current_report_data.extend(tuple(row) for row in raw_report_data)
+        self.render_report_rows()
+        
+        self.export_btn.config(state=tk.NORMAL)
+
+        if spec.saves_months:
+            reports = [row[:4] for row in raw_report_data if row[1] or row[2]]
+            try:
+                self.controller.db.save_reports(reports)
+            except InventoryError as e:
+                messagebox.showerror(e.title, str(e))
+        if spec.uses_start_date:
+            messagebox.showinfo("Success", f"{report_type} from {start_date} to {end_date} generated successfully.")
+        else:
+            messagebox.showinfo("Success", f"{report_type} for {end_date} generated successfully.")
+
+    def render_report_rows(self):
+        spec = self.REPORTS[self.current_report_type]
+        self.clear_tree()
+        self.reports_tree.tag_configure('negative', foreground='red')
+        self.reports_tree.tag_configure('positive', foreground='green')
+        for row in self.current_report_data[1:]:
+            values = row[1:]
+            formatted_row = (row[0],) + tuple(self.format_value(value, kind) for value, kind in zip(values, spec.formats))
             item_id = self.reports_tree.insert("", "end", values=formatted_row)
-            self.current_report_data.append((name, revenue, quantity))
 
-            if revenue < 0:
-                self.reports_tree.tag_configure('negative', foreground='red')
+            if any(value is not None and value < 0 for value in values):
                 self.reports_tree.item(item_id, tags=('negative',))
-            else:
-                self.reports_tree.tag_configure('positive', foreground='green')
+            elif spec.formats[0] == "money":
                 self.reports_tree.item(item_id, tags=('positive',))
-        
-        self.export_btn.config(state=tk.NORMAL)
-        messagebox.showinfo("Success", f"Sales report from {start_date} to {end_date} generated successfully.")
+
+    def sort_report(self, column_index):
+        if len(self.current_report_data) <= 1:
+            return
+        if self.sort_column == column_index:
+            self.sort_descending = not self.sort_descending
+        else:
+            self.sort_column = column_index
+            self.sort_descending = column_index > 0
+        rows = self.current_report_data[1:]
+        if column_index == 0:
+            rows.sort(key=lambda row: row[0].lower(), reverse=self.sort_descending)
+        else:
+            missing = float("-inf") if self.sort_descending else float("inf")
+            rows.sort(key=lambda row: missing if row[column_index] is None else row[column_index], reverse=self.sort_descending)
+        self.current_report_data[1:] = rows
+        self.render_report_rows()
 
     def save_to_excel(self):
         if not self.current_report_data or len(self.current_report_data) <= 1:
@@ -1648,19 +2731,15 @@ class ReportsFrame(tk.Frame):
 
         filepath = filedialog.asksaveasfilename(
             defaultextension=".xlsx",
-            filetypes=[("Excel files", "*.xlsx"), ("All files", "*.*")],
+            filetypes=[("Excel files", "*.xlsx"), ("CSV files", "*.csv"), ("All files", "*.*")],
             title=f"Save {self.current_report_type} Export"
         )
 
         if not filepath:
             return
 
-        try:
-            df = pd.DataFrame(self.current_report_data[1:], columns=self.current_report_data[0])
-            df.to_excel(filepath, index=False)
-            messagebox.showinfo("Export Successful", f"Report successfully exported to:\n{os.path.basename(filepath)}")
-        except Exception as e:
-            messagebox.showerror("Export Error", f"An error occurred during export: {e}")
+        job = ExportJob(filepath, self.current_report_data[0], rows=self.current_report_data[1:])
+        ExportDialog(self.controller, f"Exporting {self.current_report_type}", job)
 
     def refresh_data(self):
         self.clear_tree()
@@ -1669,10 +2748,48 @@ class ReportsFrame(tk.Frame):
         self.end_date_entry.set_date(today)
         self.start_date_entry.set_date(today)
 
+    def apply_changes(self, changes):
+        self.cancel_report()
+        self.clear_tree()
+        self.current_report_data = []
+        self.export_btn.config(state=tk.DISABLED)
+
     def clear_tree(self):
         for item in self.reports_tree.get_children():
             self.reports_tree.delete(item)
 
 if __name__ == "__main__":
-    app = InventoryApp()
-    app.mainloop()
+    import argparse
+
+    logging.basicConfig(level=os.environ.get("INV_APP_LOG_LEVEL", "WARNING").upper(),
+                        format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    parser = argparse.ArgumentParser(description="Zafs Book Keeping App")
+    parser.add_argument("--rebuild-summary", action="store_true",
+                        help="recompute the monthly summary table from all sales and purchases, then exit")
+    parser.add_argument("--startup-timing", nargs="?", const="startup_timing.json", metavar="FILE",
+                        help="write a JSON startup-timing report to FILE (default: startup_timing.json) once the window is drawn, then exit")
+    parser.add_argument("--startup-budget", type=float, metavar="MS",
+                        help="with --startup-timing, exit with status 1 if startup took longer than MS milliseconds")
+    parser.add_argument("--query-stats", nargs="?", const="-", metavar="FILE",
+                        help="time every database query and write a JSON summary to FILE (or stdout) when the app closes")
+    parser.add_argument("--slow-query-ms", type=float, default=200, metavar="MS",
+                        help="with --query-stats, log queries slower than MS milliseconds with their query plan (default: 200)")
+    parser.add_argument("--slow-query-log", default="slow_queries.log", metavar="FILE",
+                        help="with --query-stats, the rotating log file for slow queries (default: slow_queries.log)")
+    args = parser.parse_args()
+
+    if args.rebuild_summary:
+        db = Database()
+        db.rebuild_monthly_summary()
+        db.close()
+        print("Monthly summary rebuilt.")
+    else:
+        startup_timer.mark("imports")
+        query_stats = QueryStats(args.slow_query_ms, args.slow_query_log) if args.query_stats else None
+        app = InventoryApp(query_stats=query_stats)
+        app.after_idle(app.report_startup, args.startup_timing, args.startup_budget)
+        app.mainloop()
+        if query_stats:
+            query_stats.dump(args.query_stats)
+        raise SystemExit(app.startup_exit_code)
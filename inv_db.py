@@ -0,0 +1,1914 @@
+import sqlite3, os, logging, json, threading, bisect, random, re, heapq, time
+from collections import Counter, deque, namedtuple
+from contextlib import contextmanager
+from datetime import datetime, date, timedelta
+from pathlib import Path
+
+logger = logging.getLogger("inv_app")
+
+class InventoryError(Exception):
+    title = "Error"
+
+class DuplicateProductError(InventoryError):
+    pass
+
+class NotFoundError(InventoryError):
+    pass
+
+class StockError(InventoryError):
+    title = "Stock Error"
+
+class ReportError(InventoryError):
+    title = "Report Error"
+
+class DatabaseBusyError(InventoryError):
+    title = "Database Busy"
+
+class QueryRecord:
+    def __init__(self, key, sql, params, conn):
+        self.key = key
+        self.sql = sql
+        self.params = params
+        self.conn = conn
+        self.ms = [0.0]
+        self.rows = 0
+        self.logged = False
+
+class QueryStats:
+    def __init__(self, slow_ms=200, slow_log_path="slow_queries.log", max_log_bytes=1 << 20, log_backups=3, max_samples=1000, max_actions=500):
+        import logging.handlers
+
+        self.slow_ms = slow_ms
+        self.max_samples = max_samples
+        self.lock = threading.Lock()
+        self.statements = {}
+        self.actions = deque(maxlen=max_actions)
+        self.total_queries = 0
+        self.total_ms = 0.0
+        self.slow_logger = logging.getLogger("inv_app.slow_queries")
+        self.slow_logger.propagate = False
+        self.slow_logger.setLevel(logging.INFO)
+        if slow_log_path and not self.slow_logger.handlers:
+            handler = logging.handlers.RotatingFileHandler(slow_log_path, maxBytes=max_log_bytes, backupCount=log_backups, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+            self.slow_logger.addHandler(handler)
+
+    def record(self, conn, sql, params, started):
+        elapsed = (time.perf_counter() - started) * 1000
+        key = " ".join(sql.split())
+        query = QueryRecord(key, sql, params, conn)
+        query.ms[0] = elapsed
+        with self.lock:
+            entry = self.statements.get(key)
+            if entry is None:
+                entry = self.statements[key] = {"count": 0, "total_ms": 0.0, "rows": 0, "samples": deque(maxlen=self.max_samples)}
+            entry["count"] += 1
+            entry["total_ms"] += elapsed
+            entry["samples"].append(query.ms)
+            self.total_queries += 1
+            self.total_ms += elapsed
+        self._check_slow(query)
+        return query
+
+    def add_fetch(self, query, started, rows):
+        if query is None:
+            return
+        elapsed = (time.perf_counter() - started) * 1000
+        with self.lock:
+            entry = self.statements[query.key]
+            entry["total_ms"] += elapsed
+            entry["rows"] += rows
+            self.total_ms += elapsed
+            query.ms[0] += elapsed
+            query.rows += rows
+        self._check_slow(query)
+
+    def _check_slow(self, query):
+        if query.logged or self.slow_ms is None or query.ms[0] < self.slow_ms:
+            return
+        query.logged = True
+        plan = []
+        if query.params is not None:
+            try:
+                plan = [row[-1] for row in query.conn.execute("EXPLAIN QUERY PLAN " + query.sql, query.params).fetchall()]
+            except sqlite3.Error:
+                pass
+        self.slow_logger.info("%.1f ms, %d rows: %s\n    params: %r\n    plan: %s", query.ms[0], query.rows, query.key,
+                              query.params, "; ".join(plan) or "n/a")
+
+    @contextmanager
+    def action(self, name):
+        with self.lock:
+            start_queries, start_ms = self.total_queries, self.total_ms
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self.lock:
+                entry = {
+                    "action": name,
+                    "queries": self.total_queries - start_queries,
+                    "query_ms": round(self.total_ms - start_ms, 1),
+                    "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+                }
+                self.actions.append(entry)
+            logger.info("%s = %d queries, %.1f ms (%.1f ms in SQLite)", name, entry["queries"], entry["elapsed_ms"], entry["query_ms"])
+
+    @staticmethod
+    def _percentile(samples, fraction):
+        return samples[min(len(samples) - 1, int(fraction * len(samples)))]
+
+    def report(self):
+        with self.lock:
+            statements = []
+            for key, entry in self.statements.items():
+                samples = sorted(sample[0] for sample in entry["samples"])
+                statements.append({
+                    "sql": key,
+                    "count": entry["count"],
+                    "total_ms": round(entry["total_ms"], 3),
+                    "p50_ms": round(self._percentile(samples, 0.50), 3),
+                    "p95_ms": round(self._percentile(samples, 0.95), 3),
+                    "p99_ms": round(self._percentile(samples, 0.99), 3),
+                    "max_ms": round(samples[-1], 3),
+                    "rows": entry["rows"],
+                })
+            actions = list(self.actions)
+        statements.sort(key=lambda statement: statement["total_ms"], reverse=True)
+        return {"total_queries": self.total_queries, "total_ms": round(self.total_ms, 1), "statements": statements, "actions": actions}
+
+    def dump(self, output):
+        report = self.report()
+        if output == "-":
+            print(json.dumps(report, indent=2))
+        else:
+            with open(output, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+
+class TimedCursor(sqlite3.Cursor):
+    def __init__(self, conn, stats):
+        super().__init__(conn)
+        self.stats = stats
+        self.last_query = None
+
+    def execute(self, sql, params=()):
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, params)
+        finally:
+            self.last_query = self.stats.record(self.connection, sql, params, started)
+
+    def executemany(self, sql, seq_of_params):
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_params)
+        finally:
+            self.last_query = self.stats.record(self.connection, sql, None, started)
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = super().fetchone()
+        self.stats.add_fetch(self.last_query, started, 0 if row is None else 1)
+        return row
+
+    def fetchmany(self, size=None):
+        started = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self.stats.add_fetch(self.last_query, started, len(rows))
+        return rows
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = super().fetchall()
+        self.stats.add_fetch(self.last_query, started, len(rows))
+        return rows
+
+class Database:
+    STOCK_SNAPSHOT_MONTHS = 3
+    BUSY_TIMEOUT_MS = 2000
+    WRITE_RETRIES = 3
+    WRITE_RETRY_DELAY = 0.1
+    WATCHED_TABLES = ("products", "sales", "purchases", "reports")
+    CHANGE_LOG_ROWS = 100000
+    MAX_EXTERNAL_CHANGES = 5000
+
+    EXPORT_QUERIES = {
+        "products": (
+            ("ID", "Name", "Category", "Purchase Price", "Selling Price", "Stock", "Go Down Quantity", "Expiry Date"),
+            "SELECT id, name, category, purchase_price, selling_price, stock_quantity, go_down_quantity, expiry_date FROM products ORDER BY name ASC"
+        ),
+        "sales": (
+            ("ID", "Product Name", "Quantity", "Total Price", "Sale Date"),
+            """
+                SELECT s.id, p.name, s.quantity, s.total_price, s.sale_date
+                FROM sales s
+                JOIN products p ON s.product_id = p.id
+                ORDER BY s.sale_date DESC, s.id DESC
+            """
+        ),
+        "purchases": (
+            ("ID", "Product Name", "Quantity", "Cost Price", "Purchase Date", "Supplier Name"),
+            """
+                SELECT pu.id, p.name, pu.quantity, pu.cost_price, pu.purchase_date, pu.supplier_name
+                FROM purchases pu
+                JOIN products p ON pu.product_id = p.id
+                ORDER BY pu.purchase_date DESC, pu.id DESC
+            """
+        ),
+    }
+
+    def __init__(self, db_name="inventory.db", read_only=False, query_stats=None):
+        self.db_name = db_name
+        self.query_stats = query_stats
+        if read_only:
+            self.conn = sqlite3.connect(Path(os.path.abspath(db_name)).as_uri() + "?mode=ro", uri=True, check_same_thread=False,
+                                        timeout=self.BUSY_TIMEOUT_MS / 1000)
+        else:
+            self.conn = sqlite3.connect(db_name, timeout=self.BUSY_TIMEOUT_MS / 1000)
+            self.conn.execute("PRAGMA journal_mode = WAL")
+            self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.create_function("casefold", 1, lambda text: text.casefold() if text is not None else None, deterministic=True)
+        if query_stats:
+            self.cursor = self.conn.cursor(lambda conn: TimedCursor(conn, query_stats))
+        else:
+            self.cursor = self.conn.cursor()
+        self.transaction_depth = 0
+        self.pending_changes = {}
+        self.change_listeners = []
+        self.data_version = None
+        self.last_change_id = 0
+        self.fuzzy_index = ProductFuzzyIndex()
+        if read_only:
+            self.cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'products_fts'")
+            self.search_index_enabled = self.cursor.fetchone() is not None
+        else:
+            self.create_tables()
+            self._check_and_migrate_schema()
+            self.search_index_enabled = self._create_search_index()
+            self._create_stock_ledger()
+            self._create_word_index()
+            self._create_change_log()
+        self.catalog = ProductCatalog(self)
+
+    def create_tables(self):
+        self.cursor.execute("""
+            CREATE TABLE IF NOT EXISTS products (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL UNIQUE,
+                category TEXT,
+                purchase_price REAL NOT NULL,
+                selling_price REAL NOT NULL,
+                stock_quantity REAL NOT NULL,
+                expiry_date TEXT
+            )
+        """)
+        self.cursor.execute("""
+            CREATE TABLE IF NOT EXISTS sales (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                product_id INTEGER NOT NULL,
+                quantity REAL NOT NULL,
+                sale_date TEXT NOT NULL,
+                total_price REAL NOT NULL,
+                FOREIGN KEY (product_id) REFERENCES products(id)
+            )
+        """)
+        self.cursor.execute("""
+            CREATE TABLE IF NOT EXISTS purchases (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                product_id INTEGER NOT NULL,
+                quantity REAL NOT NULL,
+                purchase_date TEXT NOT NULL,
+                cost_price REAL NOT NULL,
+                supplier_name TEXT,
+                FOREIGN KEY (product_id) REFERENCES products(id)
+            )
+        """)
+        self.cursor.execute("""
+            CREATE TABLE IF NOT EXISTS reports (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                month TEXT NOT NULL UNIQUE,
+                total_revenue REAL NOT NULL,
+                total_expenses REAL NOT NULL,
+                profit REAL NOT NULL
+            )
+        """)
+        self.conn.commit()
+
+    def _check_and_migrate_schema(self):
+        self.cursor.execute("PRAGMA table_info(products)")
+        columns = [column[1] for column in self.cursor.fetchall()]
+        if 'go_down_quantity' not in columns:
+            self.cursor.execute("ALTER TABLE products ADD COLUMN go_down_quantity REAL NOT NULL DEFAULT 0")
+            self.conn.commit()
+
+        self.cursor.execute("PRAGMA table_xinfo(sales)")
+        if 'sale_month' not in [column[1] for column in self.cursor.fetchall()]:
+            self.cursor.execute("ALTER TABLE sales ADD COLUMN sale_month TEXT GENERATED ALWAYS AS (SUBSTR(sale_date, 1, 7)) VIRTUAL")
+
+        self.cursor.execute("PRAGMA table_xinfo(purchases)")
+        if 'purchase_month' not in [column[1] for column in self.cursor.fetchall()]:
+            self.cursor.execute("ALTER TABLE purchases ADD COLUMN purchase_month TEXT GENERATED ALWAYS AS (SUBSTR(purchase_date, 1, 7)) VIRTUAL")
+
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_sales_month ON sales(sale_month)")
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_purchases_month ON purchases(purchase_month)")
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_sales_date ON sales(sale_date, product_id, quantity, total_price)")
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_purchases_date ON purchases(purchase_date, product_id, quantity, cost_price)")
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_sales_product ON sales(product_id, sale_date, quantity, total_price)")
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_purchases_product ON purchases(product_id, purchase_date, quantity, cost_price)")
+        self.conn.commit()
+
+        self._create_monthly_summary()
+
+    def _create_monthly_summary(self):
+        self.cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'monthly_product_summary'")
+        summary_exists = self.cursor.fetchone() is not None
+
+        self.cursor.executescript("""
+            CREATE TABLE IF NOT EXISTS monthly_product_summary (
+                month TEXT NOT NULL,
+                product_id INTEGER NOT NULL,
+                revenue REAL NOT NULL DEFAULT 0,
+                quantity_sold REAL NOT NULL DEFAULT 0,
+                sales_count INTEGER NOT NULL DEFAULT 0,
+                expenses REAL NOT NULL DEFAULT 0,
+                quantity_purchased REAL NOT NULL DEFAULT 0,
+                purchases_count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (month, product_id)
+            );
+
+            CREATE TRIGGER IF NOT EXISTS sales_summary_ai AFTER INSERT ON sales BEGIN
+                INSERT INTO monthly_product_summary (month, product_id, revenue, quantity_sold, sales_count)
+                VALUES (SUBSTR(NEW.sale_date, 1, 7), NEW.product_id, NEW.total_price, NEW.quantity, 1)
+                ON CONFLICT(month, product_id) DO UPDATE SET
+                    revenue = revenue + EXCLUDED.revenue,
+                    quantity_sold = quantity_sold + EXCLUDED.quantity_sold,
+                    sales_count = sales_count + 1;
+            END;
+            CREATE TRIGGER IF NOT EXISTS sales_summary_ad AFTER DELETE ON sales BEGIN
+                UPDATE monthly_product_summary
+                SET revenue = revenue - OLD.total_price, quantity_sold = quantity_sold - OLD.quantity, sales_count = sales_count - 1
+                WHERE month = SUBSTR(OLD.sale_date, 1, 7) AND product_id = OLD.product_id;
+            END;
+            CREATE TRIGGER IF NOT EXISTS sales_summary_au AFTER UPDATE OF product_id, quantity, sale_date, total_price ON sales BEGIN
+                UPDATE monthly_product_summary
+                SET revenue = revenue - OLD.total_price, quantity_sold = quantity_sold - OLD.quantity, sales_count = sales_count - 1
+                WHERE month = SUBSTR(OLD.sale_date, 1, 7) AND product_id = OLD.product_id;
+                INSERT INTO monthly_product_summary (month, product_id, revenue, quantity_sold, sales_count)
+                VALUES (SUBSTR(NEW.sale_date, 1, 7), NEW.product_id, NEW.total_price, NEW.quantity, 1)
+                ON CONFLICT(month, product_id) DO UPDATE SET
+                    revenue = revenue + EXCLUDED.revenue,
+                    quantity_sold = quantity_sold + EXCLUDED.quantity_sold,
+                    sales_count = sales_count + 1;
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS purchases_summary_ai AFTER INSERT ON purchases BEGIN
+                INSERT INTO monthly_product_summary (month, product_id, expenses, quantity_purchased, purchases_count)
+                VALUES (SUBSTR(NEW.purchase_date, 1, 7), NEW.product_id, NEW.quantity * NEW.cost_price, NEW.quantity, 1)
+                ON CONFLICT(month, product_id) DO UPDATE SET
+                    expenses = expenses + EXCLUDED.expenses,
+                    quantity_purchased = quantity_purchased + EXCLUDED.quantity_purchased,
+                    purchases_count = purchases_count + 1;
+            END;
+            CREATE TRIGGER IF NOT EXISTS purchases_summary_ad AFTER DELETE ON purchases BEGIN
+                UPDATE monthly_product_summary
+                SET expenses = expenses - OLD.quantity * OLD.cost_price, quantity_purchased = quantity_purchased - OLD.quantity, purchases_count = purchases_count - 1
+                WHERE month = SUBSTR(OLD.purchase_date, 1, 7) AND product_id = OLD.product_id;
+            END;
+            CREATE TRIGGER IF NOT EXISTS purchases_summary_au AFTER UPDATE OF product_id, quantity, purchase_date, cost_price ON purchases BEGIN
+                UPDATE monthly_product_summary
+                SET expenses = expenses - OLD.quantity * OLD.cost_price, quantity_purchased = quantity_purchased - OLD.quantity, purchases_count = purchases_count - 1
+                WHERE month = SUBSTR(OLD.purchase_date, 1, 7) AND product_id = OLD.product_id;
+                INSERT INTO monthly_product_summary (month, product_id, expenses, quantity_purchased, purchases_count)
+                VALUES (SUBSTR(NEW.purchase_date, 1, 7), NEW.product_id, NEW.quantity * NEW.cost_price, NEW.quantity, 1)
+                ON CONFLICT(month, product_id) DO UPDATE SET
+                    expenses = expenses + EXCLUDED.expenses,
+                    quantity_purchased = quantity_purchased + EXCLUDED.quantity_purchased,
+                    purchases_count = purchases_count + 1;
+            END;
+        """)
+
+        if not summary_exists:
+            self.rebuild_monthly_summary()
+
+    def rebuild_monthly_summary(self):
+        with self.transaction():
+            self._rebuild_monthly_summary()
+
+    def _rebuild_monthly_summary(self):
+        self.cursor.execute("DELETE FROM monthly_product_summary")
+        self.cursor.execute("""
+            INSERT INTO monthly_product_summary (month, product_id, revenue, quantity_sold, sales_count, expenses, quantity_purchased, purchases_count)
+            SELECT month, product_id, SUM(revenue), SUM(quantity_sold), SUM(sales_count), SUM(expenses), SUM(quantity_purchased), SUM(purchases_count)
+            FROM (
+                SELECT sale_month AS month, product_id, SUM(total_price) AS revenue, SUM(quantity) AS quantity_sold, COUNT(*) AS sales_count,
+                       0 AS expenses, 0 AS quantity_purchased, 0 AS purchases_count
+                FROM sales
+                GROUP BY sale_month, product_id
+                UNION ALL
+                SELECT purchase_month, product_id, 0, 0, 0, SUM(quantity * cost_price), SUM(quantity), COUNT(*)
+                FROM purchases
+                GROUP BY purchase_month, product_id
+            )
+            GROUP BY month, product_id
+        """)
+
+    @staticmethod
+    def _month_bounds(month_str):
+        year, month = map(int, month_str.split("-"))
+        next_year, next_month = (year + 1, 1) if month == 12 else (year, month + 1)
+        return month_str, f"{next_year:04d}-{next_month:02d}"
+
+    def subscribe(self, listener):
+        self.change_listeners.append(listener)
+
+    @staticmethod
+    def merge_change(changes, table, row_ids=None):
+        if table in changes and changes[table] is None:
+            return
+        if row_ids is None:
+            changes[table] = None
+        else:
+            changes.setdefault(table, set()).update(row_ids)
+
+    def _record_change(self, table, row_ids=None):
+        self.merge_change(self.pending_changes, table, row_ids)
+
+    def _publish_changes(self):
+        changes, self.pending_changes = self.pending_changes, {}
+        if not changes:
+            return
+        if "products" in changes:
+            self.catalog.mark_changed(changes["products"])
+        for listener in self.change_listeners:
+            listener(changes)
+
+    def _begin_immediate(self):
+        for attempt in range(self.WRITE_RETRIES + 1):
+            try:
+                self.cursor.execute("BEGIN IMMEDIATE")
+                return
+            except sqlite3.OperationalError as e:
+                if "locked" not in str(e):
+                    raise
+                if attempt == self.WRITE_RETRIES:
+                    raise DatabaseBusyError(f"The database is being changed by another program. Try again in a moment. ({e})") from e
+                delay = self.WRITE_RETRY_DELAY * 2 ** attempt * random.uniform(0.5, 1.5)
+                logger.warning("database is locked, retrying in %.0f ms (attempt %d of %d)", delay * 1000, attempt + 1, self.WRITE_RETRIES)
+                time.sleep(delay)
+
+    def check_external_changes(self):
+        if self.transaction_depth:
+            return False
+        data_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        if self.data_version is None or data_version == self.data_version:
+            self.data_version = data_version
+            return False
+        self.data_version = data_version
+        self.cursor.execute("SELECT MIN(id) FROM row_changes")
+        first_change_id = self.cursor.fetchone()[0]
+        self.cursor.execute("SELECT id, table_name, row_id FROM row_changes WHERE id > ? ORDER BY id LIMIT ?",
+                            (self.last_change_id, self.MAX_EXTERNAL_CHANGES + 1))
+        rows = self.cursor.fetchall()
+        if len(rows) > self.MAX_EXTERNAL_CHANGES or (first_change_id or 0) > self.last_change_id + 1:
+            logger.debug("database was changed by another connection, reloading everything")
+            for table in self.WATCHED_TABLES:
+                self._record_change(table)
+            self.cursor.execute("SELECT IFNULL(MAX(id), 0) FROM row_changes")
+            self.last_change_id = self.cursor.fetchone()[0]
+        elif rows:
+            logger.debug("database was changed by another connection: %d row(s)", len(rows))
+            changed = {}
+            for change_id, table, row_id in rows:
+                changed.setdefault(table, set()).add(row_id)
+            for table, row_ids in changed.items():
+                self._record_change(table, row_ids)
+            self.last_change_id = rows[-1][0]
+        self._publish_changes()
+        return True
+
+    def _create_change_log(self):
+        self.cursor.execute("""
+            CREATE TABLE IF NOT EXISTS row_changes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                table_name TEXT NOT NULL,
+                row_id INTEGER NOT NULL
+            )
+        """)
+        for table in self.WATCHED_TABLES:
+            for event, row in (("INSERT", "NEW"), ("UPDATE", "NEW"), ("DELETE", "OLD")):
+                self.cursor.execute(f"""
+                    CREATE TRIGGER IF NOT EXISTS {table}_changes_{event.lower()} AFTER {event} ON {table} BEGIN
+                        INSERT INTO row_changes (table_name, row_id) VALUES ('{table}', {row}.id);
+                    END
+                """)
+        self.cursor.execute("SELECT IFNULL(MIN(id), 0), IFNULL(MAX(id), 0) FROM row_changes")
+        first_change_id, self.last_change_id = self.cursor.fetchone()
+        if self.last_change_id - first_change_id >= self.CHANGE_LOG_ROWS:
+            try:
+                with self.transaction():
+                    self.cursor.execute("DELETE FROM row_changes WHERE id <= ?", (self.last_change_id - self.CHANGE_LOG_ROWS,))
+            except DatabaseBusyError as e:
+                logger.warning("could not trim the change log: %s", e)
+
+    @contextmanager
+    def transaction(self):
+        depth = self.transaction_depth
+        if depth == 0:
+            if self.conn.in_transaction:
+                self.conn.commit()
+            self._begin_immediate()
+        else:
+            self.cursor.execute(f"SAVEPOINT unit_of_work_{depth}")
+        self.transaction_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self.transaction_depth = depth
+            if depth == 0:
+                self.conn.rollback()
+                self.pending_changes = {}
+            else:
+                self.cursor.execute(f"ROLLBACK TO unit_of_work_{depth}")
+                self.cursor.execute(f"RELEASE unit_of_work_{depth}")
+            raise
+        self.transaction_depth = depth
+        if depth == 0:
+            self.conn.commit()
+            self._publish_changes()
+        else:
+            self.cursor.execute(f"RELEASE unit_of_work_{depth}")
+
+    def _create_stock_ledger(self):
+        self.cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'stock_movements'")
+        ledger_exists = self.cursor.fetchone() is not None
+
+        self.cursor.executescript("""
+            CREATE TABLE IF NOT EXISTS stock_movements (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                product_id INTEGER NOT NULL,
+                movement_date TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                ref_id INTEGER,
+                stock_change REAL NOT NULL DEFAULT 0,
+                go_down_change REAL NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS idx_stock_movements_date ON stock_movements(movement_date, product_id, kind, stock_change, go_down_change);
+            CREATE INDEX IF NOT EXISTS idx_stock_movements_opening ON stock_movements(product_id, movement_date) WHERE kind = 'opening';
+
+            CREATE TABLE IF NOT EXISTS stock_snapshot_runs (
+                snapshot_date TEXT PRIMARY KEY
+            );
+            CREATE TABLE IF NOT EXISTS stock_snapshots (
+                snapshot_date TEXT NOT NULL,
+                product_id INTEGER NOT NULL,
+                stock_quantity REAL NOT NULL,
+                go_down_quantity REAL NOT NULL,
+                PRIMARY KEY (snapshot_date, product_id)
+            );
+
+            CREATE TRIGGER IF NOT EXISTS stock_movements_ai AFTER INSERT ON stock_movements BEGIN
+                INSERT INTO stock_snapshots (snapshot_date, product_id, stock_quantity, go_down_quantity)
+                SELECT snapshot_date, NEW.product_id, NEW.stock_change, NEW.go_down_change
+                FROM stock_snapshot_runs
+                WHERE snapshot_date >= NEW.movement_date
+                ON CONFLICT(snapshot_date, product_id) DO UPDATE SET
+                    stock_quantity = stock_quantity + EXCLUDED.stock_quantity,
+                    go_down_quantity = go_down_quantity + EXCLUDED.go_down_quantity;
+            END;
+        """)
+
+        if not ledger_exists:
+            with self.transaction():
+                self._backfill_stock_ledger()
+        try:
+            self.take_stock_snapshots()
+        except DatabaseBusyError as e:
+            logger.warning("could not take stock snapshots, will retry at the next start: %s", e)
+
+    def _backfill_stock_ledger(self):
+        self.cursor.execute("""
+            INSERT INTO stock_movements (product_id, movement_date, kind, ref_id, stock_change, go_down_change)
+            SELECT product_id, sale_date, 'sale', id, -quantity, 0 FROM sales
+            UNION ALL
+            SELECT product_id, purchase_date, 'purchase', id, 0, quantity FROM purchases
+        """)
+        self.cursor.execute("SELECT MIN(movement_date) FROM stock_movements")
+        opening_date = self.cursor.fetchone()[0] or date.today().isoformat()
+        self.cursor.execute("""
+            INSERT INTO stock_movements (product_id, movement_date, kind, ref_id, stock_change, go_down_change)
+            SELECT p.id, ?, 'opening', NULL, p.stock_quantity - IFNULL(m.stock_change, 0), p.go_down_quantity - IFNULL(m.go_down_change, 0)
+            FROM products p
+            LEFT JOIN (
+                SELECT product_id, SUM(stock_change) AS stock_change, SUM(go_down_change) AS go_down_change
+                FROM stock_movements
+                GROUP BY product_id
+            ) m ON m.product_id = p.id
+            WHERE p.stock_quantity - IFNULL(m.stock_change, 0) != 0 OR p.go_down_quantity - IFNULL(m.go_down_change, 0) != 0
+        """, (opening_date,))
+
+    def _record_movements(self, kind, movements):
+        self.cursor.executemany("INSERT INTO stock_movements (product_id, movement_date, kind, ref_id, stock_change, go_down_change) VALUES (?, ?, ?, ?, ?, ?)",
+                                [(product_id, movement_date, kind, ref_id, stock_change, go_down_change)
+                                 for product_id, movement_date, ref_id, stock_change, go_down_change in movements
+                                 if stock_change or go_down_change])
+        if kind in ("sale", "purchase"):
+            earliest = {}
+            for product_id, movement_date, *_ in movements:
+                if product_id not in earliest or movement_date < earliest[product_id]:
+                    earliest[product_id] = movement_date
+            self._backdate_openings(earliest)
+
+    def _backdate_openings(self, earliest):
+        for product_id, movement_date in earliest.items():
+            self.cursor.execute("SELECT id, movement_date, stock_change, go_down_change FROM stock_movements WHERE product_id = ? AND kind = 'opening' AND movement_date > ?",
+                                (product_id, movement_date))
+            for movement_id, opening_date, stock_change, go_down_change in self.cursor.fetchall():
+                self.cursor.execute("UPDATE stock_movements SET movement_date = ? WHERE id = ?", (movement_date, movement_id))
+                self.cursor.execute("""
+                    INSERT INTO stock_snapshots (snapshot_date, product_id, stock_quantity, go_down_quantity)
+                    SELECT snapshot_date, ?, ?, ?
+                    FROM stock_snapshot_runs
+                    WHERE snapshot_date >= ? AND snapshot_date < ?
+                    ON CONFLICT(snapshot_date, product_id) DO UPDATE SET
+                        stock_quantity = stock_quantity + EXCLUDED.stock_quantity,
+                        go_down_quantity = go_down_quantity + EXCLUDED.go_down_quantity
+                """, (product_id, stock_change, go_down_change, movement_date, opening_date))
+
+    @classmethod
+    def _snapshot_dates(cls, first_date, through_date):
+        first = datetime.strptime(first_date[:10], "%Y-%m-%d").date()
+        year, month = first.year, first.month
+        while True:
+            next_year, next_month = (year + 1, 1) if month == 12 else (year, month + 1)
+            month_end = (date(next_year, next_month, 1) - timedelta(days=1)).isoformat()
+            if month_end > through_date:
+                return
+            if month % cls.STOCK_SNAPSHOT_MONTHS == 0:
+                yield month_end
+            year, month = next_year, next_month
+
+    def take_stock_snapshots(self, through_date=None):
+        through_date = through_date or (date.today().replace(day=1) - timedelta(days=1)).isoformat()
+        self.cursor.execute("SELECT MAX(snapshot_date) FROM stock_snapshot_runs")
+        previous = self.cursor.fetchone()[0]
+        if previous:
+            start = (datetime.strptime(previous, "%Y-%m-%d").date() + timedelta(days=1)).isoformat()
+        else:
+            self.cursor.execute("SELECT MIN(movement_date) FROM stock_movements")
+            start = self.cursor.fetchone()[0]
+            if not start:
+                return 0
+
+        try:
+            snapshot_dates = list(self._snapshot_dates(start, through_date))
+        except ValueError:
+            logger.warning("cannot take stock snapshots: %r is not a YYYY-MM-DD date", start)
+            return 0
+        if not snapshot_dates:
+            return 0
+
+        taken = 0
+        with self.transaction():
+            for snapshot_date in snapshot_dates:
+                self.cursor.execute("""
+                    INSERT INTO stock_snapshots (snapshot_date, product_id, stock_quantity, go_down_quantity)
+                    SELECT ?, product_id, SUM(stock_quantity), SUM(go_down_quantity)
+                    FROM (
+                        SELECT product_id, stock_quantity, go_down_quantity
+                        FROM stock_snapshots
+                        WHERE snapshot_date = ?
+                        UNION ALL
+                        SELECT product_id, stock_change, go_down_change
+                        FROM stock_movements
+                        WHERE movement_date > ? AND movement_date <= ?
+                    )
+                    GROUP BY product_id
+                    HAVING SUM(stock_quantity) != 0 OR SUM(go_down_quantity) != 0
+                """, (snapshot_date, previous or "", previous or "", snapshot_date))
+                self.cursor.execute("INSERT INTO stock_snapshot_runs (snapshot_date) VALUES (?)", (snapshot_date,))
+                previous = snapshot_date
+                taken += 1
+        if taken:
+            logger.debug("took %d stock snapshot(s) through %s", taken, previous)
+        return taken
+
+    def _latest_snapshot(self, day, inclusive=True):
+        self.cursor.execute(f"SELECT MAX(snapshot_date) FROM stock_snapshot_runs WHERE snapshot_date {'<=' if inclusive else '<'} ?", (day,))
+        return self.cursor.fetchone()[0] or ""
+
+    def get_stock_as_of(self, as_of_date):
+        snapshot_date = self._latest_snapshot(as_of_date)
+        self.cursor.execute("""
+            SELECT p.name, SUM(x.stock_quantity), SUM(x.go_down_quantity), SUM(x.stock_quantity + x.go_down_quantity)
+            FROM (
+                SELECT product_id, stock_quantity, go_down_quantity
+                FROM stock_snapshots
+                WHERE snapshot_date = ?
+                UNION ALL
+                SELECT product_id, stock_change, go_down_change
+                FROM stock_movements
+                WHERE movement_date > ? AND movement_date <= ?
+            ) x
+            JOIN products p ON x.product_id = p.id
+            GROUP BY p.id
+            ORDER BY p.name ASC
+        """, (snapshot_date, snapshot_date, as_of_date))
+        return self.cursor.fetchall()
+
+    def get_stock_movement_report(self, start_date, end_date):
+        snapshot_date = self._latest_snapshot(start_date, inclusive=False)
+        self.cursor.execute("""
+            SELECT
+                p.name,
+                SUM(x.opening) AS opening,
+                SUM(x.purchased) AS purchased,
+                SUM(x.sold) AS sold,
+                SUM(x.adjusted) AS adjusted,
+                SUM(x.stock_quantity) AS closing_stock,
+                SUM(x.go_down_quantity) AS closing_go_down
+            FROM (
+                SELECT product_id, stock_quantity + go_down_quantity AS opening, 0 AS purchased, 0 AS sold, 0 AS adjusted, stock_quantity, go_down_quantity
+                FROM stock_snapshots
+                WHERE snapshot_date = ?
+                UNION ALL
+                SELECT product_id, stock_change + go_down_change, 0, 0, 0, stock_change, go_down_change
+                FROM stock_movements
+                WHERE movement_date > ? AND movement_date < ?
+                UNION ALL
+                SELECT
+                    product_id,
+                    0,
+                    CASE WHEN kind = 'purchase' THEN go_down_change ELSE 0 END,
+                    CASE WHEN kind = 'sale' THEN -stock_change ELSE 0 END,
+                    CASE WHEN kind IN ('opening', 'edit') THEN stock_change + go_down_change ELSE 0 END,
+                    stock_change,
+                    go_down_change
+                FROM stock_movements
+                WHERE movement_date >= ? AND movement_date <= ?
+            ) x
+            JOIN products p ON x.product_id = p.id
+            GROUP BY p.id
+            HAVING SUM(x.opening) != 0 OR SUM(x.purchased) != 0 OR SUM(x.sold) != 0 OR SUM(x.adjusted) != 0
+            ORDER BY p.name ASC
+        """, (snapshot_date, snapshot_date, start_date, start_date, end_date))
+        return self.cursor.fetchall()
+
+    def _create_word_index(self):
+        self.cursor.executescript("""
+            CREATE TABLE IF NOT EXISTS product_words (
+                word TEXT NOT NULL,
+                product_id INTEGER NOT NULL,
+                PRIMARY KEY (word, product_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_product_words_product ON product_words(product_id);
+
+            CREATE TABLE IF NOT EXISTS product_words_version (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                version INTEGER NOT NULL
+            );
+        """)
+        self.cursor.execute("SELECT COUNT(*) FROM product_words_version")
+        if not self.cursor.fetchone()[0]:
+            with self.transaction():
+                self.cursor.execute("INSERT OR IGNORE INTO product_words_version (id, version) VALUES (1, 0)")
+        self.cursor.execute("SELECT id, name, category FROM products WHERE id NOT IN (SELECT product_id FROM product_words)")
+        missing = self.cursor.fetchall()
+        if missing:
+            try:
+                with self.transaction():
+                    self._index_product_words(missing)
+            except DatabaseBusyError as e:
+                logger.warning("could not index %d new product name(s), will retry at the next start: %s", len(missing), e)
+
+    def _bump_word_index_version(self):
+        self.cursor.execute("SELECT version FROM product_words_version")
+        version = self.cursor.fetchone()[0]
+        self.cursor.execute("UPDATE product_words_version SET version = ?", (version + 1,))
+        if self.fuzzy_index.version != version:
+            return False
+        self.fuzzy_index.version = version + 1
+        return True
+
+    def _index_product_words(self, products):
+        entries = [(product_id, ProductFuzzyIndex.tokenize(name, category)) for product_id, name, category in products]
+        self.cursor.executemany("INSERT OR IGNORE INTO product_words (word, product_id) VALUES (?, ?)",
+                                 [(word, product_id) for product_id, words in entries for word in words])
+        if self._bump_word_index_version():
+            for product_id, words in entries:
+                self.fuzzy_index.add(product_id, words)
+
+    def _unindex_product_words(self, product_id):
+        self.cursor.execute("SELECT word FROM product_words WHERE product_id = ?", (product_id,))
+        words = [row[0] for row in self.cursor.fetchall()]
+        self.cursor.execute("DELETE FROM product_words WHERE product_id = ?", (product_id,))
+        if self._bump_word_index_version():
+            self.fuzzy_index.remove(product_id, words)
+
+    def fuzzy_search_products(self, text, limit=50):
+        self.cursor.execute("SELECT version FROM product_words_version")
+        version = self.cursor.fetchone()[0]
+        if version != self.fuzzy_index.version:
+            started = time.perf_counter()
+            self.cursor.execute("SELECT word, product_id FROM product_words")
+            self.fuzzy_index.load(self.cursor.fetchall(), version)
+            logger.debug("loaded %d product words into the fuzzy index in %.1f ms",
+                         len(self.fuzzy_index.words), (time.perf_counter() - started) * 1000)
+        return self.fuzzy_index.search(text, limit)
+
+    def _create_search_index(self):
+        self.cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name IN ('products_fts', 'purchases_fts')")
+        existing = {row[0] for row in self.cursor.fetchall()}
+        try:
+            self.cursor.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS products_fts
+                USING fts5(name, category, content='products', content_rowid='id', tokenize='trigram')
+            """)
+            self.cursor.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS purchases_fts
+                USING fts5(supplier_name, content='purchases', content_rowid='id', tokenize='trigram')
+            """)
+        except sqlite3.OperationalError:
+            self.conn.rollback()
+            return False
+
+        self.cursor.executescript("""
+            CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN
+                INSERT INTO products_fts(rowid, name, category) VALUES (NEW.id, NEW.name, NEW.category);
+            END;
+            CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN
+                INSERT INTO products_fts(products_fts, rowid, name, category) VALUES ('delete', OLD.id, OLD.name, OLD.category);
+            END;
+            CREATE TRIGGER IF NOT EXISTS products_fts_au AFTER UPDATE OF name, category ON products BEGIN
+                INSERT INTO products_fts(products_fts, rowid, name, category) VALUES ('delete', OLD.id, OLD.name, OLD.category);
+                INSERT INTO products_fts(rowid, name, category) VALUES (NEW.id, NEW.name, NEW.category);
+            END;
+            CREATE TRIGGER IF NOT EXISTS purchases_fts_ai AFTER INSERT ON purchases BEGIN
+                INSERT INTO purchases_fts(rowid, supplier_name) VALUES (NEW.id, NEW.supplier_name);
+            END;
+            CREATE TRIGGER IF NOT EXISTS purchases_fts_ad AFTER DELETE ON purchases BEGIN
+                INSERT INTO purchases_fts(purchases_fts, rowid, supplier_name) VALUES ('delete', OLD.id, OLD.supplier_name);
+            END;
+            CREATE TRIGGER IF NOT EXISTS purchases_fts_au AFTER UPDATE OF supplier_name ON purchases BEGIN
+                INSERT INTO purchases_fts(purchases_fts, rowid, supplier_name) VALUES ('delete', OLD.id, OLD.supplier_name);
+                INSERT INTO purchases_fts(rowid, supplier_name) VALUES (NEW.id, NEW.supplier_name);
+            END;
+        """)
+        if 'products_fts' not in existing:
+            self.cursor.execute("INSERT INTO products_fts(products_fts) VALUES ('rebuild')")
+        if 'purchases_fts' not in existing:
+            self.cursor.execute("INSERT INTO purchases_fts(purchases_fts) VALUES ('rebuild')")
+        self.conn.commit()
+        return True
+
+    def _product_search_clause(self, search_term, column, include_category=True):
+        if not search_term:
+            return "1", ()
+        if self._use_search_index(search_term):
+            phrase = '"' + search_term.replace('"', '""') + '"'
+            query = phrase if include_category else f"name : {phrase}"
+            return f"{column} IN (SELECT rowid FROM products_fts WHERE products_fts MATCH ?)", (query,)
+        if include_category:
+            return f"{column} IN (SELECT id FROM products WHERE instr(casefold(name), ?) OR instr(casefold(IFNULL(category, '')), ?))", (search_term.casefold(),) * 2
+        return f"{column} IN (SELECT id FROM products WHERE instr(casefold(name), ?))", (search_term.casefold(),)
+
+    def _supplier_search_clause(self, search_term, column):
+        if not search_term:
+            return "1", ()
+        if self._use_search_index(search_term):
+            phrase = '"' + search_term.replace('"', '""') + '"'
+            return f"{column} IN (SELECT rowid FROM purchases_fts WHERE purchases_fts MATCH ?)", (phrase,)
+        return "instr(casefold(IFNULL(pu.supplier_name, '')), ?)", (search_term.casefold(),)
+
+    def _use_search_index(self, search_term):
+        return self.search_index_enabled and len(search_term) >= 3 and search_term.isascii()
+
+    def _purchase_search_clause(self, search_term):
+        if not search_term:
+            return "1", ()
+        product_clause, product_params = self._product_search_clause(search_term, "pu.product_id", include_category=False)
+        supplier_clause, supplier_params = self._supplier_search_clause(search_term, "pu.id")
+        return f"({product_clause} OR {supplier_clause})", product_params + supplier_params
+
+    def search_products(self, search_term, with_text=False, limit=None):
+        clause, params = self._product_search_clause(search_term, "id")
+        self.cursor.execute(f"SELECT id, name, category FROM products WHERE {clause} ORDER BY name ASC LIMIT ?", params + (limit or -1,))
+        return self._search_results(self.cursor.fetchall(), with_text)
+
+    def search_sales(self, search_term, with_text=False, limit=None):
+        clause, params = self._product_search_clause(search_term, "s.product_id", include_category=False)
+        self.cursor.execute(f"""
+            SELECT s.id, p.name
+            FROM sales s
+            JOIN products p ON s.product_id = p.id
+            WHERE {clause}
+            ORDER BY s.sale_date DESC, s.id DESC
+            LIMIT ?
+        """, params + (limit or -1,))
+        return self._search_results(self.cursor.fetchall(), with_text)
+
+    def search_purchases(self, search_term, with_text=False, limit=None):
+        clause, params = self._purchase_search_clause(search_term)
+        self.cursor.execute(f"""
+            SELECT pu.id, p.name, pu.supplier_name
+            FROM purchases pu
+            JOIN products p ON pu.product_id = p.id
+            WHERE {clause}
+            ORDER BY pu.purchase_date DESC, pu.id DESC
+            LIMIT ?
+        """, params + (limit or -1,))
+        return self._search_results(self.cursor.fetchall(), with_text)
+
+    def _search_results(self, rows, with_text):
+        if not with_text:
+            return [row[0] for row in rows]
+        return [(row[0], tuple((field or "").casefold() for field in row[1:])) for row in rows]
+
+    def _perform_migration(self, table_name, new_table_schema_sql):
+        old_table_name = f"{table_name}_old"
+        self.conn.execute("BEGIN TRANSACTION;")
+        try:
+            self.cursor.execute(f"ALTER TABLE {table_name} RENAME TO {old_table_name};")
+            new_table_create_sql = new_table_schema_sql.replace(f"{table_name}_new", table_name)
+            self.cursor.execute(new_table_create_sql)
+
+            self.cursor.execute(f"PRAGMA table_info({old_table_name});")
+            old_columns = [col[1] for col in self.cursor.fetchall()]
+            columns_str = ", ".join(old_columns)
+            placeholders = ", ".join(["?" for _ in old_columns])
+
+            self.cursor.execute(f"SELECT {columns_str} FROM {old_table_name};")
+            data_to_copy = self.cursor.fetchall()
+
+            self.cursor.executemany(f"INSERT INTO {table_name} ({columns_str}) VALUES ({placeholders});", data_to_copy)
+
+            self.cursor.execute(f"DROP TABLE {old_table_name};")
+
+            self.conn.commit()
+        except Exception as e:
+            self.conn.rollback()
+            raise Exception(f"Migration failed for table {table_name}: {e}")
+
+    def add_product(self, name, category, purchase_price, selling_price, stock_quantity, go_down_quantity, expiry_date):
+        try:
+            with self.transaction():
+                self.cursor.execute("INSERT INTO products (name, category, purchase_price, selling_price, stock_quantity, go_down_quantity, expiry_date) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                     (name, category, purchase_price, selling_price, stock_quantity, go_down_quantity, expiry_date))
+                product_id = self.cursor.lastrowid
+                self._record_movements("opening", [(product_id, date.today().isoformat(), None, stock_quantity, go_down_quantity)])
+                self._index_product_words([(product_id, name, category)])
+                self._record_change("products", (product_id,))
+            return product_id
+        except sqlite3.IntegrityError as e:
+            raise DuplicateProductError(f"Product '{name}' already exists.") from e
+        except sqlite3.Error as e:
+            raise InventoryError(f"Failed to add product: {e}") from e
+
+    def get_products(self):
+        self.cursor.execute("SELECT id, name, category, purchase_price, selling_price, stock_quantity, go_down_quantity, expiry_date FROM products ORDER BY name ASC")
+        return self.cursor.fetchall()
+
+    def count_products(self, search_term=""):
+        clause, params = self._product_search_clause(search_term, "id")
+        self.cursor.execute(f"SELECT COUNT(*) FROM products WHERE {clause}", params)
+        return self.cursor.fetchone()[0]
+
+    def get_products_page(self, offset, limit, search_term=""):
+        clause, params = self._product_search_clause(search_term, "id")
+        self.cursor.execute(f"""
+            SELECT id, name, category, purchase_price, selling_price, stock_quantity, go_down_quantity, expiry_date
+            FROM products
+            WHERE {clause}
+            ORDER BY name ASC
+            LIMIT ? OFFSET ?
+        """, params + (limit, offset))
+        return self.cursor.fetchall()
+
+    def get_products_by_ids(self, product_ids):
+        placeholders = ", ".join("?" for _ in product_ids)
+        self.cursor.execute(f"SELECT id, name, category, purchase_price, selling_price, stock_quantity, go_down_quantity, expiry_date FROM products WHERE id IN ({placeholders})", tuple(product_ids))
+        rows = {row[0]: row for row in self.cursor.fetchall()}
+        return [rows[product_id] for product_id in product_ids if product_id in rows]
+
+    def get_product_by_id(self, product_id):
+        self.cursor.execute("SELECT id, name, category, purchase_price, selling_price, stock_quantity, go_down_quantity, expiry_date FROM products WHERE id = ?", (product_id,))
+        return self.cursor.fetchone()
+
+    def get_product_by_name(self, name):
+        self.cursor.execute("SELECT id, name, category, purchase_price, selling_price, stock_quantity, expiry_date FROM products WHERE name = ?", (name,))
+        return self.cursor.fetchone()
+
+    def update_product(self, product_id, name, category, purchase_price, selling_price, stock_change, go_down_change, expiry_date):
+        try:
+            with self.transaction():
+                self.cursor.execute("SELECT name, category FROM products WHERE id = ?", (product_id,))
+                row = self.cursor.fetchone()
+                if not row:
+                    raise NotFoundError(f"Product ID {product_id} does not exist.")
+                self.cursor.execute("UPDATE products SET name=?, category=?, purchase_price=?, selling_price=?, expiry_date=? WHERE id=?",
+                                     (name, category, purchase_price, selling_price, expiry_date, product_id))
+                if stock_change:
+                    self._apply_stock_change(product_id, stock_change, False, "edit", date.today().isoformat())
+                if go_down_change:
+                    self._apply_stock_change(product_id, go_down_change, True, "edit", date.today().isoformat())
+                if (name, category) != row:
+                    self._unindex_product_words(product_id)
+                    self._index_product_words([(product_id, name, category)])
+                self._record_change("products", (product_id,))
+        except sqlite3.IntegrityError as e:
+            raise DuplicateProductError(f"Product name '{name}' already exists for another product.") from e
+        except sqlite3.Error as e:
+            raise InventoryError(f"Failed to update product: {e}") from e
+
+    def delete_product(self, product_id):
+        try:
+            with self.transaction():
+                self.cursor.execute("SELECT stock_quantity, go_down_quantity FROM products WHERE id = ?", (product_id,))
+                row = self.cursor.fetchone()
+                if not row:
+                    raise NotFoundError(f"Product ID {product_id} does not exist.")
+                self.cursor.execute("DELETE FROM products WHERE id = ?", (product_id,))
+                self._record_movements("edit", [(product_id, date.today().isoformat(), None, -row[0], -row[1])])
+                self._unindex_product_words(product_id)
+                self._record_change("products", (product_id,))
+        except sqlite3.Error as e:
+            raise InventoryError(f"Failed to delete product: {e}") from e
+
+    def transfer_stock(self, product_id, amount):
+        with self.transaction():
+            self.cursor.execute("""
+                UPDATE products SET stock_quantity = stock_quantity + ?, go_down_quantity = go_down_quantity - ?
+                WHERE id = ? AND go_down_quantity >= ?
+            """, (amount, amount, product_id, amount))
+            if self.cursor.rowcount == 0:
+                self._raise_shortage(product_id, "go_down_quantity", amount)
+
+            self.cursor.execute("SELECT stock_quantity, go_down_quantity FROM products WHERE id = ?", (product_id,))
+            new_stock, new_go_down = self.cursor.fetchone()
+            self._record_movements("transfer", [(product_id, date.today().isoformat(), None, amount, -amount)])
+            self._record_change("products", (product_id,))
+
+        return new_stock, new_go_down
+
+    def _apply_stock_change(self, product_id, quantity_change, go_down, kind, movement_date, ref_id=None):
+        column = "go_down_quantity" if go_down else "stock_quantity"
+        if quantity_change < 0 and kind != "edit":
+            self.cursor.execute(f"UPDATE products SET {column} = {column} + ? WHERE id = ? AND {column} >= ?",
+                                 (quantity_change, product_id, -quantity_change))
+            if self.cursor.rowcount == 0:
+                self._raise_shortage(product_id, column, -quantity_change)
+        else:
+            self.cursor.execute(f"UPDATE products SET {column} = {column} + ? WHERE id = ?", (quantity_change, product_id))
+        self._record_movements(kind, [(product_id, movement_date, ref_id, 0 if go_down else quantity_change, quantity_change if go_down else 0)])
+        self._record_change("products", (product_id,))
+
+    def _raise_shortage(self, product_id, column, needed):
+        self.cursor.execute(f"SELECT name, {column} FROM products WHERE id = ?", (product_id,))
+        row = self.cursor.fetchone()
+        if not row:
+            raise NotFoundError(f"Product ID {product_id} does not exist.")
+        name, available = row
+        where = "in go-down" if column == "go_down_quantity" else "in stock"
+        raise StockError(f"Not enough {name} {where}. Needed {needed:.2f}, available {available:.2f}.")
+
+    def update_product_stock(self, product_id, quantity_change, go_down):
+        try:
+            with self.transaction():
+                self._apply_stock_change(product_id, quantity_change, go_down, "edit", date.today().isoformat())
+        except sqlite3.Error as e:
+            raise StockError(f"Failed to update stock: {e}") from e
+
+    def record_sale(self, product_id, quantity, total_price, sale_date):
+        try:
+            with self.transaction():
+                self.cursor.execute("INSERT INTO sales (product_id, quantity, total_price, sale_date) VALUES (?, ?, ?, ?)",
+                                     (product_id, quantity, total_price, sale_date))
+                sale_id = self.cursor.lastrowid
+                self._record_change("sales", (sale_id,))
+                self._apply_stock_change(product_id, -quantity, False, "sale", sale_date, sale_id)
+            return sale_id
+        except sqlite3.Error as e:
+            raise InventoryError(f"Failed to record sale: {e}") from e
+
+    def record_sales_bulk(self, lines, sale_date):
+        required = {}
+        for product_id, quantity, total_price in lines:
+            if quantity <= 0:
+                raise InventoryError("Every basket line needs a quantity greater than zero.")
+            required[product_id] = required.get(product_id, 0) + quantity
+
+        if not required:
+            raise InventoryError("The basket is empty.")
+
+        try:
+            with self.transaction():
+                placeholders = ", ".join("?" for _ in required)
+                self.cursor.execute(f"SELECT id, name, stock_quantity FROM products WHERE id IN ({placeholders})", tuple(required))
+                stock = {product_id: (name, stock_quantity) for product_id, name, stock_quantity in self.cursor.fetchall()}
+
+                if len(stock) != len(required):
+                    raise NotFoundError("One or more products in the basket no longer exist.")
+
+                shortages = [
+                    f"{stock[product_id][0]} (needed {quantity:.2f}, available {stock[product_id][1]:.2f})"
+                    for product_id, quantity in required.items()
+                    if quantity > stock[product_id][1]
+                ]
+                if shortages:
+                    raise StockError("Not enough stock available for:\n" + "\n".join(shortages))
+
+                sale_ids = []
+                for product_id, quantity, total_price in lines:
+                    self.cursor.execute("INSERT INTO sales (product_id, quantity, total_price, sale_date) VALUES (?, ?, ?, ?)",
+                                        (product_id, quantity, total_price, sale_date))
+                    sale_ids.append(self.cursor.lastrowid)
+                self.cursor.executemany("UPDATE products SET stock_quantity = stock_quantity - ? WHERE id = ?",
+                                         [(quantity, product_id) for product_id, quantity in required.items()])
+                self._record_movements("sale", [(product_id, sale_date, sale_id, -quantity, 0)
+                                                for sale_id, (product_id, quantity, total_price) in zip(sale_ids, lines)])
+                self._record_change("sales", sale_ids)
+                self._record_change("products", required)
+            return len(lines)
+        except sqlite3.Error as e:
+            raise InventoryError(f"Failed to record sales: {e}") from e
+
+    def _products_by_name(self, names):
+        names = list(set(names))
+        product_ids = {}
+        for start in range(0, len(names), 500):
+            chunk = names[start:start + 500]
+            placeholders = ", ".join("?" for _ in chunk)
+            self.cursor.execute(f"SELECT name, id, selling_price, stock_quantity FROM products WHERE name IN ({placeholders})", chunk)
+            for name, product_id, selling_price, stock_quantity in self.cursor.fetchall():
+                product_ids[name] = (product_id, selling_price, stock_quantity)
+        return product_ids
+
+    def import_products_batch(self, rows):
+        rejects = []
+        existing = self._products_by_name(row["name"] for row in rows)
+        accepted = []
+        seen = set()
+        for row in rows:
+            if row["name"] in existing or row["name"] in seen:
+                rejects.append((row, f"Product '{row['name']}' already exists."))
+                continue
+            seen.add(row["name"])
+            accepted.append(row)
+
+        with self.transaction():
+            self.cursor.executemany("INSERT INTO products (name, category, purchase_price, selling_price, stock_quantity, go_down_quantity, expiry_date) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                     [(row["name"], row["category"], row["purchase_price"], row["selling_price"], row["stock_quantity"], row["go_down_quantity"], row["expiry_date"]) for row in accepted])
+            if accepted:
+                imported = self._products_by_name(row["name"] for row in accepted)
+                today = date.today().isoformat()
+                self._record_movements("opening", [(imported[row["name"]][0], today, None, row["stock_quantity"], row["go_down_quantity"]) for row in accepted])
+                self._index_product_words([(imported[row["name"]][0], row["name"], row["category"]) for row in accepted])
+                self._record_change("products")
+        return len(accepted), rejects
+
+    def import_purchases_batch(self, rows):
+        rejects = []
+        products = self._products_by_name(row["product_name"] for row in rows)
+        accepted = []
+        go_down_changes = {}
+        for row in rows:
+            if row["product_name"] not in products:
+                rejects.append((row, f"Product '{row['product_name']}' does not exist."))
+                continue
+            product_id = products[row["product_name"]][0]
+            go_down_changes[product_id] = go_down_changes.get(product_id, 0) + row["quantity"]
+            accepted.append((product_id, row["quantity"], row["cost_price"], row["purchase_date"], row["supplier_name"]))
+
+        with self.transaction():
+            self.cursor.executemany("INSERT INTO purchases (product_id, quantity, cost_price, purchase_date, supplier_name) VALUES (?, ?, ?, ?, ?)", accepted)
+            self.cursor.executemany("UPDATE products SET go_down_quantity = go_down_quantity + ? WHERE id = ?",
+                                     [(quantity, product_id) for product_id, quantity in go_down_changes.items()])
+            self._record_movements("purchase", [(product_id, purchase_date, None, 0, quantity) for product_id, quantity, cost_price, purchase_date, supplier_name in accepted])
+            if accepted:
+                self._record_change("purchases")
+                self._record_change("products", go_down_changes)
+        return len(accepted), rejects
+
+    def import_sales_batch(self, rows):
+        rejects = []
+        with self.transaction():
+            products = self._products_by_name(row["product_name"] for row in rows)
+            available = {product_id: stock_quantity for product_id, selling_price, stock_quantity in products.values()}
+            sold = {}
+            accepted = []
+            for row in rows:
+                if row["product_name"] not in products:
+                    rejects.append((row, f"Product '{row['product_name']}' does not exist."))
+                    continue
+                product_id, selling_price, stock_quantity = products[row["product_name"]]
+                if row["quantity"] > available[product_id]:
+                    rejects.append((row, f"Not enough stock available. Current stock: {available[product_id]:.2f}"))
+                    continue
+                available[product_id] -= row["quantity"]
+                sold[product_id] = sold.get(product_id, 0) + row["quantity"]
+                total_price = row["total_price"] if row["total_price"] is not None else row["quantity"] * selling_price
+                accepted.append((product_id, row["quantity"], total_price, row["sale_date"]))
+
+            self.cursor.executemany("INSERT INTO sales (product_id, quantity, total_price, sale_date) VALUES (?, ?, ?, ?)", accepted)
+            self.cursor.executemany("UPDATE products SET stock_quantity = stock_quantity - ? WHERE id = ?",
+                                     [(quantity, product_id) for product_id, quantity in sold.items()])
+            self._record_movements("sale", [(product_id, sale_date, None, -quantity, 0) for product_id, quantity, total_price, sale_date in accepted])
+            if accepted:
+                self._record_change("sales")
+                self._record_change("products", sold)
+        return len(accepted), rejects
+
+    def get_sales_report(self):
+        self.cursor.execute("""
+            SELECT s.id, p.name, s.quantity, s.total_price, s.sale_date
+            FROM sales s
+            JOIN products p ON s.product_id = p.id
+            ORDER BY s.sale_date DESC
+        """)
+        return self.cursor.fetchall()
+
+    def count_sales(self, search_term=""):
+        if not search_term:
+            self.cursor.execute("SELECT IFNULL(SUM(m.sales_count), 0) FROM monthly_product_summary m JOIN products p ON m.product_id = p.id")
+            return self.cursor.fetchone()[0]
+        clause, params = self._product_search_clause(search_term, "s.product_id", include_category=False)
+        self.cursor.execute(f"""
+            SELECT COUNT(*)
+            FROM sales s
+            JOIN products p ON s.product_id = p.id
+            WHERE {clause}
+        """, params)
+        return self.cursor.fetchone()[0]
+
+    def get_sales_page(self, offset, limit, search_term="", after=None):
+        clause, params = self._product_search_clause(search_term, "s.product_id", include_category=False)
+        if after:
+            clause, params = f"(s.sale_date, s.id) < (?, ?) AND {clause}", tuple(after) + params
+        self.cursor.execute(f"""
+            SELECT s.id, p.name, s.quantity, s.total_price, s.sale_date
+            FROM sales s
+            JOIN products p ON s.product_id = p.id
+            WHERE {clause}
+            ORDER BY s.sale_date DESC, s.id DESC
+            LIMIT ? OFFSET ?
+        """, params + (limit, offset))
+        return self.cursor.fetchall()
+
+    def get_last_sale_id(self):
+        self.cursor.execute("SELECT IFNULL(MAX(id), 0) FROM sales")
+        return self.cursor.fetchone()[0]
+
+    def get_sales_by_ids(self, sale_ids):
+        placeholders = ", ".join("?" for _ in sale_ids)
+        self.cursor.execute(f"""
+            SELECT s.id, p.name, s.quantity, s.total_price, s.sale_date
+            FROM sales s
+            JOIN products p ON s.product_id = p.id
+            WHERE s.id IN ({placeholders})
+        """, tuple(sale_ids))
+        rows = {row[0]: row for row in self.cursor.fetchall()}
+        return [rows[sale_id] for sale_id in sale_ids if sale_id in rows]
+
+    def get_sale_by_id(self, sale_id):
+        self.cursor.execute("SELECT id, product_id, quantity, total_price, sale_date FROM sales WHERE id = ?", (sale_id,))
+        return self.cursor.fetchone()
+
+    def update_sale(self, sale_id, product_id, new_quantity, new_total_price, new_sale_date):
+        try:
+            with self.transaction():
+                self.cursor.execute("SELECT product_id, quantity, sale_date FROM sales WHERE id = ?", (sale_id,))
+                row = self.cursor.fetchone()
+                if not row:
+                    raise NotFoundError(f"Sale ID {sale_id} does not exist.")
+                previous_product_id, previous_quantity, previous_sale_date = row
+
+                self.cursor.execute("UPDATE sales SET product_id=?, quantity=?, total_price=?, sale_date=? WHERE id=?",
+                                     (product_id, new_quantity, new_total_price, new_sale_date, sale_id))
+                self._record_change("sales", (sale_id,))
+
+                if previous_product_id != product_id or previous_sale_date != new_sale_date:
+                    self._apply_stock_change(previous_product_id, previous_quantity, False, "sale", previous_sale_date, sale_id)
+                    self._apply_stock_change(product_id, -new_quantity, False, "sale", new_sale_date, sale_id)
+                elif new_quantity != previous_quantity:
+                    self._apply_stock_change(product_id, previous_quantity - new_quantity, False, "sale", new_sale_date, sale_id)
+        except sqlite3.Error as e:
+            raise InventoryError(f"Failed to update sale: {e}") from e
+
+    def delete_sale(self, sale_id):
+        try:
+            with self.transaction():
+                self.cursor.execute("SELECT product_id, quantity, sale_date FROM sales WHERE id = ?", (sale_id,))
+                deleted_sale_data = self.cursor.fetchone()
+
+                if not deleted_sale_data:
+                    raise NotFoundError(f"Sale ID {sale_id} does not exist.")
+
+                product_id, quantity, sale_date = deleted_sale_data
+                self.cursor.execute("DELETE FROM sales WHERE id = ?", (sale_id,))
+                if self.cursor.rowcount == 0:
+                    raise NotFoundError(f"Sale ID {sale_id} does not exist.")
+                self._record_change("sales", (sale_id,))
+                self._apply_stock_change(product_id, quantity, False, "sale", sale_date, sale_id)
+        except sqlite3.Error as e:
+            raise InventoryError(f"Failed to delete sale: {e}") from e
+
+    def record_purchase(self, product_id, quantity, cost_price, purchase_date, supplier_name):
+        try:
+            with self.transaction():
+                self.cursor.execute("INSERT INTO purchases (product_id, quantity, cost_price, purchase_date, supplier_name) VALUES (?, ?, ?, ?, ?)",
+                                     (product_id, quantity, cost_price, purchase_date, supplier_name))
+                purchase_id = self.cursor.lastrowid
+                self._record_change("purchases", (purchase_id,))
+                self._apply_stock_change(product_id, quantity, True, "purchase", purchase_date, purchase_id)
+            return purchase_id
+        except sqlite3.Error as e:
+            raise InventoryError(f"Failed to record purchase: {e}") from e
+
+    def get_purchases_report(self):
+        self.cursor.execute("""
+            SELECT pu.id, p.name, pu.quantity, pu.cost_price, pu.purchase_date, pu.supplier_name
+            FROM purchases pu
+            JOIN products p ON pu.product_id = p.id
+            ORDER BY pu.purchase_date DESC
+        """)
+        return self.cursor.fetchall()
+
+    def count_purchases(self, search_term=""):
+        if not search_term:
+            self.cursor.execute("SELECT IFNULL(SUM(m.purchases_count), 0) FROM monthly_product_summary m JOIN products p ON m.product_id = p.id")
+            return self.cursor.fetchone()[0]
+        clause, params = self._purchase_search_clause(search_term)
+        self.cursor.execute(f"""
+            SELECT COUNT(*)
+            FROM purchases pu
+            JOIN products p ON pu.product_id = p.id
+            WHERE {clause}
+        """, params)
+        return self.cursor.fetchone()[0]
+
+    def get_purchases_page(self, offset, limit, search_term="", after=None):
+        clause, params = self._purchase_search_clause(search_term)
+        if after:
+            clause, params = f"(pu.purchase_date, pu.id) < (?, ?) AND {clause}", tuple(after) + params
+        self.cursor.execute(f"""
+            SELECT pu.id, p.name, pu.quantity, pu.cost_price, pu.purchase_date, pu.supplier_name
+            FROM purchases pu
+            JOIN products p ON pu.product_id = p.id
+            WHERE {clause}
+            ORDER BY pu.purchase_date DESC, pu.id DESC
+            LIMIT ? OFFSET ?
+        """, params + (limit, offset))
+        return self.cursor.fetchall()
+
+    def get_last_purchase_id(self):
+        self.cursor.execute("SELECT IFNULL(MAX(id), 0) FROM purchases")
+        return self.cursor.fetchone()[0]
+
+    def get_purchases_by_ids(self, purchase_ids):
+        placeholders = ", ".join("?" for _ in purchase_ids)
+        self.cursor.execute(f"""
+            SELECT pu.id, p.name, pu.quantity, pu.cost_price, pu.purchase_date, pu.supplier_name
+            FROM purchases pu
+            JOIN products p ON pu.product_id = p.id
+            WHERE pu.id IN ({placeholders})
+        """, tuple(purchase_ids))
+        rows = {row[0]: row for row in self.cursor.fetchall()}
+        return [rows[purchase_id] for purchase_id in purchase_ids if purchase_id in rows]
+
+    def get_purchase_by_id(self, purchase_id):
+        self.cursor.execute("SELECT id, product_id, quantity, cost_price, purchase_date, supplier_name FROM purchases WHERE id = ?", (purchase_id,))
+        return self.cursor.fetchone()
+
+    def update_purchase(self, purchase_id, product_id, new_quantity, new_cost_price, new_purchase_date, new_supplier_name):
+        try:
+            with self.transaction():
+                self.cursor.execute("SELECT product_id, quantity, purchase_date FROM purchases WHERE id = ?", (purchase_id,))
+                row = self.cursor.fetchone()
+                if not row:
+                    raise NotFoundError(f"Purchase ID {purchase_id} does not exist.")
+                previous_product_id, previous_quantity, previous_purchase_date = row
+
+                self.cursor.execute("UPDATE purchases SET product_id=?, quantity=?, cost_price=?, purchase_date=?, supplier_name=? WHERE id=?",
+                                     (product_id, new_quantity, new_cost_price, new_purchase_date, new_supplier_name, purchase_id))
+                self._record_change("purchases", (purchase_id,))
+
+                stock_adjustment = new_quantity - previous_quantity
+                if previous_product_id != product_id or previous_purchase_date != new_purchase_date:
+                    self._apply_stock_change(previous_product_id, -previous_quantity, True, "purchase", previous_purchase_date, purchase_id)
+                    self._apply_stock_change(product_id, new_quantity, True, "purchase", new_purchase_date, purchase_id)
+                elif stock_adjustment != 0:
+                    self._apply_stock_change(product_id, stock_adjustment, True, "purchase", new_purchase_date, purchase_id)
+        except sqlite3.Error as e:
+            raise InventoryError(f"Failed to update purchase: {e}") from e
+
+    def delete_purchase(self, purchase_id):
+        try:
+            with self.transaction():
+                self.cursor.execute("SELECT product_id, quantity, purchase_date FROM purchases WHERE id = ?", (purchase_id,))
+                deleted_purchase_data = self.cursor.fetchone()
+
+                if not deleted_purchase_data:
+                    raise NotFoundError(f"Purchase ID {purchase_id} does not exist.")
+
+                product_id, quantity, purchase_date = deleted_purchase_data
+                self.cursor.execute("DELETE FROM purchases WHERE id = ?", (purchase_id,))
+                if self.cursor.rowcount == 0:
+                    raise NotFoundError(f"Purchase ID {purchase_id} does not exist.")
+                self._record_change("purchases", (purchase_id,))
+                self._apply_stock_change(product_id, -quantity, True, "purchase", purchase_date, purchase_id)
+        except sqlite3.Error as e:
+            raise InventoryError(f"Failed to delete purchase: {e}") from e
+
+    def calculate_monthly_revenue(self, month_str):
+        self.cursor.execute("SELECT SUM(revenue) FROM monthly_product_summary WHERE month = ?", (month_str,))
+        return self.cursor.fetchone()[0] or 0.0
+
+    def calculate_monthly_expenses(self, month_str):
+        self.cursor.execute("SELECT SUM(expenses) FROM monthly_product_summary WHERE month = ?", (month_str,))
+        return self.cursor.fetchone()[0] or 0.0
+
+    def calculate_product_profit(self, product_id):
+        self.cursor.execute("SELECT SUM(total_price) FROM sales WHERE product_id = ?", (product_id,))
+        total_revenue = self.cursor.fetchone()[0] or 0.0
+
+        self.cursor.execute("SELECT SUM(cost_price * quantity) FROM purchases WHERE product_id = ?", (product_id,))
+        total_expenses = self.cursor.fetchone()[0] or 0.0
+        
+        profit = total_revenue - total_expenses
+        return total_revenue, total_expenses, profit
+        
+    def get_monthly_sales_by_product(self, month_str):
+        self.cursor.execute("""
+            SELECT p.name, SUM(m.quantity_sold)
+            FROM monthly_product_summary m
+            JOIN products p ON m.product_id = p.id
+            WHERE m.month = ? AND m.sales_count > 0
+            GROUP BY p.name
+            ORDER BY p.name ASC
+        """, (month_str,))
+        return self.cursor.fetchall()
+        
+    def get_available_report_months(self):
+        self.cursor.execute("SELECT DISTINCT month FROM monthly_product_summary WHERE sales_count > 0 ORDER BY month DESC")
+        return [row[0] for row in self.cursor.fetchall()]
+
+    def get_monthly_trend_report(self, start_date, end_date):
+        start_month, end_month = start_date[:7], end_date[:7]
+        self.cursor.execute("""
+            SELECT month, SUM(revenue), SUM(expenses)
+            FROM monthly_product_summary
+            WHERE month BETWEEN ? AND ?
+            GROUP BY month
+        """, (start_month, end_month))
+        totals = {month: (revenue, expenses) for month, revenue, expenses in self.cursor.fetchall()}
+        if not totals:
+            return []
+
+        rows = []
+        previous = None
+        for month in self._month_range(start_month, end_month):
+            revenue, expenses = totals.get(month, (0.0, 0.0))
+            profit = revenue - expenses
+            if previous is None:
+                rows.append((month, revenue, expenses, profit, None, None))
+            else:
+                rows.append((month, revenue, expenses, profit, revenue - previous[0], profit - previous[1]))
+            previous = (revenue, profit)
+        return rows
+
+    @classmethod
+    def _month_range(cls, start_month, end_month):
+        month = start_month
+        while month <= end_month:
+            yield month
+            month = cls._month_bounds(month)[1]
+
+    def save_reports(self, reports):
+        try:
+            with self.transaction():
+                self.cursor.executemany("""
+                    INSERT INTO reports (month, total_revenue, total_expenses, profit)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT(month) DO UPDATE SET
+                        total_revenue = EXCLUDED.total_revenue,
+                        total_expenses = EXCLUDED.total_expenses,
+                        profit = EXCLUDED.profit
+                """, reports)
+                self._record_change("reports")
+        except sqlite3.Error as e:
+            raise ReportError(f"Failed to save/update report: {e}") from e
+
+    def save_or_update_report(self, month, total_revenue, total_expenses, profit):
+        self.save_reports([(month, total_revenue, total_expenses, profit)])
+
+    def get_stored_reports(self):
+        self.cursor.execute("SELECT id, month, total_revenue, total_expenses, profit FROM reports ORDER BY month DESC")
+        return self.cursor.fetchall()
+
+    def delete_stored_report(self, report_id):
+        try:
+            with self.transaction():
+                self.cursor.execute("DELETE FROM reports WHERE id = ?", (report_id,))
+                self._record_change("reports", (report_id,))
+        except sqlite3.Error as e:
+            raise ReportError(f"Failed to delete report: {e}") from e
+        
+    def get_sales_report_by_date_range(self, start_date, end_date):
+        full_months = self._full_month_span(start_date, end_date)
+        if not full_months:
+            self.cursor.execute("""
+                SELECT 
+                    p.name, 
+                    SUM(s.total_price) AS total_revenue, 
+                    SUM(s.quantity) AS total_quantity_sold
+                FROM sales s
+                JOIN products p ON s.product_id = p.id
+                WHERE s.sale_date BETWEEN ? AND ?
+                GROUP BY p.name
+                ORDER BY total_revenue DESC
+            """, (start_date, end_date))
+            return self.cursor.fetchall()
+
+        first_month, last_month, next_month = full_months
+        self.cursor.execute("""
+            SELECT
+                p.name,
+                SUM(x.revenue) AS total_revenue,
+                SUM(x.quantity) AS total_quantity_sold
+            FROM (
+                SELECT product_id, revenue, quantity_sold AS quantity
+                FROM monthly_product_summary
+                WHERE month BETWEEN ? AND ? AND sales_count > 0
+                UNION ALL
+                SELECT product_id, total_price, quantity
+                FROM sales
+                WHERE sale_date >= ? AND sale_date < ?
+                UNION ALL
+                SELECT product_id, total_price, quantity
+                FROM sales
+                WHERE sale_date >= ? AND sale_date <= ?
+            ) x
+            JOIN products p ON x.product_id = p.id
+            GROUP BY p.name
+            ORDER BY total_revenue DESC
+        """, (first_month, last_month, start_date, first_month, next_month, end_date))
+        return self.cursor.fetchall()
+
+    def get_product_profitability_report(self, start_date, end_date):
+        full_months = self._full_month_span(start_date, end_date)
+        if not full_months:
+            source = """
+                SELECT product_id, total_price AS revenue, 0 AS expenses
+                FROM sales
+                WHERE sale_date BETWEEN ? AND ?
+                UNION ALL
+                SELECT product_id, 0, quantity * cost_price
+                FROM purchases
+                WHERE purchase_date BETWEEN ? AND ?
+            """
+            params = (start_date, end_date, start_date, end_date)
+        else:
+            first_month, last_month, next_month = full_months
+            source = """
+                SELECT product_id, revenue, expenses
+                FROM monthly_product_summary
+                WHERE month BETWEEN ? AND ?
+                UNION ALL
+                SELECT product_id, total_price, 0
+                FROM sales
+                WHERE (sale_date >= ? AND sale_date < ?) OR (sale_date >= ? AND sale_date <= ?)
+                UNION ALL
+                SELECT product_id, 0, quantity * cost_price
+                FROM purchases
+                WHERE (purchase_date >= ? AND purchase_date < ?) OR (purchase_date >= ? AND purchase_date <= ?)
+            """
+            edges = (start_date, first_month, next_month, end_date)
+            params = (first_month, last_month) + edges + edges
+
+        self.cursor.execute(f"""
+            SELECT
+                p.name,
+                SUM(x.revenue) AS total_revenue,
+                SUM(x.expenses) AS total_expenses,
+                SUM(x.revenue) - SUM(x.expenses) AS profit,
+                CASE WHEN SUM(x.revenue) != 0 THEN (SUM(x.revenue) - SUM(x.expenses)) * 100.0 / SUM(x.revenue) END AS margin
+            FROM ({source}) x
+            JOIN products p ON x.product_id = p.id
+            GROUP BY p.id
+            HAVING SUM(x.revenue) != 0 OR SUM(x.expenses) != 0
+            ORDER BY profit DESC
+        """, params)
+        return self.cursor.fetchall()
+
+    @staticmethod
+    def _full_month_span(start_date, end_date):
+        try:
+            start = datetime.strptime(start_date, "%Y-%m-%d").date()
+            end = datetime.strptime(end_date, "%Y-%m-%d").date()
+        except ValueError:
+            return None
+
+        first = start if start.day == 1 else (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+        after_last = (end + timedelta(days=1)).replace(day=1)
+        if first >= after_last:
+            return None
+        last = after_last - timedelta(days=1)
+        return first.strftime("%Y-%m"), last.strftime("%Y-%m"), after_last.strftime("%Y-%m")
+
+    def close(self):
+        self.conn.close()
+
+ProductRow = namedtuple("ProductRow", ("id", "name", "category", "purchase_price", "selling_price", "stock_quantity", "go_down_quantity", "expiry_date"))
+
+class ProductNameIndex:
+    WORD_PATTERN = re.compile(r"\w+")
+
+    def __init__(self):
+        self.prefixes = []
+        self.words = []
+        self.built = False
+
+    @classmethod
+    def _keys(cls, name):
+        folded = name.casefold()
+        return folded, [folded[match.start():] for match in cls.WORD_PATTERN.finditer(folded) if match.start() > 0]
+
+    def rebuild(self, names):
+        started = time.perf_counter()
+        self.prefixes = sorted((name.casefold(), name) for name in names)
+        self.words = sorted((key, name) for name in names for key in self._keys(name)[1])
+        self.built = True
+        logger.debug("indexed %d product names in %.1f ms", len(names), (time.perf_counter() - started) * 1000)
+
+    def clear(self):
+        self.prefixes = []
+        self.words = []
+        self.built = False
+
+    def add(self, name):
+        if not self.built:
+            return
+        folded, words = self._keys(name)
+        bisect.insort(self.prefixes, (folded, name))
+        for key in words:
+            bisect.insort(self.words, (key, name))
+
+    def remove(self, name):
+        if not self.built:
+            return
+        folded, words = self._keys(name)
+        self._discard(self.prefixes, (folded, name))
+        for key in words:
+            self._discard(self.words, (key, name))
+
+    @staticmethod
+    def _discard(entries, entry):
+        index = bisect.bisect_left(entries, entry)
+        if index < len(entries) and entries[index] == entry:
+            del entries[index]
+
+    def search(self, text, limit=50):
+        prefix = text.casefold().lstrip()
+        results = []
+        seen = set()
+        for entries in (self.prefixes, self.words):
+            index = bisect.bisect_left(entries, (prefix,))
+            while index < len(entries) and len(results) < limit:
+                key, name = entries[index]
+                if not key.startswith(prefix):
+                    break
+                if name not in seen:
+                    seen.add(name)
+                    results.append(name)
+                index += 1
+        return results
+
+class ProductFuzzyIndex:
+    WORD_PATTERN = re.compile(r"\w+")
+    MIN_SIMILARITY = 0.3
+    MAX_WORDS_PER_TOKEN = 20
+    MAX_PREFIX_WORDS = 200
+    MAX_TOKENS = 4
+    MAX_COMBINATIONS = 200
+
+    def __init__(self):
+        self.words = {}
+        self.sorted_words = []
+        self.trigrams = {}
+        self.trigram_counts = {}
+        self.version = None
+
+    @classmethod
+    def tokenize(cls, *texts):
+        return {word for text in texts if text for word in cls.WORD_PATTERN.findall(text.casefold())}
+
+    @staticmethod
+    def trigrams_of(word):
+        padded = f"  {word} "
+        return {padded[index:index + 3] for index in range(len(padded) - 2)}
+
+    def _add_word(self, word):
+        if not word.isdigit():
+            trigrams = self.trigrams_of(word)
+            for trigram in trigrams:
+                self.trigrams.setdefault(trigram, set()).add(word)
+            self.trigram_counts[word] = len(trigrams)
+
+    def load(self, rows, version):
+        self.words = {}
+        for word, product_id in rows:
+            postings = self.words.get(word)
+            if postings is None:
+                self.words[word] = {product_id}
+            else:
+                postings.add(product_id)
+        self.sorted_words = sorted(self.words)
+        self.trigrams = {}
+        self.trigram_counts = {}
+        for word in self.sorted_words:
+            self._add_word(word)
+        self.version = version
+
+    def add(self, product_id, words):
+        for word in words:
+            postings = self.words.get(word)
+            if postings is None:
+                postings = self.words[word] = set()
+                bisect.insort(self.sorted_words, word)
+                self._add_word(word)
+            postings.add(product_id)
+
+    def remove(self, product_id, words):
+        for word in words:
+            postings = self.words.get(word)
+            if postings is not None:
+                postings.discard(product_id)
+
+    def _word_matches(self, token):
+        scores = {}
+        if not token.isdigit():
+            query = self.trigrams_of(token)
+            shared = Counter()
+            for trigram in query:
+                shared.update(self.trigrams.get(trigram, ()))
+            minimum = len(query) * self.MIN_SIMILARITY
+            for word, count in shared.items():
+                if count >= minimum:
+                    similarity = count / (len(query) + self.trigram_counts[word] - count)
+                    if similarity >= self.MIN_SIMILARITY:
+                        scores[word] = similarity
+
+        index = bisect.bisect_left(self.sorted_words, token)
+        for word in self.sorted_words[index:index + self.MAX_PREFIX_WORDS]:
+            if not word.startswith(token):
+                break
+            scores[word] = max(scores.get(word, 0.0), 0.5 + 0.5 * len(token) / len(word))
+        matches = sorted(((similarity, word) for word, similarity in scores.items() if self.words[word]), reverse=True)
+        return matches[:self.MAX_WORDS_PER_TOKEN]
+
+    def search(self, text, limit=50):
+        tokens = list(dict.fromkeys(self.WORD_PATTERN.findall(text.casefold())))[:self.MAX_TOKENS]
+        if not tokens:
+            return []
+        options = [self._word_matches(token) + [(0.0, None)] for token in tokens]
+
+        def score(combination):
+            return sum(options[position][choice][0] for position, choice in enumerate(combination))
+
+        start = (0,) * len(options)
+        heap = [(-score(start), start)]
+        visited = {start}
+        results = []
+        seen = set()
+        combinations = 0
+        while heap and len(results) < limit and combinations < self.MAX_COMBINATIONS:
+            negative_score, combination = heapq.heappop(heap)
+            if negative_score >= 0:
+                break
+            combinations += 1
+            postings = sorted((self.words[options[position][choice][1]] for position, choice in enumerate(combination)
+                               if options[position][choice][1] is not None), key=len)
+            products = postings[0].intersection(*postings[1:]) - seen
+            if products:
+                chosen = sorted(products)[:limit - len(results)]
+                similarity = -negative_score / len(tokens)
+                results.extend((product_id, similarity) for product_id in chosen)
+                seen.update(chosen)
+
+            for position in range(len(combination)):
+                if combination[position] + 1 < len(options[position]):
+                    neighbour = combination[:position] + (combination[position] + 1,) + combination[position + 1:]
+                    if neighbour not in visited:
+                        visited.add(neighbour)
+                        heapq.heappush(heap, (-score(neighbour), neighbour))
+        return results
+
+class ProductCatalog:
+    def __init__(self, db):
+        self.db = db
+        self.rows = []
+        self.names = []
+        self.name_index = ProductNameIndex()
+        self.by_id = {}
+        self.by_name = {}
+        self.version = 0
+        self.names_version = 0
+        self.stale_ids = set()
+        self.needs_reload = True
+
+    def mark_changed(self, product_ids=None):
+        if product_ids is None:
+            self.needs_reload = True
+        else:
+            self.stale_ids.update(product_ids)
+
+    def sync(self):
+        self.db.check_external_changes()
+        if self.needs_reload:
+            self._load()
+        elif self.stale_ids:
+            self._patch(self.stale_ids)
+        self.stale_ids = set()
+
+    def _load(self):
+        started = time.perf_counter()
+        self.rows = [ProductRow._make(row) for row in self.db.get_products()]
+        self.names = [row.name for row in self.rows]
+        self.by_id = {row.id: row for row in self.rows}
+        self.by_name = {row.name: row for row in self.rows}
+        self.name_index.clear()
+        self.needs_reload = False
+        self.version += 1
+        self.names_version += 1
+        logger.debug("loaded %d products into the catalog in %.1f ms", len(self.rows), (time.perf_counter() - started) * 1000)
+
+    def _patch(self, product_ids):
+        fresh = {row[0]: ProductRow._make(row) for row in self.db.get_products_by_ids(list(product_ids))}
+        moved = []
+        for product_id in product_ids:
+            old = self.by_id.pop(product_id, None)
+            new = fresh.get(product_id)
+            if old is not None and new is not None and old.name == new.name:
+                self.rows[bisect.bisect_left(self.names, old.name)] = new
+                self.by_id[product_id] = self.by_name[new.name] = new
+                continue
+            if old is not None:
+                index = bisect.bisect_left(self.names, old.name)
+                del self.rows[index], self.names[index]
+                del self.by_name[old.name]
+                self.name_index.remove(old.name)
+            if new is not None:
+                moved.append(new)
+
+        for new in moved:
+            index = bisect.bisect_left(self.names, new.name)
+            self.rows.insert(index, new)
+            self.names.insert(index, new.name)
+            self.by_id[new.id] = self.by_name[new.name] = new
+            self.name_index.add(new.name)
+        if moved or len(fresh) < len(product_ids):
+            self.names_version += 1
+        self.version += 1
+
+    def __len__(self):
+        self.sync()
+        return len(self.rows)
+
+    def __contains__(self, name):
+        self.sync()
+        return name in self.by_name
+
+    def __getitem__(self, name):
+        self.sync()
+        return self.by_name[name]
+
+    def get(self, product_id):
+        self.sync()
+        return self.by_id.get(product_id)
+
+    def get_many(self, product_ids):
+        self.sync()
+        return [self.by_id[product_id] for product_id in product_ids if product_id in self.by_id]
+
+    def page(self, offset, limit):
+        self.sync()
+        return self.rows[offset:offset + limit]
+
+    def all_names(self):
+        self.sync()
+        return self.names
+
+    def complete(self, text, limit=50, fuzzy=True):
+        self.sync()
+        if not self.name_index.built:
+            self.name_index.rebuild(self.names)
+        names = self.name_index.search(text, limit)
+        if fuzzy and len(names) < limit and len(text.strip()) >= 3:
+            found = set(names)
+            for product_id, similarity in self.db.fuzzy_search_products(text, limit):
+                row = self.by_id.get(product_id)
+                if row is not None and row.name not in found:
+                    found.add(row.name)
+                    names.append(row.name)
+                    if len(names) == limit:
+                        break
+        return names
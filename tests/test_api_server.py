@@ -0,0 +1,89 @@
+import asyncio
+import json
+
+import pytest
+
+from api_server import ApiServer
+
+
+@pytest.fixture
+def call_api(db):
+    salt = db.add_product("Salt", "Spices", 1.0, 2.5, 10, 5, None)
+
+    def run(*requests):
+        async def send():
+            api = ApiServer(db.db_name, readers=2)
+            await api.start()
+            try:
+                calls = [api.dispatch(method, target, json.dumps(body).encode() if body is not None else b"")
+                         for method, target, body in requests]
+                return await asyncio.gather(*calls)
+            finally:
+                await api.close()
+        return asyncio.run(send())
+
+    run.salt = salt
+    return run
+
+
+def test_sales_are_priced_and_listed(db, call_api):
+    (status, created), = call_api(("POST", "/sales", {"product_id": call_api.salt, "quantity": 2, "sale_date": "2026-01-05"}))
+
+    assert (status, created["total_price"]) == (201, 5.0)
+    (status, sales), = call_api(("GET", "/sales?limit=10&q=salt", None))
+    assert sales == [{"id": created["id"], "product_name": "Salt", "quantity": 2, "total_price": 5.0, "sale_date": "2026-01-05"}]
+    assert db.get_product_by_id(call_api.salt)[5] == 8
+
+
+def test_a_failed_write_does_not_undo_the_rest_of_its_batch(db, call_api):
+    sale = {"product_id": call_api.salt, "quantity": 4, "total_price": 10.0, "sale_date": "2026-01-05"}
+
+    responses = call_api(("POST", "/sales", sale), ("POST", "/sales", dict(sale, quantity=50)), ("POST", "/sales", sale))
+
+    assert [status for status, payload in responses] == [201, 409, 201]
+    assert db.count_sales() == 2
+    assert db.get_product_by_id(call_api.salt)[5] == 2
+
+
+@pytest.mark.parametrize("method, target, body, status", [
+    ("GET", "/products/99", None, 404),
+    ("POST", "/products", {"name": "Salt", "purchase_price": 1, "selling_price": 2}, 409),
+    ("POST", "/sales", {"product_id": 1, "quantity": -1}, 400),
+    ("POST", "/sales", {"product_id": 1, "quantity": 1, "sale_date": "05/01/2026"}, 400),
+    ("GET", "/products?limit=many", None, 400),
+    ("PUT", "/sales", {}, 405),
+    ("GET", "/nowhere", None, 404),
+    ("POST", "/transfers", {"product_id": 1, "amount": 6}, 409),
+])
+def test_errors_map_to_http_statuses(call_api, method, target, body, status):
+    (response_status, payload), = call_api((method, target, body))
+
+    assert response_status == status
+    assert payload["error"]
+
+
+def test_requests_are_served_over_http(db, call_api):
+    async def exchange():
+        api = ApiServer(db.db_name, readers=1)
+        await api.start()
+        server = await asyncio.start_server(api.handle_connection, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            body = json.dumps({"product_id": call_api.salt, "amount": 3}).encode()
+            writer.write(b"POST /transfers HTTP/1.1\r\nContent-Length: %d\r\n\r\n" % len(body) + body)
+            writer.write(b"GET /products?q=salt HTTP/1.1\r\nConnection: close\r\n\r\n")
+            await writer.drain()
+            response = await reader.read()
+            writer.close()
+            return response.decode()
+        finally:
+            server.close()
+            await server.wait_closed()
+            await api.close()
+
+    response = asyncio.run(exchange())
+
+    assert response.count("HTTP/1.1 200 OK") == 2
+    assert '"stock_quantity": 13' in response
+    assert '"go_down_quantity": 2' in response
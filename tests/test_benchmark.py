@@ -0,0 +1,35 @@
+import json
+from datetime import date
+
+import pytest
+
+from benchmark import compare, generate_database
+from inv_db import Database
+
+
+def test_generated_database_is_seeded_and_fully_indexed(tmp_path):
+    paths = [tmp_path / "first.db", tmp_path / "second.db"]
+    for path in paths:
+        generate_database(str(path), products=50, sales=500, purchases=100, seed=7,
+                          start=date(2025, 1, 1), end=date(2025, 12, 31))
+
+    first, second = (Database(str(path)) for path in paths)
+    try:
+        assert first.get_sales_page(0, 500) == second.get_sales_page(0, 500)
+        assert (first.count_products(), first.count_sales(), first.count_purchases()) == (50, 500, 100)
+        assert first.search_products(first.get_products()[0][1].casefold())
+        first.cursor.execute("SELECT SUM(total_price) FROM sales")
+        revenue = first.cursor.fetchone()[0]
+        assert sum(first.calculate_monthly_revenue(f"2025-{month:02d}") for month in range(1, 13)) == pytest.approx(revenue)
+    finally:
+        first.close()
+        second.close()
+
+
+def test_compare_flags_slowdowns_over_the_threshold(tmp_path, capsys):
+    baseline, current = tmp_path / "baseline.json", tmp_path / "current.json"
+    baseline.write_text(json.dumps({"results": {"count_sales": {"median_ms": 10.0}, "search_products/word": {"median_ms": 2.0}}}))
+    current.write_text(json.dumps({"results": {"count_sales": {"median_ms": 10.5}, "search_products/word": {"median_ms": 3.0}}}))
+
+    assert compare(str(baseline), str(current), 0.10) == ["search_products/word"]
+    assert "REGRESSION" in capsys.readouterr().out
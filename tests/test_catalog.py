@@ -0,0 +1,94 @@
+from inv_db import Database, ProductNameIndex, ProductRow
+
+
+def test_catalog_patches_match_a_fresh_load(db):
+    ids = {name: db.add_product(name, "Spices", 1.0, 2.0, 10, 0, None) for name in ("Salt", "Pepper", "Cumin", "Mace")}
+    assert db.catalog.all_names() == ["Cumin", "Mace", "Pepper", "Salt"]
+    loads = db.catalog.names_version
+
+    db.update_product(ids["Salt"], "Allspice", "Spices", 1.0, 2.0, 0, 0, None)
+    db.delete_product(ids["Mace"])
+    db.add_product("Nutmeg", "Spices", 1.0, 2.0, 10, 0, None)
+    db.record_sale(ids["Pepper"], 4, 8.0, "2026-01-05")
+
+    assert db.catalog.all_names() == ["Allspice", "Cumin", "Nutmeg", "Pepper"]
+    assert db.catalog.page(0, 10) == [ProductRow._make(row) for row in db.get_products()]
+    assert db.catalog["Pepper"].stock_quantity == 6
+    assert db.catalog.get(ids["Mace"]) is None
+    assert db.catalog.names_version > loads
+    assert not db.catalog.needs_reload
+
+
+def test_stock_changes_keep_the_name_list(db):
+    salt = db.add_product("Salt", "Spices", 1.0, 2.0, 10, 0, None)
+    names = db.catalog.all_names()
+    version, names_version = db.catalog.version, db.catalog.names_version
+
+    db.record_sale(salt, 1, 2.0, "2026-01-05")
+    db.update_product(salt, "Salt", "Spices", 1.0, 2.5, 0, 0, None)
+
+    assert db.catalog.get(salt).selling_price == 2.5
+    assert db.catalog.version > version
+    assert db.catalog.names_version == names_version
+    assert db.catalog.all_names() is names
+
+
+def test_imports_reload_the_catalog(db):
+    db.add_product("Salt", "Spices", 1.0, 2.0, 10, 0, None)
+    assert len(db.catalog) == 1
+
+    db.import_products_batch([{"name": "Pepper", "category": "Spices", "purchase_price": 1.0, "selling_price": 2.0,
+                               "stock_quantity": 5.0, "go_down_quantity": 0.0, "expiry_date": None}])
+
+    assert db.catalog.needs_reload
+    assert db.catalog.all_names() == ["Pepper", "Salt"]
+
+
+def test_name_index_lists_prefix_matches_before_word_matches():
+    index = ProductNameIndex()
+    index.rebuild(["Red Rice", "Rice Flour", "Basmati Rice", "Rye Bread", "Brown Sugar"])
+
+    assert index.search("ri") == ["Rice Flour", "Basmati Rice", "Red Rice"]
+    assert index.search("RICE F") == ["Rice Flour"]
+    assert index.search("r", limit=2) == ["Red Rice", "Rice Flour"]
+    assert index.search("x") == []
+
+
+def test_name_index_follows_catalog_edits(db):
+    salt = db.add_product("Sea Salt", "Spices", 1.0, 2.0, 10, 0, None)
+    db.add_product("Salted Butter", "Dairy", 1.0, 2.0, 10, 0, None)
+    assert db.catalog.complete("sal", fuzzy=False) == ["Salted Butter", "Sea Salt"]
+
+    db.update_product(salt, "Rock Salt", "Spices", 1.0, 2.0, 0, 0, None)
+    db.add_product("Salsa", "Sauces", 1.0, 2.0, 10, 0, None)
+
+    assert db.catalog.name_index.built
+    assert db.catalog.complete("sal", fuzzy=False) == ["Salsa", "Salted Butter", "Rock Salt"]
+    assert db.catalog.complete("sea", fuzzy=False) == []
+
+
+def fuzzy_names(db, text):
+    return [db.catalog.get(product_id).name for product_id, similarity in db.fuzzy_search_products(text)]
+
+
+def test_fuzzy_lookup_finds_products_despite_typos(db):
+    for name, category in [("Basmati Rice", "Grocery"), ("Brown Sugar", "Grocery"), ("Chocolate Biscuits", "Snacks")]:
+        db.add_product(name, category, 1.0, 2.0, 10, 0, None)
+
+    assert fuzzy_names(db, "basmti")[0] == "Basmati Rice"
+    assert fuzzy_names(db, "chocolat biscits")[0] == "Chocolate Biscuits"
+    assert fuzzy_names(db, "sugar brwn")[0] == "Brown Sugar"
+    assert fuzzy_names(db, "zzzz") == []
+    assert "Basmati Rice" in db.catalog.complete("basmti")
+
+
+def test_fuzzy_index_picks_up_changes_from_another_till(db, tmp_path):
+    rice = db.add_product("Basmati Rice", "Grocery", 1.0, 2.0, 10, 0, None)
+    assert fuzzy_names(db, "basmati") == ["Basmati Rice"]
+
+    other_till = Database(str(tmp_path / "inventory.db"))
+    other_till.update_product(rice, "Jasmine Rice", "Grocery", 1.0, 2.0, 0, 0, None)
+    other_till.close()
+
+    assert fuzzy_names(db, "basmati") == []
+    assert fuzzy_names(db, "jasmin") == ["Jasmine Rice"]
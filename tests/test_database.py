@@ -0,0 +1,274 @@
+import sqlite3
+import time
+
+import pytest
+
+from inv_db import Database, DatabaseBusyError, DuplicateProductError, InventoryError, NotFoundError, StockError
+
+
+def stock_as_of(db, day):
+    return {name: (stock, go_down) for name, stock, go_down, total in db.get_stock_as_of(day)}
+
+
+def test_back_dated_sale_moves_opening_stock_back(db):
+    salt = db.add_product("Salt", "Spices", 1.0, 2.0, 10, 0, None)
+    db.record_sale(salt, 2, 4.0, "2024-02-27")
+
+    assert stock_as_of(db, "2024-02-28")["Salt"] == (8, 0)
+    assert "Salt" not in stock_as_of(db, "2024-02-26")
+
+
+def test_back_dated_sale_updates_existing_snapshots(db):
+    pepper = db.add_product("Pepper", "Spices", 1.0, 2.0, 0, 0, None)
+    db.record_purchase(pepper, 5, 1.0, "2024-01-10", "Metro")
+    db.take_stock_snapshots("2024-06-30")
+
+    salt = db.add_product("Salt", "Spices", 1.0, 2.0, 10, 0, None)
+    db.record_sale(salt, 2, 4.0, "2024-02-27")
+
+    assert stock_as_of(db, "2024-04-30") == {"Pepper": (0, 5), "Salt": (8, 0)}
+    assert stock_as_of(db, "2024-07-31") == {"Pepper": (0, 5), "Salt": (8, 0)}
+
+
+def test_product_edit_keeps_sales_from_another_till(db, tmp_path):
+    salt = db.add_product("Salt", "Spices", 1.0, 2.0, 10, 4, None)
+    other_till = Database(str(tmp_path / "inventory.db"))
+    other_till.record_sale(salt, 3, 6.0, "2026-01-05")
+    other_till.close()
+
+    db.update_product(salt, "Sea Salt", "Spices", 1.0, 2.5, 0, 0, None)
+    assert db.get_product_by_id(salt)[5:7] == (7, 4)
+
+    db.update_product(salt, "Sea Salt", "Spices", 1.0, 2.5, 2, -1, None)
+    assert db.get_product_by_id(salt)[5:7] == (9, 3)
+
+
+def test_external_changes_are_published_by_row(db, tmp_path):
+    salt = db.add_product("Salt", "Spices", 1.0, 2.0, 10, 0, None)
+    db.catalog.sync()
+    published = []
+    db.subscribe(published.append)
+    db.check_external_changes()
+
+    other_till = Database(str(tmp_path / "inventory.db"))
+    sale_id = other_till.record_sale(salt, 3, 6.0, "2026-01-05")
+    other_till.update_product(salt, "Salt", "Spices", 1.0, 2.5, 0, 0, None)
+    other_till.close()
+
+    names_version = db.catalog.names_version
+    assert db.check_external_changes()
+    assert published[-1] == {"sales": {sale_id}, "products": {salt}}
+    assert db.catalog.get(salt).selling_price == 2.5
+    assert db.catalog.get(salt).stock_quantity == 7
+    assert db.catalog.names_version == names_version
+
+
+def test_changes_are_published_once_when_the_outer_unit_commits(db):
+    salt = db.add_product("Salt", "Spices", 1.0, 2.0, 10, 0, None)
+    published = []
+    db.subscribe(published.append)
+
+    with db.transaction():
+        first = db.record_sale(salt, 1, 2.0, "2026-01-05")
+        second = db.record_sale(salt, 1, 2.0, "2026-01-06")
+        assert published == []
+
+    assert published == [{"sales": {first, second}, "products": {salt}}]
+
+
+def test_rolled_back_changes_are_not_published(db):
+    salt = db.add_product("Salt", "Spices", 1.0, 2.0, 10, 0, None)
+    published = []
+    db.subscribe(published.append)
+
+    with pytest.raises(RuntimeError):
+        with db.transaction():
+            db.record_sale(salt, 1, 2.0, "2026-01-05")
+            raise RuntimeError
+    db.save_reports([("2026-01", 2.0, 0.0, 2.0)])
+
+    assert published == [{"reports": None}]
+
+
+def test_whole_table_changes_absorb_row_changes():
+    changes = {}
+    Database.merge_change(changes, "sales", [1, 2])
+    Database.merge_change(changes, "sales")
+    Database.merge_change(changes, "sales", [3])
+    Database.merge_change(changes, "products", [4])
+
+    assert changes == {"sales": None, "products": {4}}
+
+
+def test_basket_sales_are_published_and_traced_by_id(db):
+    salt = db.add_product("Salt", "Spices", 1.0, 2.0, 10, 0, None)
+    pepper = db.add_product("Pepper", "Spices", 1.0, 3.0, 5, 0, None)
+    published = []
+    db.subscribe(published.append)
+
+    assert db.record_sales_bulk([(salt, 2, 4.0), (pepper, 1, 3.0), (salt, 1, 2.0)], "2026-01-05") == 3
+
+    db.cursor.execute("SELECT id FROM sales ORDER BY id")
+    sale_ids = {row[0] for row in db.cursor.fetchall()}
+    assert published[-1]["sales"] == sale_ids
+    db.cursor.execute("SELECT ref_id FROM stock_movements WHERE kind = 'sale'")
+    assert {row[0] for row in db.cursor.fetchall()} == sale_ids
+    assert db.get_product_by_id(salt)[5] == 7
+
+
+@pytest.mark.parametrize("quantity", [0, -2])
+def test_basket_rejects_lines_without_a_positive_quantity(db, quantity):
+    salt = db.add_product("Salt", "Spices", 1.0, 2.0, 10, 0, None)
+
+    with pytest.raises(InventoryError):
+        db.record_sales_bulk([(salt, quantity, 0.0)], "2026-01-05")
+    assert db.get_product_by_id(salt)[5] == 10
+    assert db.count_sales() == 0
+
+
+def test_basket_checks_stock_for_the_sum_of_repeated_lines(db):
+    salt = db.add_product("Salt", "Spices", 1.0, 2.0, 3, 0, None)
+    pepper = db.add_product("Pepper", "Spices", 1.0, 3.0, 5, 0, None)
+
+    with pytest.raises(StockError) as shortage:
+        db.record_sales_bulk([(salt, 2, 4.0), (pepper, 1, 3.0), (salt, 2, 4.0)], "2026-01-05")
+
+    assert "Salt (needed 4.00, available 3.00)" in str(shortage.value)
+    assert "Pepper" not in str(shortage.value)
+    assert db.count_sales() == 0
+    assert [db.get_product_by_id(product_id)[5] for product_id in (salt, pepper)] == [3, 5]
+
+
+def test_basket_rejects_products_that_no_longer_exist(db):
+    salt = db.add_product("Salt", "Spices", 1.0, 2.0, 3, 0, None)
+    pepper = db.add_product("Pepper", "Spices", 1.0, 3.0, 5, 0, None)
+    db.delete_product(pepper)
+
+    with pytest.raises(InventoryError):
+        db.record_sales_bulk([(salt, 1, 2.0), (pepper, 1, 3.0)], "2026-01-05")
+    with pytest.raises(InventoryError):
+        db.record_sales_bulk([], "2026-01-05")
+    assert db.get_product_by_id(salt)[5] == 3
+
+
+@pytest.mark.parametrize("call", [
+    lambda db: db.update_product(99, "Salt", "Spices", 1.0, 2.0, 0, 0, None),
+    lambda db: db.delete_product(99),
+    lambda db: db.update_sale(99, 1, 1, 2.0, "2026-01-05"),
+    lambda db: db.delete_sale(99),
+    lambda db: db.update_purchase(99, 1, 1, 1.0, "2026-01-05", None),
+    lambda db: db.delete_purchase(99),
+    lambda db: db.transfer_stock(99, 1),
+])
+def test_missing_rows_raise_not_found(db, call):
+    with pytest.raises(NotFoundError):
+        call(db)
+
+
+def test_duplicate_names_raise_a_typed_error(db):
+    db.add_product("Salt", "Spices", 1.0, 2.0, 10, 0, None)
+    pepper = db.add_product("Pepper", "Spices", 1.0, 2.0, 10, 0, None)
+
+    with pytest.raises(DuplicateProductError, match="Salt"):
+        db.add_product("Salt", "Spices", 1.0, 2.0, 10, 0, None)
+    with pytest.raises(DuplicateProductError):
+        db.update_product(pepper, "Salt", "Spices", 1.0, 2.0, 0, 0, None)
+    assert db.get_product_by_id(pepper)[1] == "Pepper"
+
+
+def test_transfer_needs_enough_go_down_stock(db):
+    salt = db.add_product("Salt", "Spices", 1.0, 2.0, 1, 3, None)
+
+    with pytest.raises(StockError, match="in go-down"):
+        db.transfer_stock(salt, 4)
+    assert db.transfer_stock(salt, 3) == (4, 0)
+
+
+def test_start_up_does_not_wait_for_another_tills_write_lock(db, tmp_path):
+    db.add_product("Salt", "Spices", 1.0, 2.0, 10, 0, None)
+    db.take_stock_snapshots()
+    other_till = sqlite3.connect(tmp_path / "inventory.db")
+    other_till.execute("BEGIN IMMEDIATE")
+    try:
+        started = time.perf_counter()
+        second = Database(str(tmp_path / "inventory.db"))
+        assert time.perf_counter() - started < 1
+        assert "Salt" in second.catalog
+        second.close()
+    finally:
+        other_till.rollback()
+        other_till.close()
+
+
+def test_sale_without_enough_stock_leaves_nothing_behind(db):
+    salt = db.add_product("Salt", "Spices", 1.0, 2.0, 2, 0, None)
+    published = []
+    db.subscribe(published.append)
+
+    with pytest.raises(StockError):
+        db.record_sale(salt, 3, 6.0, "2026-01-05")
+
+    assert db.get_product_by_id(salt)[5] == 2
+    assert db.count_sales() == 0
+    db.cursor.execute("SELECT COUNT(*) FROM stock_movements WHERE kind = 'sale'")
+    assert db.cursor.fetchone()[0] == 0
+    assert published == []
+
+
+def test_failed_sale_edit_keeps_the_original_sale(db):
+    salt = db.add_product("Salt", "Spices", 1.0, 2.0, 5, 0, None)
+    pepper = db.add_product("Pepper", "Spices", 1.0, 2.0, 1, 0, None)
+    sale_id = db.record_sale(salt, 2, 4.0, "2026-01-05")
+
+    with pytest.raises(StockError):
+        db.update_sale(sale_id, pepper, 2, 4.0, "2026-01-05")
+
+    assert db.get_sale_by_id(sale_id) == (sale_id, salt, 2, 4.0, "2026-01-05")
+    assert db.get_product_by_id(salt)[5] == 3
+    assert db.get_product_by_id(pepper)[5] == 1
+
+
+def test_nested_units_of_work_roll_back_on_their_own(db):
+    salt = db.add_product("Salt", "Spices", 1.0, 2.0, 5, 0, None)
+
+    with db.transaction():
+        db.record_sale(salt, 1, 2.0, "2026-01-05")
+        with pytest.raises(StockError):
+            db.record_sale(salt, 10, 20.0, "2026-01-05")
+        assert db.conn.in_transaction
+
+    assert db.count_sales() == 1
+    assert db.get_product_by_id(salt)[5] == 4
+
+
+def test_tills_cannot_sell_the_same_stock_twice(db, tmp_path):
+    salt = db.add_product("Salt", "Spices", 1.0, 2.0, 10, 0, None)
+    other_till = Database(str(tmp_path / "inventory.db"))
+    try:
+        assert other_till.catalog.get(salt).stock_quantity == 10
+        db.record_sale(salt, 8, 16.0, "2026-01-05")
+
+        with pytest.raises(StockError, match="available 2.00"):
+            other_till.record_sale(salt, 5, 10.0, "2026-01-05")
+        other_till.record_sale(salt, 2, 4.0, "2026-01-05")
+    finally:
+        other_till.close()
+
+    assert db.get_product_by_id(salt)[5] == 0
+    assert db.count_sales() == 2
+
+
+def test_writes_give_up_with_a_busy_error_while_another_till_holds_the_lock(db, tmp_path):
+    salt = db.add_product("Salt", "Spices", 1.0, 2.0, 10, 0, None)
+    db.conn.execute("PRAGMA busy_timeout = 10")
+    db.WRITE_RETRIES, db.WRITE_RETRY_DELAY = 1, 0.01
+    other_till = sqlite3.connect(tmp_path / "inventory.db")
+    other_till.execute("BEGIN IMMEDIATE")
+    try:
+        with pytest.raises(DatabaseBusyError):
+            db.record_sale(salt, 1, 2.0, "2026-01-05")
+    finally:
+        other_till.rollback()
+        other_till.close()
+
+    assert db.record_sale(salt, 1, 2.0, "2026-01-05")
@@ -0,0 +1,140 @@
+import csv
+
+import pytest
+
+from inv_app import ExportJob, ImportJob
+from inv_db import Database
+
+
+def run_import(db, kind, path):
+    job = ImportJob(kind, str(path))
+    job.start()
+    while True:
+        status, payload = job.chunks.get(timeout=5)
+        if status == "chunk":
+            job.write_chunk(db, payload)
+        elif status == "error":
+            raise payload
+        else:
+            break
+    job.close()
+    return job
+
+
+def run_export(job):
+    job.start()
+    job.thread.join(timeout=5)
+    assert job.done
+    if job.error:
+        raise job.error
+    return job
+
+
+def test_sales_import_reads_a_name_column_as_the_product(db, tmp_path):
+    db.add_product("Salt", "Spices", 1.0, 2.0, 10, 0, None)
+    path = tmp_path / "sales.csv"
+    path.write_text("Name,Quantity,Total Price,Date\nSalt,2,4,2026-01-05\n", encoding="utf-8")
+
+    job = run_import(db, "sales", path)
+
+    assert (job.imported, job.rejected) == (1, 0)
+    assert db.get_sales_page(0, 10)[0][1:] == ("Salt", 2, 4, "2026-01-05")
+
+
+def test_products_import_reads_a_product_column_as_the_name(db, tmp_path):
+    path = tmp_path / "products.csv"
+    path.write_text("Product,Category,Purchase Price,Selling Price\nSalt,Spices,1,2\n", encoding="utf-8")
+
+    job = run_import(db, "products", path)
+
+    assert (job.imported, job.rejected) == (1, 0)
+    assert db.catalog["Salt"].category == "Spices"
+
+
+@pytest.mark.parametrize("encoding", ["utf-8-sig", "cp1252"])
+def test_csv_import_reads_utf8_and_cp1252(db, tmp_path, encoding):
+    path = tmp_path / "products.csv"
+    path.write_bytes("Name,Category,Purchase Price,Selling Price\nCafé Crème,Drinks,1,2\n".encode(encoding))
+
+    job = run_import(db, "products", path)
+
+    assert (job.imported, job.rejected) == (1, 0)
+    assert "Café Crème" in db.catalog
+
+
+def test_sales_import_streams_in_chunks_and_writes_rejects(db, tmp_path):
+    db.add_product("Salt", "Spices", 1.0, 2.0, 3, 0, None)
+    path = tmp_path / "sales.csv"
+    path.write_text("Product,Quantity,Total Price,Date\n"
+                    "Salt,1,,2026-01-05\n"
+                    "Pepper,1,3,2026-01-05\n"
+                    "Salt,two,4,2026-01-05\n"
+                    "Salt,2,4,2026-01-06\n"
+                    "Salt,1,2,2026-01-07\n", encoding="utf-8")
+
+    job = ImportJob("sales", str(path), chunk_size=2)
+    job.start()
+    chunks = 0
+    while True:
+        status, payload = job.chunks.get(timeout=5)
+        if status != "chunk":
+            break
+        chunks += 1
+        job.write_chunk(db, payload)
+    job.close()
+
+    assert chunks == 3
+    assert (job.total_rows, job.imported, job.rejected) == (5, 2, 3)
+    assert db.get_product_by_name("Salt")[5] == 0
+    assert db.get_sales_page(0, 10)[-1][3] == 2.0
+    rejects = (tmp_path / "sales_rejects.csv").read_text(encoding="utf-8").splitlines()
+    assert [line.split(",")[0] for line in rejects] == ["line", "3", "4", "6"]
+    assert "does not exist" in rejects[1] and "must be a number" in rejects[2] and "Not enough stock" in rejects[3]
+
+
+def test_purchases_import_adds_to_the_go_down(db, tmp_path):
+    db.add_product("Salt", "Spices", 1.0, 2.0, 0, 0, None)
+    path = tmp_path / "purchases.csv"
+    path.write_text("Product,Quantity,Cost Price,Date,Supplier\nSalt,4,1,2026-01-05,Metro\nSalt,0,1,2026-01-05,Metro\n", encoding="utf-8")
+
+    job = run_import(db, "purchases", path)
+
+    assert (job.imported, job.rejected) == (1, 1)
+    assert db.get_product_by_id(db.get_product_by_name("Salt")[0])[6] == 4
+    assert db.get_purchases_page(0, 10)[0][5] == "Metro"
+
+
+def test_sales_export_streams_the_ledger_from_its_own_connection(db, tmp_path):
+    salt = db.add_product("Salt", "Spices", 1.0, 2.0, 10, 0, None)
+    for day in range(1, 8):
+        db.record_sale(salt, 1, 2.0, f"2026-01-{day:02d}")
+    header, query = Database.EXPORT_QUERIES["sales"]
+    path = tmp_path / "sales.csv"
+
+    job = run_export(ExportJob(str(path), header, db_name=db.db_name, query=query, batch_size=3))
+
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        rows = list(csv.reader(f))
+    assert (job.total_rows, job.rows_written) == (7, 7)
+    assert rows[0] == list(header)
+    assert [row[4] for row in rows[1:]] == [f"2026-01-{day:02d}" for day in range(7, 0, -1)]
+
+
+def test_report_export_writes_the_rows_it_was_given(tmp_path):
+    path = tmp_path / "report.csv"
+
+    job = run_export(ExportJob(str(path), ("Month", "Revenue"), rows=[("2026-01", 4.0), ("2026-02", 25.0)]))
+
+    assert job.rows_written == 2
+    assert path.read_text(encoding="utf-8-sig").splitlines() == ["Month,Revenue", "2026-01,4.0", "2026-02,25.0"]
+
+
+def test_cancelled_export_removes_the_partial_file(tmp_path):
+    path = tmp_path / "report.csv"
+    job = ExportJob(str(path), ("Month", "Revenue"), rows=[("2026-01", 4.0)] * 10, batch_size=1)
+    job.cancel()
+
+    run_export(job)
+
+    assert job.rows_written == 0
+    assert not path.exists()
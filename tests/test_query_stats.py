@@ -0,0 +1,55 @@
+import logging
+
+import pytest
+
+from inv_db import Database, QueryStats
+
+
+@pytest.fixture
+def slow_queries():
+    records = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    slow_logger = logging.getLogger("inv_app.slow_queries")
+    slow_logger.addHandler(handler)
+    yield records
+    slow_logger.removeHandler(handler)
+
+
+def timed_database(tmp_path, stats):
+    return Database(str(tmp_path / "inventory.db"), query_stats=stats)
+
+
+def test_statements_are_counted_with_their_rows(tmp_path):
+    stats = QueryStats(slow_ms=None, slow_log_path=None)
+    db = timed_database(tmp_path, stats)
+    try:
+        db.add_product("Salt", "Spices", 1.0, 2.0, 10, 0, None)
+        db.add_product("Pepper", "Spices", 1.0, 2.0, 10, 0, None)
+        with stats.action("list products"):
+            db.get_products()
+            db.get_products()
+    finally:
+        db.close()
+
+    report = stats.report()
+    listing = next(statement for statement in report["statements"] if statement["sql"].startswith("SELECT id, name, category") and "ORDER BY name" in statement["sql"])
+    assert (listing["count"], listing["rows"]) == (2, 4)
+    assert report["actions"][-1]["action"] == "list products"
+    assert report["actions"][-1]["queries"] == 2
+    assert report["total_queries"] == sum(statement["count"] for statement in report["statements"])
+
+
+def test_slow_queries_are_logged_once_with_their_plan(tmp_path, slow_queries):
+    stats = QueryStats(slow_ms=0, slow_log_path=None)
+    db = timed_database(tmp_path, stats)
+    try:
+        slow_queries.clear()
+        db.search_sales("salt")
+    finally:
+        db.close()
+
+    messages = [record.getMessage() for record in slow_queries]
+    search = [message for message in messages if "FROM sales s" in message]
+    assert len(search) == 1
+    assert "plan: " in search[0] and "n/a" not in search[0]
@@ -0,0 +1,127 @@
+import pytest
+
+
+@pytest.fixture
+def ledger(db):
+    salt = db.add_product("Salt", "Spices", 1.0, 2.0, 100, 0, None)
+    pepper = db.add_product("Pepper", "Spices", 2.0, 5.0, 100, 0, None)
+    for product_id, quantity, total_price, sale_date in [
+        (salt, 2, 4.0, "2026-01-31"), (salt, 1, 2.0, "2026-02-01"), (pepper, 3, 15.0, "2026-02-14"),
+        (salt, 4, 8.0, "2026-02-28"), (pepper, 1, 5.0, "2026-03-01"), (salt, 5, 10.0, "2026-04-20"),
+    ]:
+        db.record_sale(product_id, quantity, total_price, sale_date)
+    for product_id, quantity, cost_price, purchase_date in [
+        (salt, 10, 1.0, "2026-01-31"), (pepper, 5, 2.0, "2026-02-01"), (salt, 5, 1.0, "2026-03-31"),
+    ]:
+        db.record_purchase(product_id, quantity, cost_price, purchase_date, "Metro")
+    return db
+
+
+def sales_by_name(db, start_date, end_date):
+    db.cursor.execute("""
+        SELECT p.name, SUM(s.total_price), SUM(s.quantity)
+        FROM sales s JOIN products p ON s.product_id = p.id
+        WHERE s.sale_date BETWEEN ? AND ?
+        GROUP BY p.name
+    """, (start_date, end_date))
+    return {name: (revenue, quantity) for name, revenue, quantity in db.cursor.fetchall()}
+
+
+def test_monthly_totals_count_month_end_dates_in_their_own_month(ledger):
+    assert ledger.calculate_monthly_revenue("2026-01") == 4.0
+    assert ledger.calculate_monthly_revenue("2026-02") == 25.0
+    assert ledger.calculate_monthly_revenue("2026-05") == 0.0
+    assert ledger.calculate_monthly_expenses("2026-01") == 10.0
+    assert ledger.calculate_monthly_expenses("2026-02") == 10.0
+
+
+@pytest.mark.parametrize("start_date, end_date", [
+    ("2026-02-01", "2026-02-28"), ("2026-01-15", "2026-03-01"), ("2026-02-10", "2026-02-20"), ("2026-01-01", "2026-12-31"),
+])
+def test_date_range_report_matches_the_raw_sales(ledger, start_date, end_date):
+    report = {name: (revenue, quantity) for name, revenue, quantity in ledger.get_sales_report_by_date_range(start_date, end_date)}
+
+    assert report == sales_by_name(ledger, start_date, end_date)
+
+
+def test_month_queries_use_the_month_index(ledger):
+    ledger.cursor.execute("EXPLAIN QUERY PLAN SELECT SUM(total_price) FROM sales WHERE sale_month = ?", ("2026-02",))
+
+    assert any("idx_sales_month" in row[-1] for row in ledger.cursor.fetchall())
+
+
+def summary_rows(db):
+    db.cursor.execute("""
+        SELECT month, product_id, revenue, quantity_sold, sales_count, expenses, quantity_purchased, purchases_count
+        FROM monthly_product_summary
+        WHERE sales_count != 0 OR purchases_count != 0
+        ORDER BY month, product_id
+    """)
+    return db.cursor.fetchall()
+
+
+def test_summary_triggers_match_a_full_rebuild(ledger):
+    salt, pepper = ledger.get_product_by_name("Salt")[0], ledger.get_product_by_name("Pepper")[0]
+    sale_id, purchase_id = ledger.get_sales_page(0, 1)[0][0], ledger.get_purchases_page(0, 1)[0][0]
+    ledger.update_sale(sale_id, pepper, 2, 10.0, "2026-01-10")
+    ledger.delete_sale(ledger.get_sales_page(1, 1)[0][0])
+    ledger.update_purchase(purchase_id, pepper, 4, 2.5, "2026-02-10", "Makro")
+    ledger.import_sales_batch([{"product_name": "Salt", "quantity": 1, "total_price": None, "sale_date": "2026-05-02"}])
+
+    maintained = summary_rows(ledger)
+    ledger.rebuild_monthly_summary()
+
+    assert maintained == summary_rows(ledger)
+    assert ledger.count_sales() == 6
+    assert ledger.count_purchases() == 3
+
+
+def test_month_lists_come_from_the_summary(ledger):
+    assert ledger.get_available_report_months() == ["2026-04", "2026-03", "2026-02", "2026-01"]
+    assert ledger.get_monthly_sales_by_product("2026-02") == [("Pepper", 3), ("Salt", 5)]
+
+
+def test_stored_reports_keep_the_saved_totals(ledger):
+    ledger.save_or_update_report("2026-02", 25.0, 10.0, 15.0)
+    ledger.record_sale(ledger.get_product_by_name("Salt")[0], 1, 2.0, "2026-02-15")
+    ledger.save_reports([("2026-01", 4.0, 10.0, -6.0)])
+
+    assert [row[1:] for row in ledger.get_stored_reports()] == [("2026-02", 25.0, 10.0, 15.0), ("2026-01", 4.0, 10.0, -6.0)]
+
+
+def profit_by_name(db, start_date, end_date):
+    db.cursor.execute("""
+        SELECT p.name,
+               IFNULL((SELECT SUM(total_price) FROM sales WHERE product_id = p.id AND sale_date BETWEEN ? AND ?), 0),
+               IFNULL((SELECT SUM(quantity * cost_price) FROM purchases WHERE product_id = p.id AND purchase_date BETWEEN ? AND ?), 0)
+        FROM products p
+    """, (start_date, end_date, start_date, end_date))
+    return {name: (revenue, expenses, revenue - expenses) for name, revenue, expenses in db.cursor.fetchall() if revenue or expenses}
+
+
+@pytest.mark.parametrize("start_date, end_date", [
+    ("2026-01-01", "2026-12-31"), ("2026-01-31", "2026-02-14"), ("2026-02-01", "2026-03-31"), ("2026-01-20", "2026-03-15"),
+])
+def test_profitability_report_matches_per_product_totals(ledger, start_date, end_date):
+    report = ledger.get_product_profitability_report(start_date, end_date)
+
+    assert {name: (revenue, expenses, profit) for name, revenue, expenses, profit, margin in report} == profit_by_name(ledger, start_date, end_date)
+    assert [row[3] for row in report] == sorted((row[3] for row in report), reverse=True)
+
+
+def test_profitability_margin_is_empty_without_revenue(ledger):
+    report = {row[0]: row for row in ledger.get_product_profitability_report("2026-03-31", "2026-03-31")}
+
+    assert report == {"Salt": ("Salt", 0.0, 5.0, -5.0, None)}
+
+def test_trend_report_fills_empty_months_and_compares_with_the_previous_one(ledger):
+    report = ledger.get_monthly_trend_report("2026-01-15", "2026-05-10")
+
+    assert report == [
+        ("2026-01", 4.0, 10.0, -6.0, None, None),
+        ("2026-02", 25.0, 10.0, 15.0, 21.0, 21.0),
+        ("2026-03", 5.0, 5.0, 0.0, -20.0, -15.0),
+        ("2026-04", 10.0, 0.0, 10.0, 5.0, 10.0),
+        ("2026-05", 0.0, 0.0, 0.0, -10.0, -10.0),
+    ]
+    assert ledger.get_monthly_trend_report("2027-01-01", "2027-12-31") == []
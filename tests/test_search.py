@@ -0,0 +1,91 @@
+import pytest
+
+from inv_app import IncrementalSearch
+
+
+@pytest.fixture
+def products(db):
+    for name in ("CAFÉ CRÈME", "Café au lait", "Cafe filter", "ÉCLAIR"):
+        db.add_product(name, "Bakery", 1.0, 2.0, 10, 0, None)
+    return db
+
+
+@pytest.mark.parametrize("prefix, term", [("c", "ca"), ("caf", "café"), ("é", "éc"), ("caf", "cafe"), ("r", "rè")])
+def test_narrowed_search_matches_the_database_search(products, prefix, term):
+    search = IncrementalSearch(None, "products", lambda term, limit: products.search_products(term, True, limit), lambda: None)
+    search.lookup(prefix)
+
+    narrowed = search.lookup(term)
+
+    assert search.stats["narrowed"] == 1
+    assert narrowed == products.search_products(term)
+
+
+def test_search_ignores_case_outside_ascii(products):
+    names = {products.catalog.get(product_id)[1] for product_id in products.search_products("é")}
+
+    assert names == {"CAFÉ CRÈME", "Café au lait", "ÉCLAIR"}
+
+
+def test_search_index_follows_product_edits_and_deletes(db):
+    assert db.search_index_enabled
+    salt = db.add_product("Table Salt", "Spices", 1.0, 2.0, 10, 0, None)
+    pepper = db.add_product("Black Pepper", "Spices", 1.0, 2.0, 10, 0, None)
+
+    db.update_product(salt, "Sea Salt", "Seasoning", 1.0, 2.0, 0, 0, None)
+    db.delete_product(pepper)
+
+    assert db.search_products("table") == []
+    assert db.search_products("sea salt") == [salt]
+    assert db.search_products("seasoning") == [salt]
+    assert db.search_products("pepper") == []
+
+
+def test_search_index_follows_supplier_edits(db):
+    salt = db.add_product("Salt", "Spices", 1.0, 2.0, 0, 0, None)
+    purchase_id = db.record_purchase(salt, 5, 1.0, "2026-01-05", "Metro Cash")
+
+    db.update_purchase(purchase_id, salt, 5, 1.0, "2026-01-05", "Makro Wholesale")
+
+    assert db.search_purchases("metro") == []
+    assert db.search_purchases("wholesale") == [purchase_id]
+    assert db.count_purchases("wholesale") == 1
+
+
+def test_sales_search_matches_product_names_only(db):
+    salt = db.add_product("Salt", "Spices", 1.0, 2.0, 10, 0, None)
+    sale_id = db.record_sale(salt, 1, 2.0, "2026-01-05")
+
+    assert db.search_sales("salt") == [sale_id]
+    assert db.search_sales("spices") == []
+    assert db.count_sales("salt") == 1
+
+
+def test_repeated_terms_are_served_from_the_cache(products):
+    calls = []
+    search = IncrementalSearch(None, "products", lambda term, limit: calls.append(term) or products.search_products(term, True, limit), lambda: None)
+
+    first = search.lookup("caf")
+    assert search.lookup("caf") == first
+    assert search.lookup("café") == products.search_products("café")
+
+    assert calls == ["caf"]
+    assert search.stats == {"hits": 1, "narrowed": 1, "misses": 1}
+
+
+def test_terms_with_too_many_matches_page_from_the_database(products):
+    search = IncrementalSearch(None, "products", lambda term, limit: products.search_products(term, True, limit), lambda: None, max_results=2)
+
+    assert search.lookup("ca") is None
+    assert search.lookup("caf") is None
+    assert search.lookup("café") == products.search_products("café")
+    assert search.stats["narrowed"] == 0
+
+
+def test_cache_evicts_the_oldest_terms(products):
+    search = IncrementalSearch(None, "products", lambda term, limit: products.search_products(term, True, limit), lambda: None, max_terms=2)
+
+    for term in ("c", "é", "r"):
+        search.lookup(term)
+
+    assert list(search.results) == ["é", "r"]
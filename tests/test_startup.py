@@ -0,0 +1,26 @@
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from inv_app import StartupTimer
+
+
+def test_app_module_imports_without_the_spreadsheet_libraries():
+    code = "import sys, inv_app; print(sorted(name for name in ('openpyxl', 'pandas', 'numpy') if name in sys.modules))"
+    result = subprocess.run([sys.executable, "-c", code], cwd=Path(__file__).resolve().parent.parent,
+                            capture_output=True, text=True, check=True)
+
+    assert result.stdout.strip() == "[]"
+
+
+def test_startup_report_lists_each_phase_in_order():
+    timer = StartupTimer(time.perf_counter())
+    timer.mark("imports")
+    timer.mark("database")
+    timer.mark("first paint")
+
+    report = timer.report()
+
+    assert [phase["phase"] for phase in report["phases"]] == ["imports", "database", "first paint"]
+    assert report["total_ms"] >= max(phase["ms"] for phase in report["phases"])
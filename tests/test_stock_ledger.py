@@ -0,0 +1,78 @@
+import sqlite3
+
+import pytest
+
+from inv_db import Database
+
+
+def stock_as_of(db, day):
+    return {name: (stock, go_down) for name, stock, go_down, total in db.get_stock_as_of(day)}
+
+
+def ledger_totals(db):
+    db.cursor.execute("""
+        SELECT p.name, SUM(m.stock_change), SUM(m.go_down_change)
+        FROM stock_movements m JOIN products p ON m.product_id = p.id
+        GROUP BY p.id
+        HAVING SUM(m.stock_change) != 0 OR SUM(m.go_down_change) != 0
+    """)
+    return {name: (stock, go_down) for name, stock, go_down in db.cursor.fetchall()}
+
+
+def current_stock(db):
+    return {row[1]: (row[5], row[6]) for row in db.get_products() if row[5] or row[6]}
+
+
+@pytest.fixture
+def history(db):
+    salt = db.add_product("Salt", "Spices", 1.0, 2.0, 10, 0, None)
+    pepper = db.add_product("Pepper", "Spices", 1.0, 3.0, 0, 0, None)
+    db.record_purchase(pepper, 20, 1.0, "2025-11-20", "Metro")
+    db.record_sale(salt, 2, 4.0, "2025-12-05")
+    db.transfer_stock(pepper, 8)
+    sale_id = db.record_sale(pepper, 3, 9.0, "2026-02-10")
+    db.update_sale(sale_id, pepper, 5, 15.0, "2026-02-10")
+    db.update_product(salt, "Salt", "Spices", 1.0, 2.0, 4, 0, None)
+    return db
+
+
+def test_ledger_adds_up_to_the_current_stock(history):
+    assert ledger_totals(history) == current_stock(history)
+    assert stock_as_of(history, "9999-12-31") == current_stock(history)
+
+
+def test_point_in_time_stock_is_the_same_with_or_without_snapshots(history):
+    days = ["2025-11-19", "2025-11-30", "2025-12-31", "2026-01-31", "2026-02-09", "2026-02-28"]
+    before = {day: stock_as_of(history, day) for day in days}
+
+    assert history.take_stock_snapshots("2026-06-30")
+
+    assert {day: stock_as_of(history, day) for day in days} == before
+    assert before["2025-11-19"] == {}
+    assert before["2025-11-30"]["Pepper"] == (0, 20)
+
+
+def test_movement_report_splits_purchases_sales_and_adjustments(history):
+    history.take_stock_snapshots("2025-12-31")
+
+    report = {row[0]: row[1:] for row in history.get_stock_movement_report("2026-01-01", "9999-12-31")}
+
+    assert report["Pepper"][:3] == (20, 0, 5)
+    assert report["Pepper"][4:] == current_stock(history)["Pepper"]
+    assert report["Salt"][0] == 8
+    assert report["Salt"][3] == 4
+
+
+def test_ledger_is_backfilled_for_existing_databases(history, tmp_path):
+    expected = current_stock(history)
+    history.close()
+    conn = sqlite3.connect(tmp_path / "inventory.db")
+    conn.executescript("DROP TABLE stock_movements; DROP TABLE stock_snapshots; DROP TABLE stock_snapshot_runs;")
+    conn.close()
+
+    reopened = Database(str(tmp_path / "inventory.db"))
+    try:
+        assert ledger_totals(reopened) == expected
+        assert stock_as_of(reopened, "9999-12-31") == expected
+    finally:
+        reopened.close()
@@ -0,0 +1,112 @@
+from collections import OrderedDict
+
+import pytest
+
+from inv_app import VirtualTreeview
+
+
+class HeadlessTree(VirtualTreeview):
+    def __init__(self, page_size=5, max_cached_pages=2):
+        self.page_size = page_size
+        self.max_cached_pages = max_cached_pages
+        self.pages = OrderedDict()
+        self.anchors = {}
+        self.total_rows = 0
+        self.first_row = 0
+        self.visible_rows = 4
+        self.format_row = list
+
+    def _render(self):
+        self.first_row = max(0, min(self.first_row, self.total_rows - self.visible_rows))
+        self._get_rows(self.first_row, self.visible_rows)
+
+    def exists(self, iid):
+        return False
+
+
+@pytest.fixture
+def sales(db):
+    salt = db.add_product("Salt", "Spices", 1.0, 2.0, 1000, 0, None)
+    for day in range(1, 29):
+        db.record_sale(salt, 1, 2.0, f"2026-02-{day:02d}")
+        db.record_sale(salt, 1, 2.0, f"2026-02-{day:02d}")
+    return db
+
+
+def all_sale_ids(db):
+    return [row[0] for row in db.get_sales_page(0, 1000)]
+
+
+def sales_tree(db):
+    tree = HeadlessTree()
+    tree.set_source(db.count_sales, lambda offset, limit, after: db.get_sales_page(offset, limit, after=after),
+                    row_key=lambda row: (row[4], row[0]), descending=True)
+    return tree
+
+
+def visible_ids(tree, start, count):
+    return [row[0] for row in tree._get_rows(start, count)]
+
+
+def test_sales_page_after_a_key_continues_the_offset_order(sales):
+    first_page = sales.get_sales_page(0, 10)
+    last = first_page[-1]
+
+    assert sales.get_sales_page(0, 10, after=(last[4], last[0])) == sales.get_sales_page(10, 10)
+
+
+def test_keyset_pages_match_the_full_order_anywhere_in_the_list(sales):
+    tree = sales_tree(sales)
+    truth = all_sale_ids(sales)
+
+    for start in (0, 23, 50, 7, 41):
+        tree.scroll_to(start)
+        assert visible_ids(tree, tree.first_row, 4) == truth[tree.first_row:tree.first_row + 4]
+    assert tree.anchors
+
+
+@pytest.mark.parametrize("new_date", ["2026-03-01", "2026-02-14", "2020-01-01"])
+def test_merged_rows_keep_the_anchors_in_order(sales, new_date):
+    tree = sales_tree(sales)
+    tree.scroll_to(30)
+    cached_id = next(iter(tree.pages.values()))[1][0]
+    product_id = sales.get_sale_by_id(cached_id)[1]
+
+    new_id = sales.record_sale(product_id, 1, 2.0, new_date)
+    sales.delete_sale(cached_id)
+
+    assert tree.merge_rows(sales.get_sales_by_ids([new_id]), removed_ids=[cached_id], inserted_ids={new_id})
+    truth = all_sale_ids(sales)
+    assert tree.total_rows == len(truth)
+    for start in range(0, len(truth), 4):
+        assert visible_ids(tree, start, 4) == truth[start:start + 4]
+
+
+def test_merge_falls_back_when_a_removed_row_is_not_cached(sales):
+    tree = sales_tree(sales)
+    uncached_id = all_sale_ids(sales)[-1]
+
+    assert not tree.merge_rows([], removed_ids=[uncached_id])
+
+
+
+def test_patched_rows_keep_their_place(sales):
+    tree = sales_tree(sales)
+    row = tree._get_rows(0, 1)[0]
+    sale_id, product_id = row[0], sales.get_sale_by_id(row[0])[1]
+
+    sales.update_sale(sale_id, product_id, 3, 6.0, row[4])
+
+    assert tree.patch_rows(sales.get_sales_by_ids([sale_id]))
+    assert tree._get_rows(0, 1)[0][2:4] == (3, 6.0)
+
+
+def test_patch_falls_back_when_a_row_would_move_or_is_not_cached(sales):
+    tree = sales_tree(sales)
+    row = tree._get_rows(0, 1)[0]
+    moved = row[:4] + ("2020-01-01",)
+    uncached = sales.get_sales_by_ids([all_sale_ids(sales)[-1]])
+
+    assert not tree.patch_rows([moved], sort_key=lambda row: (row[4], row[0]))
+    assert not tree.patch_rows(uncached)
+    assert tree._get_rows(0, 1)[0] == row
@@ -0,0 +1,91 @@
+import time
+
+import pytest
+
+from inv_app import QueryWorker
+from inv_db import Database
+
+
+class FakeWidget:
+    def __init__(self):
+        self.callbacks = []
+
+    def after(self, ms, callback):
+        self.callbacks.append(callback)
+
+    def run_pending(self):
+        callbacks, self.callbacks = self.callbacks, []
+        for callback in callbacks:
+            callback()
+
+
+@pytest.fixture
+def worker(db):
+    widget = FakeWidget()
+    worker = QueryWorker(widget, db.db_name, readers=1)
+    yield worker
+    worker.stop()
+    for thread in worker.threads:
+        thread.join(timeout=5)
+
+
+def wait_for(worker, condition):
+    deadline = time.monotonic() + 5
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+        worker.widget.run_pending()
+
+
+def test_results_are_delivered_on_the_polling_thread(db, worker):
+    salt = db.add_product("Salt", "Spices", 1.0, 2.0, 10, 0, None)
+    results = []
+
+    worker.submit("search_products", "salt", on_done=results.append)
+    wait_for(worker, lambda: results)
+
+    assert results == [[salt]]
+
+
+def test_errors_go_to_the_error_callback(worker):
+    errors = []
+
+    worker.submit("get_sales_page", "not a number", on_done=pytest.fail, on_error=errors.append)
+    wait_for(worker, lambda: errors)
+
+    assert len(errors) == 1
+
+
+def test_cancelled_tasks_are_dropped(db, worker):
+    results = []
+    task = worker.submit("count_products", on_done=results.append)
+    worker.cancel(task)
+    worker.submit("count_products", on_done=results.append)
+
+    wait_for(worker, lambda: results)
+    wait_for(worker, lambda: worker.tasks.empty() and not worker.running and worker.finished.empty())
+
+    assert results == [0]
+
+
+
+def test_readers_cannot_write(db, worker):
+    errors = []
+
+    worker.submit("add_product", "Salt", "Spices", 1.0, 2.0, 10, 0, None, on_done=pytest.fail, on_error=errors.append)
+    wait_for(worker, lambda: errors)
+
+    assert db.count_products() == 0
+
+
+def test_readers_see_committed_rows_while_a_write_is_open(db):
+    salt = db.add_product("Salt", "Spices", 1.0, 2.0, 10, 0, None)
+    reader = Database(db.db_name, read_only=True)
+    try:
+        assert db.conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        with db.transaction():
+            db.record_sale(salt, 1, 2.0, "2026-01-05")
+            assert reader.count_sales() == 0
+            assert reader.search_products("salt") == [salt]
+        assert reader.count_sales() == 1
+    finally:
+        reader.close()